@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+"""Solve a corpus of puzzles, writing one JSON result record per line.
+
+Each PATH is a puzzle file in any format that rules/puzzle_io.py reads, or a
+directory, which is searched recursively for such files.  See
+solver/batch_solver.py for the fields of the result records.
+
+With --count-solutions, check each puzzle for uniqueness (or count its
+solutions, up to --limit) instead of solving it.
+
+With --longest-first, every puzzle is read and its solve time estimated
+before any is solved, and the slowest are started first (see
+solver/cost_estimator.py); refit the estimates from the results with
+calibrate_costs.py."""
+
+import argparse
+import json
+import os
+import sys
+
+from rules.puzzle_io import PUZZLE_READERS, read_puzzle_file
+from solver.batch_solver import SOLVERS, solve_batch
+from solver.cost_estimator import CostModel
+from solver.heuristics import STRATEGIES
+
+
+def puzzle_files(paths):
+    """Generate the puzzle files named by or found under @p paths."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for (dirpath, dirnames, filenames) in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in PUZZLE_READERS:
+                    yield os.path.join(dirpath, filename)
+
+
+def read_puzzles(paths):
+    """Generate every puzzle in the puzzle files named by or found under
+    @p paths."""
+    for path in puzzle_files(paths):
+        yield from read_puzzle_file(path)
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="Puzzle file or directory of puzzle files.")
+    parser.add_argument("-s", "--solver", choices=sorted(SOLVERS),
+                        default="backward_chain",
+                        help="Solver to use (default %(default)s).")
+    parser.add_argument("-t", "--timeout", type=float, metavar="SECONDS",
+                        help="Give up on any puzzle after this long.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of puzzles to solve at once.")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="Write results here instead of stdout.")
+    parser.add_argument("-c", "--count-solutions", action="store_true",
+                        help="Count solutions instead of solving.")
+    parser.add_argument("--limit", type=int, default=2,
+                        help="With --count-solutions, stop counting at this "
+                        "many solutions; 0 for no limit (default "
+                        "%(default)s, a uniqueness check).")
+    parser.add_argument("--store", metavar="FILE",
+                        help="Look up and save solutions in this solution "
+                        "store (an sqlite file; see "
+                        "solver/solution_store.py).")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES),
+                        help="Branching strategy of backward chaining "
+                        "solvers (see solver/heuristics.py; default: the "
+                        "solver's own).")
+    parser.add_argument("--longest-first", action="store_true",
+                        help="Start the puzzles estimated to be slowest "
+                        "first.")
+    parser.add_argument("--cost-model", metavar="FILE",
+                        help="With --longest-first, estimate with this "
+                        "model (see calibrate_costs.py) instead of the "
+                        "default.")
+    options = parser.parse_args(args[1:])
+    cost_model = None
+    if options.longest_first:
+        cost_model = (CostModel.load(options.cost_model)
+                      if options.cost_model else CostModel())
+
+    output = open(options.output, "w") if options.output else sys.stdout
+    try:
+        for record in solve_batch(read_puzzles(options.paths),
+                                  solver_name=options.solver,
+                                  timeout=options.timeout,
+                                  jobs=options.jobs,
+                                  count_limit=(options.limit
+                                               if options.count_solutions
+                                               else None),
+                                  store_path=options.store,
+                                  strategy=options.strategy,
+                                  cost_model=cost_model):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
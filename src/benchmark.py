@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+"""Benchmark the solvers on the sample puzzles and on generated puzzles (see
+rules/generator.py) of increasing size and fill density, writing the
+results as JSON.
+
+With --strategy, the backward chaining solvers are benchmarked once with each
+of the named branching strategies (see solver/heuristics.py), to compare
+their node counts.
+
+With --compare, also check the results against a saved baseline and exit
+with status 1 if any run regressed."""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from rules.generator import IMAGE_STYLES, generate_puzzle
+from rules.sample_puzzles import puzzles as sample_puzzles
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.batch_solver import SOLVERS
+from solver.heuristics import STRATEGIES
+from solver.solver_coroutine import SolutionNotFound
+from solver.solver_stats import SolverStats
+
+
+DEFAULT_SIZES = [10, 20, 30, 50, 100]
+DEFAULT_DENSITIES = [0.3, 0.5, 0.7]
+
+
+def workloads(sizes, densities, seeds, style="random"):
+    """Generate (workload description, puzzle) pairs to benchmark."""
+    for (name, puzzle) in sorted(sample_puzzles.items()):
+        yield ({"workload": name, "size": puzzle.width * puzzle.height,
+                "density": None, "seed": None}, puzzle)
+    for size in sizes:
+        for density in densities:
+            for seed in range(seeds):
+                yield ({"workload": style, "size": size * size,
+                        "density": density, "seed": seed},
+                       generate_puzzle(size, size, density, style, seed))
+
+
+def run_solver(solver_class, puzzle, timeout):
+    """Run @p solver_class on @p puzzle once, returning a dict of
+    measurements (everything but memory)."""
+    stats = SolverStats()
+    start = time.perf_counter()
+    deadline = start + timeout
+    status = "unsolvable"
+    try:
+        solver = solver_class(puzzle, stats=stats)
+        solution = None
+        for solution in solver.solve():
+            if time.perf_counter() > deadline:
+                status = "timeout"
+                break
+        else:
+            if (solution is not None and solution.complete() and
+                    solution.correct()):
+                status = "solved"
+    except SolutionNotFound:
+        pass
+    except Exception as e:
+        status = "error: %s: %s" % (type(e).__name__, e)
+    return {"status": status,
+            "wall_time": time.perf_counter() - start,
+            "nodes": stats["nodes"],
+            "line_solver_calls": stats["line_solves"],
+            "stats": stats.as_dict()}
+
+
+def measure(solver_class, puzzle, timeout, repeat, memory):
+    """Return the measurements of the fastest of @p repeat runs of
+    @p solver_class on @p puzzle, plus peak memory from a separate traced run
+    if @p memory is set."""
+    result = min((run_solver(solver_class, puzzle, timeout)
+                  for _ in range(repeat)),
+                 key=lambda result: result["wall_time"])
+    result["peak_memory"] = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run_solver(solver_class, puzzle, timeout)
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(options):
+    """Return the list of result records for the benchmark in @p options."""
+    results = []
+    for (workload, puzzle) in workloads(options.sizes, options.densities,
+                                        options.seeds, options.style):
+        for solver_name in options.solvers:
+            if (solver_name == "brute_force" and
+                    workload["size"] > options.brute_force_max_cells):
+                continue
+            if (solver_name == "line_product" and
+                    workload["size"] > options.line_product_max_cells):
+                continue
+            if (solver_name == "numpy_backward_chain" and
+                    workload["size"] > options.numpy_max_cells):
+                continue
+            for strategy in solver_strategies(solver_name, options):
+                record = dict(workload, puzzle=puzzle.name,
+                              solver=solver_name, strategy=strategy)
+                record.update(measure(make_solver(solver_name, strategy),
+                                      puzzle, options.timeout,
+                                      options.repeat,
+                                      not options.no_memory))
+                results.append(record)
+                print("%-24s %-16s %-26s %-10s %9.4fs %8d nodes" %
+                      (solver_name, strategy or "", puzzle.name,
+                       record["status"][:10], record["wall_time"],
+                       record["nodes"]), file=sys.stderr)
+    return results
+
+
+def solver_strategies(solver_name, options):
+    """Return the branching strategies (None for the default) to benchmark
+    the solver named @p solver_name with."""
+    if (options.strategies and
+            issubclass(SOLVERS[solver_name], BackwardChainSolver)):
+        return options.strategies
+    return [None]
+
+
+def make_solver(solver_name, strategy):
+    """Return a constructor for the solver named @p solver_name that
+    branches with the strategy named @p strategy, or its default if None."""
+    if strategy is None:
+        return SOLVERS[solver_name]
+
+    def make(puzzle, **kwargs):
+        # A new strategy for each run, so that no cache carries over.
+        return SOLVERS[solver_name](puzzle, strategy=STRATEGIES[strategy](),
+                                    **kwargs)
+    return make
+
+
+def result_key(record):
+    """Return the key identifying the same run in different benchmarks."""
+    return (record["solver"], record.get("strategy"), record["puzzle"])
+
+
+def compare(results, baseline, threshold, min_time):
+    """Return a list of descriptions of the runs in @p results that
+    regressed from the matching run in @p baseline: a solved puzzle that no
+    longer solves, a finished run that now times out, a wall time more than
+    @p threshold times the baseline's (ignoring times under @p min_time
+    seconds), or more nodes.  Times and node counts are only compared
+    between runs that finished in both, as a timed out run's depend on how
+    far it got."""
+    regressions = []
+    baseline_by_key = {result_key(record): record for record in baseline}
+    for record in results:
+        old = baseline_by_key.get(result_key(record))
+        if old is None:
+            continue
+        (solver_name, strategy, puzzle_name) = result_key(record)
+        if strategy is not None:
+            solver_name += "/" + strategy
+        name = "%s on %s" % (solver_name, puzzle_name)
+        if old["status"] == "solved" and record["status"] != "solved":
+            regressions.append("%s: %s, was solved" %
+                               (name, record["status"]))
+            continue
+        if record["status"] == "timeout" and old["status"] != "timeout":
+            regressions.append("%s: timeout, was %s" %
+                               (name, old["status"]))
+        if "timeout" in (record["status"], old["status"]):
+            continue
+        if (record["wall_time"] > min_time and
+                record["wall_time"] > old["wall_time"] * threshold):
+            regressions.append("%s: %.4fs, was %.4fs" %
+                               (name, record["wall_time"],
+                                old["wall_time"]))
+        if record["nodes"] > old["nodes"]:
+            regressions.append("%s: %d nodes, was %d" %
+                               (name, record["nodes"], old["nodes"]))
+    return regressions
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
+    parser.add_argument("-s", "--solver", dest="solvers", action="append",
+                        choices=sorted(SOLVERS),
+                        help="Solver to benchmark (default: all).")
+    parser.add_argument("--strategy", dest="strategies", action="append",
+                        choices=sorted(STRATEGIES),
+                        help="Branching strategy to benchmark the backward "
+                        "chaining solvers with (default: their own).")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=DEFAULT_SIZES,
+                        help="Widths of the generated square puzzles.")
+    parser.add_argument("--densities", type=float, nargs="+",
+                        default=DEFAULT_DENSITIES,
+                        help="Fill densities of the generated puzzles.")
+    parser.add_argument("--style", choices=sorted(IMAGE_STYLES),
+                        default="random",
+                        help="Image style of the generated puzzles.")
+    parser.add_argument("--seeds", type=int, default=1,
+                        help="Number of puzzles of each size and density.")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Time the fastest of this many runs.")
+    parser.add_argument("-t", "--timeout", type=float, default=10,
+                        help="Stop any run after this many seconds.")
+    parser.add_argument("--brute-force-max-cells", type=int, default=25,
+                        help="Skip brute force on puzzles larger than this.")
+    parser.add_argument("--line-product-max-cells", type=int, default=400,
+                        help="Skip line_product on puzzles larger than this.")
+    parser.add_argument("--numpy-max-cells", type=int, default=900,
+                        help="Skip numpy_backward_chain on puzzles larger "
+                        "than this.")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not measure peak memory.")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="Write results here instead of stdout.")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="Report regressions against this result file.")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio counted as a regression.")
+    parser.add_argument("--min-time", type=float, default=0.01,
+                        help="Ignore slowdowns of runs faster than this.")
+    options = parser.parse_args(args[1:])
+    options.solvers = options.solvers or sorted(SOLVERS)
+
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "results": run_benchmarks(options)}
+    text = json.dumps(report, indent=1)
+    if options.output:
+        with open(options.output, "w") as stream:
+            stream.write(text + "\n")
+    else:
+        print(text)
+
+    if options.compare:
+        with open(options.compare) as stream:
+            baseline = json.load(stream)["results"]
+        regressions = compare(report["results"], baseline,
+                              options.threshold, options.min_time)
+        for regression in regressions:
+            print("REGRESSION:", regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
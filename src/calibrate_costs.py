@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+"""Refit the solve time estimates used by batch.py --longest-first to the
+result records of earlier runs of it, and report how well the old and new
+estimates predicted the actual wall times.
+
+Each RESULTS file is the JSON lines output of a batch.py --longest-first
+run.  Fit with results from the solver and machine the model will be used
+with; see solver/cost_estimator.py."""
+
+import argparse
+import json
+import math
+import sys
+
+from solver.cost_estimator import CostModel
+
+
+def read_records(paths):
+    for path in paths:
+        with open(path) as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def log_error(model, records):
+    """Return the root mean square error of @p model's estimates of the
+    wall times of @p records, in orders of magnitude."""
+    errors = [(math.log10(model.predict(record["features"])) -
+               math.log10(max(record["wall_time"], model.MIN_TIME))) ** 2
+              for record in records]
+    return math.sqrt(sum(errors) / len(errors))
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
+    parser.add_argument("paths", nargs="+", metavar="RESULTS",
+                        help="Result file of batch.py --longest-first.")
+    parser.add_argument("--cost-model", metavar="FILE",
+                        help="Model the results were estimated with "
+                        "(default: the built-in one).")
+    parser.add_argument("-o", "--output", metavar="FILE", required=True,
+                        help="Write the refitted model here.")
+    options = parser.parse_args(args[1:])
+
+    records = [record for record in read_records(options.paths)
+               if record.get("features") is not None and
+               record["status"] in ("solved", "unsolvable")]
+    if not records:
+        print("No results with cost features", file=sys.stderr)
+        return 1
+    old = (CostModel.load(options.cost_model) if options.cost_model
+           else CostModel())
+    new = CostModel()
+    new.fit(records)
+    print("%d results; error was %.2f, now %.2f orders of magnitude" %
+          (len(records), log_error(old, records), log_error(new, records)),
+          file=sys.stderr)
+    new.save(options.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
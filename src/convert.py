@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+"""Convert puzzle files to a JSON lines file or a binary puzzle corpus.
+
+The output format is chosen by the extension of OUTPUT (.jsonl or .ngc);
+inputs may be in any format that rules/puzzle_io.py reads."""
+
+import argparse
+import os
+import sys
+
+from rules.puzzle_io import PUZZLE_WRITERS, read_puzzle_file, write_puzzle_file
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
+    parser.add_argument("output", metavar="OUTPUT",
+                        help="File to write (.jsonl or .ngc).")
+    parser.add_argument("inputs", nargs="+", metavar="INPUT",
+                        help="Puzzle file to read.")
+    options = parser.parse_args(args[1:])
+    if os.path.splitext(options.output)[1].lower() not in PUZZLE_WRITERS:
+        parser.error("OUTPUT must end in .jsonl or .ngc")
+
+    write_puzzle_file((puzzle
+                       for path in options.inputs
+                       for puzzle in read_puzzle_file(path)),
+                      options.output)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -10,6 +10,7 @@ from solver.solver_coroutine import test_solver
 
 from solver.brute_force import BruteForceNonogramSolver
 from solver.backward_chain_solver import BackwardChainSolver
+from solver.parallel_solver import ParallelBackwardChainSolver
 
 def main(args):
     parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
@@ -26,6 +27,7 @@ def main(args):
              (BackwardChainSolver, puzzles['easy_puzzle']),
              (BackwardChainSolver, puzzles['ambiguous_puzzle']),
              (BackwardChainSolver, puzzles['hard_picture']),
+             (ParallelBackwardChainSolver, puzzles['hard_picture']),
             ]
     tests_to_run = []
 
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""Solve puzzles with workers on several machines.
+
+On one machine, run "coordinate PATH..." to solve each puzzle in the puzzle
+files at PATH (in any format that rules/puzzle_io.py reads), one after
+another, writing a JSON line per puzzle.  On each worker machine, run
+"work HOST" to search subproblems for the coordinator at HOST until
+interrupted.  See solver/distributed_solver.py for details."""
+
+import argparse
+import json
+import sys
+import time
+
+from rules.puzzle_io import read_puzzle_file, solution_to_strings
+from solver.distributed_solver import DistributedSolver, run_worker
+
+
+def coordinate(options):
+    for path in options.paths:
+        for puzzle in read_puzzle_file(path):
+            solver = DistributedSolver(puzzle, workers=options.workers,
+                                       split_depth=options.split_depth,
+                                       host=options.host, port=options.port)
+            result = solver.run()
+            record = {"name": puzzle.name, "status": result.status,
+                      "solution": (None if result.solution is None else
+                                   solution_to_strings(result.solution)),
+                      "wall_time": result.wall_time,
+                      "stats": solver.stats.as_dict()}
+            print(json.dumps(record), flush=True)
+
+
+def work(options):
+    while True:
+        try:
+            searched = run_worker(options.host, options.port)
+            print("Searched %d subproblems" % searched, file=sys.stderr)
+        except OSError:
+            # No coordinator yet, or between puzzles.
+            time.sleep(options.retry)
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
+    parser.add_argument("-p", "--port", type=int, default=8765,
+                        help="Port of the coordinator (default "
+                        "%(default)s).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    coordinator = commands.add_parser("coordinate",
+                                      help="Serve puzzles to workers.")
+    coordinator.add_argument("paths", nargs="+", metavar="PATH",
+                             help="Puzzle file.")
+    coordinator.add_argument("--host", default="127.0.0.1",
+                             help="Address to listen on (default "
+                             "%(default)s).")
+    coordinator.add_argument("-w", "--workers", type=int, default=0,
+                             help="Number of local workers to start too.")
+    coordinator.add_argument("--split-depth", type=int, default=3,
+                             help="Levels of hypotheses to expand into "
+                             "subproblems (default %(default)s).")
+    worker = commands.add_parser("work", help="Search for a coordinator.")
+    worker.add_argument("host", help="Address of the coordinator.")
+    worker.add_argument("--retry", type=float, default=1,
+                        help="Seconds between attempts to connect.")
+    options = parser.parse_args(args[1:])
+    try:
+        if options.command == "coordinate":
+            coordinate(options)
+        else:
+            work(options)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv)
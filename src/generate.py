@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""Generate puzzles from random images and write them to a JSON lines file
+or a binary puzzle corpus, or to stdout as JSON lines.
+
+The output format is chosen by the extension of OUTPUT (.jsonl or .ngc).
+See rules/generator.py for the image styles.  The same options and seed
+always generate the same puzzles."""
+
+import argparse
+import os
+import sys
+
+from rules.generator import IMAGE_STYLES, generate_puzzles
+from rules.puzzle_io import PUZZLE_WRITERS, write_json_lines, write_puzzle_file
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
+    parser.add_argument("output", metavar="OUTPUT",
+                        help="File to write (.jsonl or .ngc), or - for "
+                        "stdout.")
+    parser.add_argument("-n", "--count", type=int, default=1,
+                        help="Number of puzzles (default %(default)s).")
+    parser.add_argument("-W", "--width", type=int, default=20,
+                        help="Puzzle width (default %(default)s).")
+    parser.add_argument("-H", "--height", type=int,
+                        help="Puzzle height (default: the width).")
+    parser.add_argument("-d", "--density", type=float, default=0.5,
+                        help="Fraction of cells marked (default "
+                        "%(default)s).")
+    parser.add_argument("--style", choices=sorted(IMAGE_STYLES),
+                        default="random",
+                        help="Image style (default %(default)s).")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the first puzzle (default "
+                        "%(default)s).")
+    parser.add_argument("-u", "--unique", action="store_true",
+                        help="Skip puzzles with more than one solution.")
+    parser.add_argument("--unique-timeout", type=float, default=10,
+                        metavar="SECONDS",
+                        help="With --unique, also skip puzzles not checked "
+                        "in this long (default %(default)s).")
+    options = parser.parse_args(args[1:])
+    if (options.output != "-" and
+            os.path.splitext(options.output)[1].lower()
+            not in PUZZLE_WRITERS):
+        parser.error("OUTPUT must end in .jsonl or .ngc")
+
+    puzzles = generate_puzzles(options.width, options.height,
+                               options.density, options.style, options.seed,
+                               options.count, options.unique,
+                               options.unique_timeout)
+    if options.output == "-":
+        write_json_lines(puzzles, sys.stdout)
+    else:
+        write_puzzle_file(puzzles, options.output)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,236 @@
+"""A compact, bit-packed representation of Nonogram solutions.
+
+NonogramSolution stores one string per cell, which makes cloning and row
+extraction proportional to the size of the board.  BitboardNonogramSolution
+instead stores each row and each column as a pair of integer bitmasks: a
+"known" mask with a bit set for every cell that is not UNKNOWN, and a
+"marked" mask with a bit set for every MARKED cell.  Bit x of a row's masks
+describes column x; bit y of a column's masks describes row y.
+
+Cloning copies four short lists of integers, rows and columns are returned
+as live views rather than fresh lists, and counting uses popcounts.  The
+NonogramSolution API (cells, row, column, mark, unmark, ...) is preserved,
+so existing solvers can use either representation.
+"""
+
+from collections.abc import Sequence
+
+from rules.nonogram import NonogramSolution, MARKED, UNMARKED, UNKNOWN
+
+
+def _popcount(mask):
+    """Return the number of set bits in @p mask."""
+    return bin(mask).count("1")
+
+
+def _cell_value(known, marked, bit):
+    """Return the cell value encoded at @p bit of the given masks."""
+    if not known & bit:
+        return UNKNOWN
+    return MARKED if marked & bit else UNMARKED
+
+
+class _LineView(Sequence):
+    """A read-only view of one row or column of a BitboardNonogramSolution.
+
+    The view reflects later changes to the solution; use list() on it to
+    take a snapshot."""
+
+    def __init__(self, known_masks, marked_masks, index, length):
+        self._known_masks = known_masks
+        self._marked_masks = marked_masks
+        self._index = index
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._length))]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("line index out of range")
+        return _cell_value(self._known_masks[self._index],
+                           self._marked_masks[self._index], 1 << i)
+
+    def __iter__(self):
+        known = self._known_masks[self._index]
+        marked = self._marked_masks[self._index]
+        for i in range(self._length):
+            yield _cell_value(known, marked, 1 << i)
+
+    def __contains__(self, value):
+        known = self._known_masks[self._index]
+        marked = self._marked_masks[self._index]
+        full = (1 << self._length) - 1
+        if value == UNKNOWN:
+            return known != full
+        if value == MARKED:
+            return bool(known & marked)
+        if value == UNMARKED:
+            return bool(known & ~marked & full)
+        return False
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _ColumnView(_LineView):
+    """A view of one column that also permits assignment, so that
+    solution.cells[x][y] = value keeps working."""
+
+    def __init__(self, solution, x):
+        super(_ColumnView, self).__init__(solution._col_known,
+                                          solution._col_marked,
+                                          x, solution.puzzle.height)
+        self._solution = solution
+
+    def __setitem__(self, y, value):
+        self._solution._set(self._index, y, value)
+
+
+class _CellsView(object):
+    """Adapter presenting a BitboardNonogramSolution as the cells[x][y]
+    list of lists used by NonogramSolution."""
+
+    def __init__(self, solution):
+        self._solution = solution
+
+    def __len__(self):
+        return self._solution.puzzle.width
+
+    def __getitem__(self, x):
+        if not 0 <= x < self._solution.puzzle.width:
+            raise IndexError("column index out of range")
+        return _ColumnView(self._solution, x)
+
+    def __iter__(self):
+        for x in range(self._solution.puzzle.width):
+            yield _ColumnView(self._solution, x)
+
+
+class BitboardNonogramSolution(NonogramSolution):
+    """Represents a partial or complete solution to an NonogramPuzzle as
+    per-row and per-column bitmasks.  See the module docstring."""
+
+    # NonogramSolution.__init__ is deliberately not called; it would build
+    # the list-of-lists cells that this class replaces.
+    def __init__(self, puzzle):
+        self._puzzle = puzzle
+        self._row_known = [0] * puzzle.height
+        self._row_marked = [0] * puzzle.height
+        self._col_known = [0] * puzzle.width
+        self._col_marked = [0] * puzzle.width
+
+    @classmethod
+    def from_solution(cls, solution):
+        """Return a BitboardNonogramSolution with the same cells as
+        @p solution."""
+        new_soln = cls(solution.puzzle)
+        for (x, y) in solution.all_coordinates():
+            if solution.cells[x][y] != UNKNOWN:
+                new_soln._set(x, y, solution.cells[x][y])
+        return new_soln
+
+    @property
+    def cells(self):
+        """A cells[x][y] view of the solution, as in NonogramSolution."""
+        return _CellsView(self)
+
+    def _set(self, x, y, value):
+        """Set the cell at (@p x, @p y) to @p value, which may be UNKNOWN."""
+        row_bit = 1 << x
+        col_bit = 1 << y
+        if value == UNKNOWN:
+            self._row_known[y] &= ~row_bit
+            self._col_known[x] &= ~col_bit
+        else:
+            self._row_known[y] |= row_bit
+            self._col_known[x] |= col_bit
+        if value == MARKED:
+            self._row_marked[y] |= row_bit
+            self._col_marked[x] |= col_bit
+        else:
+            self._row_marked[y] &= ~row_bit
+            self._col_marked[x] &= ~col_bit
+
+    def _get(self, x, y):
+        """Return the value of the cell at (@p x, @p y)."""
+        return _cell_value(self._row_known[y], self._row_marked[y], 1 << x)
+
+    def unknown_cell_coordinates(self):
+        # See superclass docstring.
+        full = (1 << self.puzzle.height) - 1
+        return [(x, y)
+                for x in range(self.puzzle.width)
+                if self._col_known[x] != full
+                for y in range(self.puzzle.height)
+                if not self._col_known[x] & (1 << y)]
+
+    def count(self, cell_value):
+        # See superclass docstring.
+        marked = sum(_popcount(mask) for mask in self._row_marked)
+        if cell_value == MARKED:
+            return marked
+        known = sum(_popcount(mask) for mask in self._row_known)
+        if cell_value == UNMARKED:
+            return known - marked
+        if cell_value == UNKNOWN:
+            return self.puzzle.width * self.puzzle.height - known
+        return 0
+
+    def row(self, y):
+        """Return a view of the @p y th row of the solution."""
+        return _LineView(self._row_known, self._row_marked,
+                         y, self.puzzle.width)
+
+    def column(self, x):
+        """Return a view of the @p x th column of the solution."""
+        return _LineView(self._col_known, self._col_marked,
+                         x, self.puzzle.height)
+
+    def complete(self):
+        # See superclass docstring.
+        full = (1 << self.puzzle.width) - 1
+        return all(known == full for known in self._row_known)
+
+    def mark(self, *mark_coords):
+        # See superclass docstring.
+        for (x, y) in mark_coords:
+            assert self._get(x, y) == UNKNOWN
+            self._set(x, y, MARKED)
+
+    def unmark(self, *unmark_coords):
+        # See superclass docstring.
+        for (x, y) in unmark_coords:
+            assert self._get(x, y) == UNKNOWN
+            self._set(x, y, UNMARKED)
+
+    def clear(self, *clear_coords):
+        # See superclass docstring.
+        for (x, y) in clear_coords:
+            self._set(x, y, UNKNOWN)
+
+    def clone(self):
+        # See superclass docstring.
+        new_soln = BitboardNonogramSolution.__new__(type(self))
+        new_soln._puzzle = self._puzzle
+        new_soln._row_known = list(self._row_known)
+        new_soln._row_marked = list(self._row_marked)
+        new_soln._col_known = list(self._col_known)
+        new_soln._col_marked = list(self._col_marked)
+        return new_soln
+
+    def debug_print(self):
+        # See superclass docstring.
+        print(self.puzzle.ascii_col_header_string())
+        for y in range(self.puzzle.height):
+            content = ' '.join(self.row(y))
+            print(self.puzzle.ascii_nth_single_row_header(y) + " " + content)
@@ -0,0 +1,79 @@
+"""Canonical forms of puzzles, for recognizing the same puzzle again.
+
+Two puzzles are the same, for caching solutions, if their clues are equal
+up to one of the eight symmetries of the grid (the identity, mirroring
+left-right or top-bottom, rotations and transposition), whatever their
+names.  Each symmetry is a (transpose, flip_x, flip_y) triple of bools,
+applied to the grid as: mirror left-right if flip_x, then top-bottom if
+flip_y, then transpose if transpose.
+
+canonical_form() picks, of the eight transformed puzzles, the one whose
+clues sort first, and fingerprint() hashes it.  A solution of the canonical
+puzzle is mapped back to a solution of the original with
+untransform_strings().
+"""
+
+import hashlib
+import itertools
+
+
+# Every symmetry of the grid, as a (transpose, flip_x, flip_y) triple.
+SYMMETRIES = tuple(itertools.product((False, True), repeat=3))
+
+
+def transform_clues(row_run_counts, col_run_counts, symmetry):
+    """Return the (row run counts, column run counts) of the puzzle with
+    clues @p row_run_counts and @p col_run_counts after @p symmetry."""
+    (transpose, flip_x, flip_y) = symmetry
+    (rows, cols) = (tuple(row_run_counts), tuple(col_run_counts))
+    if flip_x:
+        (rows, cols) = (tuple(runs[::-1] for runs in rows), cols[::-1])
+    if flip_y:
+        (rows, cols) = (rows[::-1], tuple(runs[::-1] for runs in cols))
+    if transpose:
+        (rows, cols) = (cols, rows)
+    return (rows, cols)
+
+
+def canonical_form(puzzle):
+    """Return (rows, columns, symmetry): the clues of the canonical form
+    of @p puzzle and the symmetry that takes @p puzzle to it."""
+    return min(transform_clues(puzzle.row_run_counts, puzzle.col_run_counts,
+                               symmetry) + (symmetry,)
+               for symmetry in SYMMETRIES)
+
+
+def fingerprint(puzzle):
+    """Return (key, symmetry): a hex string identifying @p puzzle up to
+    symmetry and name, and the symmetry that takes @p puzzle to its
+    canonical form."""
+    (rows, cols, symmetry) = canonical_form(puzzle)
+    text = "%s/%s" % ("|".join(",".join(map(str, runs)) for runs in rows),
+                      "|".join(",".join(map(str, runs)) for runs in cols))
+    return (hashlib.sha256(text.encode("ascii")).hexdigest(), symmetry)
+
+
+def transform_strings(strings, symmetry):
+    """Return the grid of row strings @p strings (see
+    puzzle_io.solution_to_strings) after @p symmetry."""
+    (transpose, flip_x, flip_y) = symmetry
+    if flip_x:
+        strings = [row[::-1] for row in strings]
+    if flip_y:
+        strings = strings[::-1]
+    if transpose:
+        strings = ["".join(column) for column in zip(*strings)]
+    return list(strings)
+
+
+def untransform_strings(strings, symmetry):
+    """Return the grid of row strings @p strings before @p symmetry, ie
+    apply the inverse of @p symmetry."""
+    (transpose, flip_x, flip_y) = symmetry
+    if transpose:
+        strings = ["".join(column) for column in zip(*strings)]
+    if flip_y:
+        strings = strings[::-1]
+    if flip_x:
+        strings = [row[::-1] for row in strings]
+    return list(strings)
@@ -0,0 +1,131 @@
+"""Generating puzzles from random images, eg for scale and stress testing.
+
+Each puzzle is the puzzle whose solution is an image drawn in one of
+several styles (see IMAGE_STYLES) at a given size and fill density:
+
+  random     each cell is marked independently with probability density
+  blocks     overlapping random rectangles and ellipses, added until the
+             image is at least density full, which looks more like the
+             pictures of published puzzles
+  symmetric  a random left half mirrored onto the right half
+
+Generation is reproducible: the image depends only on its style, size,
+density and seed.  generate_puzzles() generates puzzles lazily, so batches
+of any size can be fed straight to solve_batch() or write_corpus().
+
+Puzzles are only uniquely solvable if generate_puzzles() is asked to check;
+random images usually are not.
+"""
+
+import itertools
+import random
+import time
+
+from rules.nonogram import puzzle_from_image
+
+
+def random_image(width, height, density, rng):
+    """Return a @p width x @p height image (a list of rows of 0 or 1) in
+    which each cell is marked with probability @p density, using the
+    random.Random @p rng."""
+    return [bytearray(rng.random() < density for _ in range(width))
+            for _ in range(height)]
+
+
+def blocks_image(width, height, density, rng):
+    """Return an image (see random_image) made of overlapping rectangles and
+    ellipses, at least @p density full unless that takes too many shapes."""
+    image = [bytearray(width) for _ in range(height)]
+    target = density * width * height
+    (max_width, max_height) = (max(1, width // 4), max(1, height // 4))
+    max_shapes = 100 + int(8 * target / (max_width * max_height / 4 + 1))
+    marked = 0
+    for _ in range(max_shapes):
+        if marked >= target:
+            break
+        (shape_width, shape_height) = (rng.randint(1, max_width),
+                                       rng.randint(1, max_height))
+        (left, top) = (rng.randint(0, width - shape_width),
+                       rng.randint(0, height - shape_height))
+        ellipse = rng.random() < 0.5
+        for y in range(shape_height):
+            row = image[top + y]
+            if ellipse:
+                # Half the width of the ellipse at this height.
+                dy = (2 * y + 1) / shape_height - 1
+                half = shape_width / 2 * (1 - dy * dy) ** 0.5
+                start = left + int(round(shape_width / 2 - half))
+                end = left + int(round(shape_width / 2 + half))
+            else:
+                (start, end) = (left, left + shape_width)
+            marked += end - start - sum(row[start:end])
+            row[start:end] = b"\x01" * (end - start)
+    return image
+
+
+def symmetric_image(width, height, density, rng):
+    """Return a random image (see random_image) that is symmetric about its
+    vertical axis."""
+    half = random_image((width + 1) // 2, height, density, rng)
+    return [row + row[:width // 2][::-1] for row in half]
+
+
+# Image generators selectable by name; each takes (width, height, density,
+# rng).
+IMAGE_STYLES = {
+    "random": random_image,
+    "blocks": blocks_image,
+    "symmetric": symmetric_image,
+}
+
+
+def generate_puzzle(width, height=None, density=0.5, style="random",
+                    seed=0):
+    """Return the puzzle whose solution is the @p style image (see
+    IMAGE_STYLES) of the given size (square if @p height is None) and
+    @p density, generated from @p seed."""
+    assert style in IMAGE_STYLES, "Unknown image style %s" % style
+    assert 0 <= density <= 1, "Density must be between 0 and 1"
+    if height is None:
+        height = width
+    rng = random.Random("%s/%dx%d/%r/%d" % (style, width, height, density,
+                                            seed))
+    image = IMAGE_STYLES[style](width, height, density, rng)
+    return puzzle_from_image("%s %dx%d d=%g #%d" %
+                             (style, width, height, density, seed), image)
+
+
+def _is_unique(puzzle, timeout):
+    """Return True if @p puzzle has exactly one solution, False if not, or
+    None if that is still unknown after @p timeout seconds (if not None)."""
+    # Imported here so that the rules do not depend on the solvers.
+    from solver.solution_counter import find_solutions
+    deadline = None if timeout is None else time.monotonic() + timeout
+    found = 0
+    for solution in find_solutions(puzzle, limit=2):
+        if solution is not None:
+            found += 1
+        elif deadline is not None and time.monotonic() > deadline:
+            return None
+    return found == 1
+
+
+def generate_puzzles(width, height=None, density=0.5, style="random",
+                     seed=0, count=None, unique=False, unique_timeout=None):
+    """Generate puzzles (see generate_puzzle) from seeds @p seed, seed + 1,
+    ..., stopping after @p count puzzles, or never if @p count is None.
+
+    If @p unique is set, puzzles with more than one solution are skipped
+    (and do not count towards @p count).  Checking solves each puzzle, so
+    is only practical for puzzles that solve quickly; puzzles that cannot
+    be checked within @p unique_timeout seconds (if not None) are skipped
+    too."""
+    generated = 0
+    for puzzle_seed in itertools.count(seed):
+        if count is not None and generated >= count:
+            return
+        puzzle = generate_puzzle(width, height, density, style, puzzle_seed)
+        if unique and not _is_unique(puzzle, unique_timeout):
+            continue
+        generated += 1
+        yield puzzle
@@ -33,13 +33,19 @@ class NonogramPuzzle(object):
 
     This is an immutable object, because it is unlikely that mutating it would
     be valid and likely it would create bugs.
+
+    Pass validate=False only for run counts already known to be valid (for
+    instance, read back from a corpus of validated puzzles).
     """
 
-    def __init__(self, name, row_run_counts, column_run_counts):
+    def __init__(self, name, row_run_counts, column_run_counts,
+                 validate=True):
         self._name = name
         self._row_run_counts = tuple(tuple(run) for run in row_run_counts)
         self._col_run_counts = tuple(tuple(run) for run in column_run_counts)
-        self.validate()
+        self._max_row_header_width = None
+        if validate:
+            self.validate()
 
     def validate(self):
         """Check the validity of a given puzzle (ie, that the run counts are
@@ -103,8 +109,12 @@ class NonogramPuzzle(object):
         """Return the maximum value of ascii_single_row_header_width for the
         whole puzzle, ie, the width to which all row run count headers must be
         padded."""
-        return max(self.ascii_single_row_header_width(run_counts)
-                   for run_counts in self.row_run_counts)
+        # Cached, as every row header needs it; the run counts never change.
+        if self._max_row_header_width is None:
+            self._max_row_header_width = max(
+                self.ascii_single_row_header_width(run_counts)
+                for run_counts in self.row_run_counts)
+        return self._max_row_header_width
 
     def ascii_nth_single_row_header(self, n):
         """Return an appropriately padded row header for row @p n."""
@@ -144,26 +154,31 @@ MARKED, UNMARKED, UNKNOWN = "##", ". ", "  "
 
 def satisfies(cells, run_count_list):
     """Return True if the list of MARKED or UNMARKED cells in @p cells
-    satisfies the list of runs in @p run_count_list."""
+    satisfies the list of runs in @p run_count_list.
+
+    Runs of length 0 (as in the [0] of an empty line) are ignored.  This
+    takes a single pass over @p cells, stopping at the first mismatch."""
     if UNKNOWN in cells:
         raise AttributeError("UNKNOWN in satisfies() call %s" % cells)
-    if not run_count_list:
-        # No more runs; the remaining cells had better be empty.
-        return all(cell == UNMARKED for cell in cells)
-    if not cells:
-        return run_count_list == [0]  # Last run just finished.
-    new_run_count_list = list(run_count_list)
-    if cells[0] == UNMARKED:
-        if new_run_count_list[0] == 0:
-            # Just finished a run; mark it off.
-            new_run_count_list = new_run_count_list[1:]
-        return satisfies(cells[1:], new_run_count_list)
-    elif cells[0] == MARKED:
-        if new_run_count_list[0] == 0:
-            # Overran this run.
+    runs = [run for run in run_count_list if run]
+    num_runs = len(runs)
+    i = 0  # Index of the run being matched.
+    run = 0  # Length so far of the run of MARKED cells being matched.
+    for cell in cells:
+        if cell == MARKED:
+            run += 1
+            if i == num_runs or run > runs[i]:
+                return False
+        elif run:
+            if run != runs[i]:
+                return False
+            i += 1
+            run = 0
+    if run:
+        if run != runs[i]:
             return False
-        return satisfies(cells[1:],
-                         [run_count_list[0] - 1] + new_run_count_list[1:])
+        i += 1
+    return i == num_runs
 
 
 class NonogramSolution(object):
@@ -261,6 +276,12 @@ class NonogramSolution(object):
             assert self.cells[x][y] == UNKNOWN
             self.cells[x][y] = UNMARKED
 
+    def clear(self, *clear_coords):
+        """Set the cells at the indicated coordinates back to UNKNOWN, eg to
+        undo a mark() or unmark()."""
+        for (x, y) in clear_coords:
+            self.cells[x][y] = UNKNOWN
+
     def clone(self):
         """Returns a copy of the solution.
 
@@ -280,6 +301,50 @@ class NonogramSolution(object):
             print(self.puzzle.ascii_nth_single_row_header(y) + " " + content)
 
 
+class CorrectnessTracker(object):
+    """Incrementally checks a changing NonogramSolution, as correct() does,
+    re-checking only the rows and columns touched since the last check.
+
+    Callers report each changed cell with touch(); the cost of correct() is
+    then proportional to the number of lines touched rather than to the size
+    of the board."""
+
+    def __init__(self, solution):
+        self.solution = solution
+        puzzle = solution.puzzle
+        self._dirty_rows = set(range(puzzle.height))
+        self._dirty_cols = set(range(puzzle.width))
+        self._bad_rows = set()
+        self._bad_cols = set()
+
+    def touch(self, *coords):
+        """Record that the cells at the given coordinates have changed."""
+        for (x, y) in coords:
+            self._dirty_rows.add(y)
+            self._dirty_cols.add(x)
+
+    @staticmethod
+    def _recheck(dirty, bad, line, run_counts):
+        """Re-check each line index in @p dirty, updating the set @p bad of
+        known lines that do not satisfy their runs."""
+        for i in dirty:
+            cells = line(i)
+            if UNKNOWN in cells or satisfies(cells, run_counts[i]):
+                bad.discard(i)
+            else:
+                bad.add(i)
+        dirty.clear()
+
+    def correct(self):
+        """Return what self.solution.correct() would."""
+        puzzle = self.solution.puzzle
+        self._recheck(self._dirty_rows, self._bad_rows, self.solution.row,
+                      puzzle.row_run_counts)
+        self._recheck(self._dirty_cols, self._bad_cols,
+                      self.solution.column, puzzle.col_run_counts)
+        return not (self._bad_rows or self._bad_cols)
+
+
 def all_possible_total_solutions(base_solution):
     """Generator of all possible total solutions (nearly all of them wrong)
     for @p puzzle."""
@@ -297,3 +362,27 @@ def all_possible_total_solutions(base_solution):
         for coord in unmarks:
             solution.unmark(coord)
         yield solution
+
+
+def image_run_counts(line):
+    """Return the run counts of the marked (truthy) cells of @p line."""
+    runs = []
+    run = 0
+    for marked in line:
+        if marked:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+    return runs
+
+
+def puzzle_from_image(name, image):
+    """Return the NonogramPuzzle whose solution is @p image, a list of rows
+    of truthy (marked) or falsy (unmarked) values."""
+    return NonogramPuzzle(
+        name,
+        [image_run_counts(row) for row in image],
+        [image_run_counts(column) for column in zip(*image)])
@@ -0,0 +1,323 @@
+"""Reading and writing puzzles and solutions.
+
+Supported puzzle file formats:
+
+ * JSON lines (.jsonl): one JSON object per line, such as
+     {"name": "Easy", "rows": [[1], [1, 1]], "columns": [[1], [1], [1]]}
+ * JSON (.json): a single such object, or a list of them.
+ * The .non format used by many puzzle collections: "width N" and "height N"
+   lines, then a "rows" line followed by one clue per row and a "columns"
+   line followed by one clue per column, each a comma-separated list of run
+   lengths ("0" for an empty line).  A "title" line, if any, names the
+   puzzle; other keys are ignored.
+ * A binary corpus (.ngc), written by write_corpus and read by
+   PuzzleCorpus, which memory-maps the file so that any puzzle can be read
+   by index without parsing the rest.
+
+Readers are generators, so that arbitrarily large files can be processed
+one puzzle at a time.
+"""
+
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+
+from rules.nonogram import NonogramPuzzle, NonogramSolution
+from rules.nonogram import MARKED, UNMARKED, UNKNOWN
+
+
+# Single-character forms of the cell values, for compact output.
+CELL_CHARS = {MARKED: "#", UNMARKED: ".", UNKNOWN: "?"}
+
+
+def puzzle_to_json(puzzle):
+    """Return a JSON-serializable dict describing @p puzzle."""
+    return {"name": puzzle.name,
+            "rows": [list(runs) for runs in puzzle.row_run_counts],
+            "columns": [list(runs) for runs in puzzle.col_run_counts]}
+
+
+def puzzle_from_json(record, validate=True):
+    """Return the NonogramPuzzle described by the dict @p record, as
+    returned by puzzle_to_json."""
+    return NonogramPuzzle(record.get("name"), record["rows"],
+                          record["columns"], validate=validate)
+
+
+def read_json_lines(path, validate=True):
+    """Generate the puzzles in the JSON lines file at @p path, skipping blank
+    lines.  Puzzles without a name are named after their line number."""
+    with open(path) as stream:
+        for (line_num, line) in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record.setdefault("name", "%s:%d" % (path, line_num))
+            yield puzzle_from_json(record, validate)
+
+
+def write_json_lines(puzzles, stream):
+    """Write each puzzle in the iterable @p puzzles to @p stream as a line of
+    JSON."""
+    for puzzle in puzzles:
+        stream.write(json.dumps(puzzle_to_json(puzzle)) + "\n")
+
+
+def read_json(path, validate=True):
+    """Generate the puzzles in the JSON file at @p path, which holds either
+    one puzzle object or a list of them."""
+    with open(path) as stream:
+        records = json.load(stream)
+    if isinstance(records, dict):
+        records = [records]
+    for (i, record) in enumerate(records):
+        record.setdefault("name", "%s:%d" % (path, i))
+        yield puzzle_from_json(record, validate)
+
+
+def _parse_non_clue(text):
+    """Return the run counts in a .non clue line such as "3,1"."""
+    runs = [int(run) for run in text.replace(",", " ").split()]
+    return [run for run in runs if run]
+
+
+def parse_non(lines, name=None, validate=True):
+    """Return the NonogramPuzzle described by the .non format @p lines,
+    named by its title or, failing that, @p name."""
+    keys = {}
+    clues = {"rows": [], "columns": []}
+    section = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if section is not None and line[0].isdigit():
+            clues[section].append(_parse_non_clue(line))
+            continue
+        (key, _, value) = line.partition(" ")
+        key = key.lower()
+        section = key if key in clues else None
+        keys[key] = value.strip().strip('"')
+    assert "width" in keys and "height" in keys, \
+        "%s: .non puzzle lacks width or height" % name
+    (width, height) = (int(keys["width"]), int(keys["height"]))
+    assert len(clues["rows"]) == height, \
+        "%s: expected %d row clues" % (name, height)
+    assert len(clues["columns"]) == width, \
+        "%s: expected %d column clues" % (name, width)
+    return NonogramPuzzle(keys.get("title") or name, clues["rows"],
+                          clues["columns"], validate=validate)
+
+
+def read_non(path, validate=True):
+    """Generate the puzzle in the .non file at @p path."""
+    with open(path) as stream:
+        yield parse_non(stream, name=os.path.basename(path),
+                        validate=validate)
+
+
+# Binary corpus format.  All integers are little-endian.
+#  header:  4 byte magic, 4 bytes padding, u64 puzzle count,
+#           u64 file offset of the index
+#  records: u16 name length in bytes (0xFFFF if the name is None), the
+#           UTF-8 name, then u16 values: width, height, and for each row and
+#           then each column its number of runs followed by the runs
+#  index:   one u64 record offset per puzzle
+CORPUS_MAGIC = b"NGC1"
+_CORPUS_HEADER = struct.Struct("<4s4xQQ")
+_NAME_LENGTH = struct.Struct("<H")
+_NO_NAME = 0xFFFF
+_OFFSET = struct.Struct("<Q")
+
+
+def _little_endian(values):
+    """Byteswap the array @p values in place if this machine is big-endian,
+    converting between native and little-endian order."""
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _encode_puzzle(puzzle):
+    """Return the binary corpus record for @p puzzle."""
+    if puzzle.name is None:
+        name = b""
+        name_length = _NO_NAME
+    else:
+        name = puzzle.name.encode("utf-8")
+        name_length = len(name)
+        assert name_length < _NO_NAME, "Puzzle name is too long"
+    values = array.array("H", [puzzle.width, puzzle.height])
+    for runs in puzzle.row_run_counts + puzzle.col_run_counts:
+        values.append(len(runs))
+        values.extend(runs)
+    return (_NAME_LENGTH.pack(name_length) + name +
+            _little_endian(values).tobytes())
+
+
+def _decode_puzzle(data, validate=False):
+    """Return the NonogramPuzzle encoded in the record @p data."""
+    (name_length,) = _NAME_LENGTH.unpack_from(data)
+    pos = _NAME_LENGTH.size
+    if name_length == _NO_NAME:
+        name = None
+    else:
+        name = bytes(data[pos:pos + name_length]).decode("utf-8")
+        pos += name_length
+    values = array.array("H")
+    values.frombytes(data[pos:])
+    _little_endian(values)
+    (width, height) = (values[0], values[1])
+    lines = []
+    pos = 2
+    for _ in range(height + width):
+        num_runs = values[pos]
+        lines.append(values[pos + 1:pos + 1 + num_runs])
+        pos += 1 + num_runs
+    return NonogramPuzzle(name, lines[:height], lines[height:],
+                          validate=validate)
+
+
+def write_corpus(puzzles, path):
+    """Write each puzzle in the iterable @p puzzles to a binary corpus file
+    at @p path.  Returns the number of puzzles written.
+
+    Puzzles are streamed to the file; only their offsets are kept in memory
+    until the index is written."""
+    offsets = array.array("Q")
+    with open(path, "wb") as stream:
+        stream.write(_CORPUS_HEADER.pack(CORPUS_MAGIC, 0, 0))
+        for puzzle in puzzles:
+            offsets.append(stream.tell())
+            stream.write(_encode_puzzle(puzzle))
+        index_offset = stream.tell()
+        stream.write(_little_endian(offsets).tobytes())
+        stream.seek(0)
+        stream.write(_CORPUS_HEADER.pack(CORPUS_MAGIC, len(offsets),
+                                         index_offset))
+    return len(offsets)
+
+
+class PuzzleCorpus(object):
+    """Random access to the puzzles of a binary corpus file, which is
+    memory-mapped rather than read.
+
+    The corpus is assumed to hold puzzles that were validated when they were
+    written, so they are not validated again unless @p validate is True."""
+
+    def __init__(self, path, validate=False):
+        self.path = path
+        self.validate = validate
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self._count, self._index_offset) = \
+            _CORPUS_HEADER.unpack_from(self._map)
+        if magic != CORPUS_MAGIC:
+            self.close()
+            raise ValueError("%s is not a puzzle corpus" % path)
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, index):
+        """Return the file offset of record @p index, or of the index itself
+        for @p index == len(self)."""
+        if index == self._count:
+            return self._index_offset
+        return _OFFSET.unpack_from(
+            self._map, self._index_offset + index * _OFFSET.size)[0]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("corpus index out of range")
+        data = memoryview(self._map)[self._offset(index):
+                                     self._offset(index + 1)]
+        try:
+            return _decode_puzzle(data, self.validate)
+        finally:
+            data.release()
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def close(self):
+        """Release the memory map and file."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def read_corpus(path, validate=False):
+    """Generate the puzzles in the binary corpus file at @p path."""
+    with PuzzleCorpus(path, validate) as corpus:
+        yield from corpus
+
+
+# Readers for each supported file extension.
+PUZZLE_READERS = {
+    ".jsonl": read_json_lines,
+    ".json": read_json,
+    ".non": read_non,
+    ".ngc": read_corpus,
+}
+
+
+def read_puzzle_file(path, **kwargs):
+    """Generate the puzzles in the file at @p path, choosing a reader by its
+    extension (see PUZZLE_READERS)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PUZZLE_READERS:
+        raise ValueError("Unknown puzzle file type: %s" % path)
+    return PUZZLE_READERS[extension](path, **kwargs)
+
+
+def _write_json_lines_file(puzzles, path):
+    """Write the puzzles in the iterable @p puzzles to a JSON lines file at
+    @p path."""
+    with open(path, "w") as stream:
+        write_json_lines(puzzles, stream)
+
+
+# Writers for each supported output file extension.
+PUZZLE_WRITERS = {
+    ".jsonl": _write_json_lines_file,
+    ".ngc": write_corpus,
+}
+
+
+def write_puzzle_file(puzzles, path):
+    """Write the puzzles in the iterable @p puzzles to the file at @p path,
+    choosing a writer by its extension (see PUZZLE_WRITERS).  The puzzles
+    are streamed to the file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PUZZLE_WRITERS:
+        raise ValueError("Cannot write puzzle file type: %s" % path)
+    PUZZLE_WRITERS[extension](puzzles, path)
+
+
+def solution_to_strings(solution):
+    """Return @p solution as a list of row strings, one character per cell
+    (see CELL_CHARS)."""
+    return ["".join(CELL_CHARS[cell] for cell in row)
+            for row in solution.rows]
+
+
+def solution_from_strings(puzzle, strings):
+    """Return the NonogramSolution of @p puzzle described by @p strings, as
+    returned by solution_to_strings."""
+    values = dict((char, cell) for (cell, char) in CELL_CHARS.items())
+    solution = NonogramSolution(puzzle)
+    solution.cells = [list(map(values.__getitem__, column))
+                      for column in zip(*strings)]
+    return solution
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""Test suite for rules.bitboard."""
+
+import random
+import unittest
+
+from rules.bitboard import *
+from rules.nonogram import *
+from rules.sample_puzzles import *
+
+
+class BitboardTest(unittest.TestCase):
+    def assertSameCells(self, packed, plain):
+        puzzle = plain.puzzle
+        for y in range(puzzle.height):
+            self.assertEqual(list(packed.row(y)), plain.row(y))
+        for x in range(puzzle.width):
+            self.assertEqual(list(packed.column(x)), plain.column(x))
+        for (x, y) in plain.all_coordinates():
+            self.assertEqual(packed.cells[x][y], plain.cells[x][y])
+        for value in (MARKED, UNMARKED, UNKNOWN):
+            self.assertEqual(packed.count(value), plain.count(value))
+        self.assertEqual(packed.unknown_cell_coordinates(),
+                         plain.unknown_cell_coordinates())
+        self.assertEqual(packed.complete(), plain.complete())
+        self.assertEqual(packed.correct(), plain.correct())
+
+    def test_matches_list_solution(self):
+        rng = random.Random(0)
+        plain = NonogramSolution(hard_puzzle)
+        packed = BitboardNonogramSolution(hard_puzzle)
+        coords = list(plain.all_coordinates())
+        rng.shuffle(coords)
+        for (i, coord) in enumerate(coords):
+            if rng.random() < 0.5:
+                plain.mark(coord)
+                packed.mark(coord)
+            else:
+                plain.unmark(coord)
+                packed.unmark(coord)
+            if i % 50 == 0:
+                self.assertSameCells(packed, plain)
+        self.assertSameCells(packed, plain)
+        self.assertSameCells(BitboardNonogramSolution.from_solution(plain),
+                             plain)
+
+    def test_clone_is_independent(self):
+        packed = BitboardNonogramSolution(easy_puzzle)
+        packed.mark((0, 0))
+        copy = packed.clone()
+        copy.unmark((1, 0))
+        self.assertEqual(packed.cells[1][0], UNKNOWN)
+        self.assertEqual(copy.cells[1][0], UNMARKED)
+        self.assertIsInstance(copy, BitboardNonogramSolution)
+
+    def test_views_are_live(self):
+        packed = BitboardNonogramSolution(easy_puzzle)
+        row = packed.row(1)
+        self.assertIn(UNKNOWN, row)
+        packed.cells[0][1] = MARKED
+        packed.unmark((1, 1))
+        packed.mark((2, 1))
+        self.assertEqual(row, [MARKED, UNMARKED, MARKED])
+        self.assertNotIn(UNKNOWN, row)
+
+    def test_correct(self):
+        packed = BitboardNonogramSolution(easy_puzzle)
+        packed.mark((1, 0), (0, 1), (2, 1))
+        packed.unmark((0, 0), (2, 0), (1, 1))
+        self.assertTrue(packed.complete())
+        self.assertTrue(packed.correct())
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+"""Test suite for rules.canonical."""
+
+import unittest
+
+from rules.canonical import *
+from rules.nonogram import NonogramPuzzle
+from rules.sample_puzzles import *
+
+
+def transformed_puzzle(puzzle, symmetry, name=None):
+    """Return @p puzzle after @p symmetry."""
+    (rows, cols) = transform_clues(puzzle.row_run_counts,
+                                   puzzle.col_run_counts, symmetry)
+    return NonogramPuzzle(name, rows, cols)
+
+
+class CanonicalTest(unittest.TestCase):
+    def test_fingerprint_ignores_symmetry_and_name(self):
+        (key, _) = fingerprint(hard_puzzle)
+        for symmetry in SYMMETRIES:
+            variant = transformed_puzzle(hard_puzzle, symmetry, "Renamed")
+            self.assertEqual(fingerprint(variant)[0], key)
+        self.assertNotEqual(fingerprint(easy_puzzle)[0], key)
+
+    def test_strings_round_trip(self):
+        strings = ["#..", "##.", "..."]
+        (rows, cols) = ([[1], [2], []], [[2], [1], []])
+        for symmetry in SYMMETRIES:
+            moved = transform_strings(strings, symmetry)
+            self.assertEqual(untransform_strings(moved, symmetry), strings)
+            # The transformed image matches the transformed clues.
+            (moved_rows, _) = transform_clues(rows, cols, symmetry)
+            self.assertEqual([[len(run) for run in row.split(".") if run]
+                              for row in moved],
+                             [list(runs) for runs in moved_rows])
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
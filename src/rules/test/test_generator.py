@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+"""Test suite for rules.generator."""
+
+import itertools
+import unittest
+
+from rules.generator import *
+from solver.solution_counter import count_solutions
+
+
+class GeneratorTest(unittest.TestCase):
+    def test_reproducible(self):
+        for style in IMAGE_STYLES:
+            (a, b) = (generate_puzzle(12, 9, 0.4, style, seed=3)
+                      for _ in range(2))
+            self.assertEqual(a.name, b.name)
+            self.assertEqual(a.row_run_counts, b.row_run_counts)
+            self.assertEqual((a.width, a.height), (12, 9))
+        self.assertNotEqual(generate_puzzle(12, seed=0).row_run_counts,
+                            generate_puzzle(12, seed=1).row_run_counts)
+
+    def test_density(self):
+        for style in IMAGE_STYLES:
+            for density in (0.2, 0.7):
+                puzzle = generate_puzzle(60, density=density, style=style)
+                marked = sum(sum(runs) for runs in puzzle.row_run_counts)
+                self.assertAlmostEqual(marked / 3600, density, delta=0.1)
+
+    def test_symmetric(self):
+        puzzle = generate_puzzle(9, 6, style="symmetric")
+        for runs in puzzle.row_run_counts:
+            self.assertEqual(list(runs), list(reversed(runs)))
+
+    def test_lazy_and_unique(self):
+        endless = generate_puzzles(6, density=0.6)
+        self.assertEqual(len(list(itertools.islice(endless, 50))), 50)
+        unique = list(generate_puzzles(6, density=0.6, count=5,
+                                       unique=True))
+        self.assertEqual(len(unique), 5)
+        for puzzle in unique:
+            self.assertEqual(len(count_solutions(puzzle)), 1)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -33,6 +33,46 @@ class SolutionErrorTest(unittest.TestCase):
         self.assertGreater(num_solutions, 1)
 
 
+class SatisfiesTest(unittest.TestCase):
+    def test_runs(self):
+        line = [MARKED, MARKED, UNMARKED, MARKED]
+        self.assertTrue(satisfies(line, [2, 1]))
+        self.assertFalse(satisfies(line, [2]))
+        self.assertFalse(satisfies(line, [3]))
+        self.assertFalse(satisfies(line, [1, 2]))
+        self.assertFalse(satisfies(line, [2, 1, 1]))
+        self.assertTrue(satisfies([UNMARKED] * 3, [0]))
+        self.assertTrue(satisfies([UNMARKED] * 3, []))
+        with self.assertRaises(AttributeError):
+            satisfies([MARKED, UNKNOWN], [1])
+
+    def test_interrupted_run(self):
+        self.assertFalse(satisfies([MARKED, UNMARKED, MARKED], [2]))
+
+    def test_long_line(self):
+        line = ([MARKED] * 3 + [UNMARKED]) * 5000
+        self.assertTrue(satisfies(line, [3] * 5000))
+
+
+class CorrectnessTrackerTest(unittest.TestCase):
+    def test_tracks_correct(self):
+        solution = NonogramSolution(easy_puzzle)
+        tracker = CorrectnessTracker(solution)
+        self.assertTrue(tracker.correct())
+        solution.mark((0, 0), (1, 1))
+        solution.unmark((1, 0), (0, 1), (2, 0), (2, 1))
+        tracker.touch((0, 0), (1, 1), (1, 0), (0, 1), (2, 0), (2, 1))
+        self.assertEqual(tracker.correct(), solution.correct())
+        self.assertFalse(tracker.correct())
+        changed = [(0, 0), (1, 0), (0, 1), (1, 1), (2, 1)]
+        solution.clear(*changed)
+        solution.unmark((0, 0), (1, 1))
+        solution.mark((1, 0), (0, 1), (2, 1))
+        tracker.touch(*changed)
+        self.assertTrue(solution.correct())
+        self.assertTrue(tracker.correct())
+
+
 # Obligatory main hook
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""Test suite for rules.puzzle_io."""
+
+import os
+import tempfile
+import unittest
+
+from rules.nonogram import *
+from rules.puzzle_io import *
+from rules.sample_puzzles import *
+
+
+def assert_same_puzzle(test, original, copy):
+    test.assertEqual(original.name, copy.name)
+    test.assertEqual(original.row_run_counts, copy.row_run_counts)
+    test.assertEqual(original.col_run_counts, copy.col_run_counts)
+
+
+class JsonLinesTest(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "puzzles.jsonl")
+            with open(path, "w") as stream:
+                write_json_lines(puzzles.values(), stream)
+            read_back = list(read_json_lines(path))
+        self.assertEqual(len(read_back), len(puzzles))
+        for (original, copy) in zip(puzzles.values(), read_back):
+            assert_same_puzzle(self, original, copy)
+
+    def test_solution_strings(self):
+        solution = NonogramSolution(easy_puzzle)
+        solution.mark((1, 0))
+        solution.unmark((0, 0))
+        self.assertEqual(solution_to_strings(solution), [".#?", "???"])
+        self.assertEqual(solution_to_strings(solution_from_strings(
+            easy_puzzle, [".#?", "???"])), [".#?", "???"])
+
+
+class NonFormatTest(unittest.TestCase):
+    def test_parse(self):
+        puzzle = parse_non("""catalogue "sample"
+title "Easy Puzzle"
+width 3
+height 2
+
+rows
+1
+1,1
+
+columns
+1
+1
+1
+goal "010101"
+""".splitlines())
+        assert_same_puzzle(self, easy_puzzle, puzzle)
+
+    def test_empty_lines_and_default_name(self):
+        puzzle = parse_non(["width 1", "height 3", "rows", "1", "1", "0",
+                            "columns", "1 1"], name="contradictory")
+        self.assertEqual(puzzle.name, "contradictory")
+        self.assertEqual(puzzle.row_run_counts, ((1,), (1,), ()))
+
+
+class CorpusTest(unittest.TestCase):
+    def test_round_trip(self):
+        originals = list(puzzles.values()) + [
+            NonogramPuzzle(None, [[1]], [[1]])]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "puzzles.ngc")
+            self.assertEqual(write_corpus(iter(originals), path),
+                             len(originals))
+            with PuzzleCorpus(path) as corpus:
+                self.assertEqual(len(corpus), len(originals))
+                assert_same_puzzle(self, originals[3], corpus[3])
+                assert_same_puzzle(self, originals[-1], corpus[-1])
+                with self.assertRaises(IndexError):
+                    corpus[len(originals)]
+            for (original, copy) in zip(originals,
+                                        read_puzzle_file(path)):
+                assert_same_puzzle(self, original, copy)
+
+    def test_not_a_corpus(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "puzzles.ngc")
+            with open(path, "wb") as stream:
+                stream.write(b"\0" * 64)
+            with self.assertRaises(ValueError):
+                PuzzleCorpus(path)
+
+    def test_write_by_extension(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for extension in (".jsonl", ".ngc"):
+                path = os.path.join(tmpdir, "puzzles" + extension)
+                write_puzzle_file(iter(puzzles.values()), path)
+                self.assertEqual(len(list(read_puzzle_file(path))),
+                                 len(puzzles))
+            with self.assertRaises(ValueError):
+                write_puzzle_file([], os.path.join(tmpdir, "puzzles.non"))
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""Serve puzzle solving over HTTP on the local machine.
+
+POST a JSON body {"puzzle": {...}, "solver": NAME, "timeout": SECONDS,
+"stream": BOOL} to /solve, where the puzzle is in the JSON lines format of
+rules/puzzle_io.py, and get back a result record (see
+solver/batch_solver.py), or with "stream" a JSON line per progress event
+and then the result.  GET /status reports the load.  See
+solver/solve_service.py for details."""
+
+import argparse
+import asyncio
+import sys
+
+from solver.solve_service import SolveService, start_server
+
+
+async def serve(options):
+    service = SolveService(workers=options.workers,
+                           max_queue=options.max_queue,
+                           max_timeout=options.max_timeout)
+    server = await start_server(service, options.host, options.port)
+    for sock in server.sockets:
+        print("Serving on %s:%d" % sock.getsockname()[:2], file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__, prog=args[0])
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on (default %(default)s).")
+    parser.add_argument("-p", "--port", type=int, default=8080,
+                        help="Port to listen on (default %(default)s).")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="Number of puzzles to solve at once (default "
+                        "one per core).")
+    parser.add_argument("-q", "--max-queue", type=int,
+                        help="Number of requests that may wait for a worker "
+                        "before the rest are refused (default 4 per "
+                        "worker).")
+    parser.add_argument("-t", "--max-timeout", type=float, metavar="SECONDS",
+                        help="Limit on the timeout of any request.")
+    options = parser.parse_args(args[1:])
+    try:
+        asyncio.run(serve(options))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv)
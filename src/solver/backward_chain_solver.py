@@ -1,133 +1,592 @@
 """A solver that alternates between deductive and hypothetical phases:
 
 Deductive phase:
- * Generate a list of all possible lines for each row and column.
- * For each list, mark or unmark any cell that is in common between all of
-   the possible lines.
- * Iterate to fixity.
+ * Solve each row and column in isolation (see solver_utils for the line
+   solvers), counting its possible lines.
+ * Mark or unmark any cell that is in common between all of the possible
+   lines.
+ * Queue the crossing row or column of every cell so changed for solving
+   again, and iterate until the queue is empty.
+
+Probing phase (optional; see the probing argument):
+ * For each of the most promising UNKNOWN cells, try each value in turn and
+   deduce from it to fixity, then undo.
+ * A value that leads to a contradiction is impossible, so set the other
+   one; a cell that both values set alike must take that value.
 
 Hypothetical phase:
- * Find the cell with the fewest possible row and possible column lines.
+ * Choose a cell and an order for its values with a branching strategy
+   (see heuristics.py); by default, the cell with the fewest possible row
+   and possible column lines, unmarked first.
  * Explore each possible value in turn.
+ * Optionally (see the decompose argument), split the unknown cells into
+   independent components (see decomposition.py) and only hypothesize
+   about one component at a time, keeping each once it is solved.
+
+The search runs in a single solver object, without recursion: every change
+to the partial solution and the legal line counts is recorded on an undo
+trail, each hypothesis pushes a decision onto an explicit stack, and
+backtracking undoes the trail back to the failed decision instead of
+discarding copies of the board.
 """
 
+import copy
+import time
+
 import rules.nonogram as rules
 
 # TODO ggould figure out why pycharm dislikes doing these as local imports.
-from solver.solver_utils import all_legal_lines
+from solver.decomposition import components
+from solver.heuristics import MostConstrained
+from solver.line_cache import LineSolutionCache
 from solver.solver_coroutine import SolverCoroutine, SolutionNotFound
+from solver.solver_coroutine import BACKTRACK, BRANCH, CELL
+
+# Kinds of entry on the undo trail:
+#  (_CELL, coords)              the cell was assigned
+#  (_ROW_COUNT, y, old_count)   legal_row_counts[y] was changed
+#  (_COL_COUNT, x, old_count)   legal_col_counts[x] was changed
+#  (_ATTR, name, old_value)     the attribute was replaced (see save_attr)
+_CELL, _ROW_COUNT, _COL_COUNT, _ATTR = range(4)
 
 
 class BackwardChainSolver(SolverCoroutine):
     """A solver (see solver_coroutine.py for API details) that uses
-    alternating deductive and recursive phases."""
+    alternating deductive and hypothetical phases."""
+
+    # Default number of cells to probe in each probing phase.
+    DEFAULT_PROBE_LIMIT = 64
+
+    # The adaptive probing budget (see probe()) for stalls below the root
+    # of the search: at most MAX_PROBE_ROUNDS probing phases each time
+    # deduction stalls, each ending once PROBE_PATIENCE probed cells in a
+    # row prove nothing; and after the first PROBE_WARMUP probed cells of a
+    # search, no more probing while it has taken over PROBE_SHARE times as
+    # long as the rest of the search.
+    MAX_PROBE_ROUNDS = 2
+    PROBE_PATIENCE = 8
+    PROBE_WARMUP = 16
+    PROBE_SHARE = 1.0
+
+    def __init__(self, puzzle, initial_solution=None, line_solver=None,
+                 stats=None, probing=False, probe_limit=None,
+                 decompose=False, focus=None, strategy=None):
+        """If @p line_solver is None, a new LineSolutionCache is created and
+        shared with every hypothesis of this solver; pass a cache (or any
+        other line solver) explicitly to share it more widely.  The same
+        goes for @p stats and SolverStats.
 
-    def __init__(self, puzzle, initial_solution=None):
-        super(BackwardChainSolver, self).__init__(puzzle, initial_solution)
+        If @p probing is set, each time deduction stalls the solver probes
+        up to @p probe_limit cells (DEFAULT_PROBE_LIMIT if None), those with
+        the fewest legal row and column lines first, before it
+        hypothesizes, within an adaptive budget (see probe()).
+
+        @p strategy is the BranchingStrategy (see heuristics.py) that
+        chooses hypotheses; by default, a new MostConstrained.
+
+        If @p decompose is set, solve() searches the independent components
+        of the puzzle one at a time, smallest first.  If @p focus is not
+        None, only its cells are hypothesized about, and the search ends
+        (without necessarily completing the solution) once they are all
+        known."""
+        super(BackwardChainSolver, self).__init__(puzzle, initial_solution,
+                                                  stats)
+        if line_solver is None:
+            line_solver = LineSolutionCache()
+        self.line_solver = line_solver
+        self.probing = probing
+        self.probe_limit = (self.DEFAULT_PROBE_LIMIT if probe_limit is None
+                            else probe_limit)
+        # The number of cells probed so far in this search, when the search
+        # started, and the time spent probing since.
+        self._probed = 0
+        self._search_start = time.perf_counter()
+        self._probe_time = 0.0
+        self.depth = 0
         self.partial_solution = None
-        self.partial_solution_legal_rows = None
-        self.partial_solution_legal_cols = None
+        self.legal_row_counts = None
+        self.legal_col_counts = None
+        self.dirty_rows = set()
+        self.dirty_cols = set()
+        self.decompose = decompose
+        self.focus = focus
+        self.strategy = MostConstrained() if strategy is None else strategy
+        self.trail = []
+        self._decisions = []
+        # Set once a component is kept whose cells were hypothesized.
+        self._committed = False
+        # While events() runs, the value last reported for each cell changed
+        # since, and the BRANCH and BACKTRACK events not yet reported.
+        self._changed = None
+        self._markers = None
         self.update_partials(self.initial_solution.clone())
 
     def update_partials(self, new_partial):
-        """Update the solver with a new partial solution, and causes
-        regeneration of the cached legal rows/columns."""
-        self.partial_solution = new_partial
-        self.partial_solution_legal_rows = [
-            list(all_legal_lines(self.puzzle.row_run_counts[y],
-                                 self.partial_solution.row(y)))
-            for y in range(self.puzzle.height)]
-        self.partial_solution_legal_cols = [
-            list(all_legal_lines(self.puzzle.col_run_counts[x],
-                                 self.partial_solution.column(x)))
-            for x in range(self.puzzle.width)]
+        """Update the solver with a new partial solution, and queue every row
+        and column of it for solving by the next call to deduce().
+
+        self.legal_row_counts and self.legal_col_counts hold the number of
+        legal lines for each row and column as of the last time it was
+        solved; they are None until then.  The undo trail is emptied."""
+        with self.stats.timer("update_partials"):
+            self.partial_solution = new_partial
+            self.legal_row_counts = [None] * self.puzzle.height
+            self.legal_col_counts = [None] * self.puzzle.width
+            self.dirty_rows = set(range(self.puzzle.height))
+            self.dirty_cols = set(range(self.puzzle.width))
+            self.trail = []
+
+    def assign(self, coords, value):
+        """Set the UNKNOWN cell at @p coords of the partial solution to
+        @p value (MARKED or UNMARKED), record it on the undo trail and queue
+        its row and column."""
+        (x, y) = coords
+        if self._changed is not None:
+            self._changed.setdefault(coords, rules.UNKNOWN)
+        if value == rules.MARKED:
+            self.partial_solution.mark(coords)
+        else:
+            self.partial_solution.unmark(coords)
+        self.trail.append((_CELL, coords))
+        self.dirty_rows.add(y)
+        self.dirty_cols.add(x)
+
+    def unassign(self, coords):
+        """Set the cell at @p coords back to UNKNOWN; called by undo().
+        Subclasses with per-cell state should extend this."""
+        if self._changed is not None:
+            (x, y) = coords
+            self._changed.setdefault(coords,
+                                     self.partial_solution.cells[x][y])
+        self.partial_solution.clear(coords)
+
+    def save_attr(self, name):
+        """Record the current value of attribute @p name on the undo trail,
+        for subclasses that replace (rather than modify) state which undo()
+        must restore."""
+        self.trail.append((_ATTR, name, getattr(self, name)))
+
+    def undo(self, trail_length):
+        """Undo every change recorded since the undo trail had
+        @p trail_length entries, and empty the queue of lines to solve
+        (which was empty at any point the search returns to)."""
+        trail = self.trail
+        while len(trail) > trail_length:
+            entry = trail.pop()
+            kind = entry[0]
+            if kind == _CELL:
+                self.unassign(entry[1])
+            elif kind == _ROW_COUNT:
+                self.legal_row_counts[entry[1]] = entry[2]
+            elif kind == _COL_COUNT:
+                self.legal_col_counts[entry[1]] = entry[2]
+            else:
+                setattr(self, entry[1], entry[2])
+        self.dirty_rows = set()
+        self.dirty_cols = set()
+
+    def _solve_row(self, y):
+        """Solve row @p y, assigning any cells that it forces.  Return True
+        if any cell changed."""
+        row = self.partial_solution.row(y)
+        self.stats.count("line_solves")
+        with self.stats.timer("line_solver"):
+            (num_lines, deduced) = self.line_solver(
+                self.puzzle.row_run_counts[y], row)
+        self.trail.append((_ROW_COUNT, y, self.legal_row_counts[y]))
+        self.legal_row_counts[y] = num_lines
+        if not num_lines:
+            raise SolutionNotFound("Deduction created an impossible row")
+        changes = [x for x in range(self.puzzle.width)
+                   if row[x] == rules.UNKNOWN and deduced[x] != rules.UNKNOWN]
+        for x in changes:
+            self.assign((x, y), deduced[x])
+        # The row already agrees with its own result; only the crossing
+        # columns need solving again.
+        self.dirty_rows.discard(y)
+        if changes:
+            self.stats.count("deductions", len(changes))
+        return bool(changes)
+
+    def _solve_col(self, x):
+        """Solve column @p x, assigning any cells that it forces.  Return
+        True if any cell changed."""
+        col = self.partial_solution.column(x)
+        self.stats.count("line_solves")
+        with self.stats.timer("line_solver"):
+            (num_lines, deduced) = self.line_solver(
+                self.puzzle.col_run_counts[x], col)
+        self.trail.append((_COL_COUNT, x, self.legal_col_counts[x]))
+        self.legal_col_counts[x] = num_lines
+        if not num_lines:
+            raise SolutionNotFound("Deduction created an impossible column")
+        changes = [y for y in range(self.puzzle.height)
+                   if col[y] == rules.UNKNOWN and deduced[y] != rules.UNKNOWN]
+        for y in changes:
+            self.assign((x, y), deduced[y])
+        self.dirty_cols.discard(x)
+        if changes:
+            self.stats.count("deductions", len(changes))
+        return bool(changes)
 
     def deduce(self):
         """Change UNKNOWN cells to MARKED or UNMARKED in self.partial_solution
         where that can be inferred from commonalities between the possible
         lines.  Return True if changes were made, to allow the caller to
-        iterate this method to fixity."""
-        new_partial_solution = self.partial_solution.clone()
+        iterate this method to fixity.
+
+        Only the queued rows and columns are solved: each call solves the
+        queued columns and then the queued rows, and any line crossing a
+        changed cell is queued again.  Raises SolutionNotFound if a solved
+        line has no legal lines."""
+        self.stats.count("deduce_passes")
         changed = False
-        for (x, col) in enumerate(self.partial_solution.columns):
-            possible_lines = self.partial_solution_legal_cols[x]
-            for y in range(self.puzzle.height):
-                if new_partial_solution.cells[x][y] != rules.UNKNOWN:
-                    continue
-                if len(set(line[y] for line in possible_lines)) == 1:
-                    changed = True
-                    new_partial_solution.cells[x][y] = possible_lines[0][y]
-        for (y, row) in enumerate(self.partial_solution.rows):
-            possible_lines = self.partial_solution_legal_rows[y]
-            for x in range(self.puzzle.width):
-                if new_partial_solution.cells[x][y] != rules.UNKNOWN:
+        with self.stats.timer("deduce"):
+            cols, self.dirty_cols = sorted(self.dirty_cols), set()
+            for x in cols:
+                changed |= self._solve_col(x)
+            rows, self.dirty_rows = sorted(self.dirty_rows), set()
+            for y in rows:
+                changed |= self._solve_row(y)
+        return changed
+
+    def deduce_to_fixity(self):
+        """Call deduce() until it makes no more changes."""
+        while self.deduce():
+            pass
+
+    def probe_value(self, coords, value):
+        """Return the cells that deduction to fixity sets if the cell at
+        @p coords were @p value, as a dict from coordinates to values, or
+        None if that leads to a contradiction.  The partial solution is left
+        unchanged."""
+        self.stats.count("probes")
+        trail_length = len(self.trail)
+        self.assign(coords, value)
+        try:
+            self.deduce_to_fixity()
+            cells = self.partial_solution.cells
+            return {entry[1]: cells[entry[1][0]][entry[1][1]]
+                    for entry in self.trail[trail_length:]
+                    if entry[0] == _CELL}
+        except SolutionNotFound:
+            return None
+        finally:
+            self.undo(trail_length)
+
+    def probe(self):
+        """Probe up to self.probe_limit UNKNOWN cells, most constrained
+        first (see heuristics.MostConstrained), setting every cell that
+        probing proves and deducing from it to fixity.  Call this once
+        deduce() has reached fixity.
+
+        Before the first hypothesis, probing is not limited: what it proves
+        there holds for the whole search, and it is paid for only once.
+        Below the root, each probed cell costs two deductions to fixity, so
+        probing is cut short where it is not paying off: the phase ends once
+        PROBE_PATIENCE probed cells in a row prove nothing, and (after
+        PROBE_WARMUP probed cells) whenever probing has taken more than
+        PROBE_SHARE times as long as the rest of the search.
+
+        Return True if any cell changed.  Raises SolutionNotFound if every
+        value of some cell leads to a contradiction."""
+        if not self._probe_budget_left():
+            return False
+        ranked = sorted(
+            (self.legal_row_counts[y] + self.legal_col_counts[x], (x, y))
+            for (x, y) in self.partial_solution.unknown_cell_coordinates())
+        changed = False
+        fruitless = 0
+        with self.stats.timer("probe"):
+            for (_, coords) in ranked[:self.probe_limit]:
+                (x, y) = coords
+                if self.partial_solution.cells[x][y] != rules.UNKNOWN:
+                    continue  # Set by an earlier probe.
+                if not self._probe_budget_left():
+                    break
+                self._probed += 1
+                start = time.perf_counter()
+                outcomes = [self.probe_value(coords, value)
+                            for value in (rules.MARKED, rules.UNMARKED)]
+                self._probe_time += time.perf_counter() - start
+                if outcomes[0] is None and outcomes[1] is None:
+                    raise SolutionNotFound("Every value of a cell failed")
+                if outcomes[0] is None:
+                    forced = {coords: rules.UNMARKED}
+                elif outcomes[1] is None:
+                    forced = {coords: rules.MARKED}
+                else:
+                    forced = {cell: value
+                              for (cell, value) in outcomes[0].items()
+                              if outcomes[1].get(cell) == value}
+                if not forced:
+                    fruitless += 1
+                    if (self._decisions and
+                            fruitless >= self.PROBE_PATIENCE):
+                        break
                     continue
-                if len(set(line[x] for line in possible_lines)) == 1:
-                    changed = True
-                    new_partial_solution.cells[x][y] = possible_lines[0][x]
-        if changed:
-            self.update_partials(new_partial_solution)
+                fruitless = 0
+                for (cell, value) in forced.items():
+                    self.assign(cell, value)
+                self.stats.count("probe_deductions", len(forced))
+                self.deduce_to_fixity()
+                changed = True
         return changed
 
+    def _probe_budget_left(self):
+        """Return whether the adaptive probing budget (see probe()) allows
+        probing another cell."""
+        if not self._decisions or self._probed < self.PROBE_WARMUP:
+            return True
+        searching = (time.perf_counter() - self._search_start -
+                     self._probe_time)
+        return self._probe_time <= self.PROBE_SHARE * searching
+
+    def copy(self):
+        """Return a new solver of the same class whose partial solution is a
+        copy of this one, sharing this solver's line solver.
+
+        The new solver inherits this solver's legal line counts and queue,
+        so it has no lines to solve again until its partial solution
+        changes; its undo trail starts empty.  Subclasses with further state
+        should extend this."""
+        solver = copy.copy(self)
+        solver.trail = []
+        solver._decisions = []
+        solver._changed = None
+        solver._markers = None
+        solver.initial_solution = self.partial_solution
+        solver.partial_solution = self.partial_solution.clone()
+        solver.legal_row_counts = list(self.legal_row_counts)
+        solver.legal_col_counts = list(self.legal_col_counts)
+        solver.dirty_rows = set(self.dirty_rows)
+        solver.dirty_cols = set(self.dirty_cols)
+        return solver
+
+    def hypothesis(self, coords, value):
+        """Return a new solver whose partial solution is a copy of this one
+        with the cell at @p coords set to @p value.
+
+        Only the row and column of @p coords need solving again."""
+        solver = self.copy()
+        solver.depth = self.depth + 1
+        solver.assign(coords, value)
+        self.stats.count("hypotheses")
+        self.stats.reached_depth(solver.depth)
+        return solver
+
+    def speculation_coords(self):
+        """Return the coordinates of the UNKNOWN cell (in self.focus, if
+        not None) that self.strategy chooses to hypothesize about next, or
+        None if there is none.  Call this once deduce() has reached
+        fixity."""
+        unknowns = self.partial_solution.unknown_cell_coordinates()
+        if self.focus is not None:
+            unknowns = [coords for coords in unknowns if coords in self.focus]
+        if not unknowns:
+            return None
+        return self.strategy.choose(self, unknowns)
+
+    def hypothesis_values(self, coords):
+        """Return the values of the cell at @p coords in the order in which
+        they should be explored, as self.strategy orders them."""
+        return self.strategy.values(self, coords)
+
+    def hypotheses(self, coords):
+        """Return a list of solvers, one for each value of the cell at
+        @p coords, in the order in which they should be explored."""
+        return [self.hypothesis(coords, value)
+                for value in self.hypothesis_values(coords)]
+
+    def _decide(self, coords, value, depth):
+        """Assign the hypothesis @p value to the cell at @p coords, at
+        decision depth @p depth."""
+        self.stats.count("nodes")
+        self.stats.count("hypotheses")
+        self.stats.reached_depth(depth)
+        self.note(BRANCH, coords, value)
+        self.assign(coords, value)
+
+    def _backtrack(self, decisions, conflict=None):
+        """Undo the most recent hypothesis in @p decisions, a stack of
+        (trail length, coords, values left to try) entries, and try the next
+        value of the deepest decision that has one left.  Raises
+        SolutionNotFound if every hypothesis has failed.
+
+        @p conflict is the SolutionNotFound raised by the failed hypothesis,
+        or None if it led to a solution (and all solutions are sought);
+        this chronological backtracking ignores it."""
+        while True:
+            (trail_length, coords, values) = decisions[-1]
+            self.undo(trail_length)
+            self.stats.count("backtracks")
+            self.note(BACKTRACK, coords)
+            if values:
+                break
+            decisions.pop()
+            if not decisions:
+                raise SolutionNotFound("All hypotheses failed")
+        self._decide(coords, values.pop(0), len(decisions))
+
+    def split_off(self):
+        """Remove the shallowest untried hypothesis from a running search so
+        that another solver can explore it (see distributed_solver.py), and
+        return its partial solution, or None if the search has no untried
+        hypotheses.  Call this only between steps of solve().
+
+        The shallowest hypothesis is chosen because it roots the largest
+        subtree.  If this search later fails, only the rest of the tree is
+        proved impossible."""
+        for (trail_length, coords, values) in self._decisions:
+            if values:
+                break
+        else:
+            return None
+        value = values.pop()
+        solution = self.partial_solution.clone()
+        for entry in self.trail[trail_length:]:
+            if entry[0] == _CELL:
+                solution.clear(entry[1])
+        if value == rules.MARKED:
+            solution.mark(coords)
+        else:
+            solution.unmark(coords)
+        self.stats.count("split_offs")
+        return solution
+
     def solve(self):
-        """Yield a partial solution from each iteration of deduction, then
-        delegate to the solve() coroutines of hypotheses on a chosen cell.
+        """Yield a partial solution from each iteration of deduction and
+        after each hypothesis about a chosen cell, backtracking when a
+        hypothesis leads to a contradiction.
+
+        The partial solutions yielded after the first are this solver's own
+        working state, which later iterations modify; clone() them to keep
+        them.
 
         Returns after a complete solution or after it proves that the
         initial_solution is impossible."""
-        yield self.initial_solution
-        # Iterate deduction to fixity.
-        while self.deduce():
-            if not self.partial_solution.correct():
-                raise SolutionNotFound("Deduction forced a contradiction")
-            if any(len(rows) == 0
-                   for rows in self.partial_solution_legal_rows):
-                # Deduction created an impossible row.
-                raise SolutionNotFound("Deduction created an impossible row")
-            if any(len(cols) == 0
-                   for cols in self.partial_solution_legal_cols):
-                # Deduction created an impossible column.
-                raise SolutionNotFound(
-                    "Deduction created an impossible column")
-            yield self.partial_solution
-
-        # Identify a cell to hypothesize about.
-        unknowns = self.partial_solution.unknown_cell_coordinates()
-        if not unknowns:
-            # Deduction produced a complete solution; we win.
+        for (_, partial_solution) in self._search(find_all=False):
+            yield partial_solution
+
+    def solutions(self):
+        """Search the whole tree, yielding a clone of each complete solution
+        as it is found and None after each other step of the search (so that
+        callers can give up early, as with solve()).
+
+        Returns, rather than raising SolutionNotFound, once every hypothesis
+        has been explored."""
+        try:
+            for (found, partial_solution) in self._search(find_all=True):
+                yield partial_solution.clone() if found else None
+        except SolutionNotFound:
             return
 
-        # Sort unknowns to prefer cases where hypotheses are likely to
-        # generate cascading inferences.
-        _, speculation_coords = min(
-            ((len(self.partial_solution_legal_rows[y]) +
-              len(self.partial_solution_legal_cols[x])),
-             (x, y))
-            for (x, y) in unknowns)
-
-        # Hypothesize a cell value; delegate to a new solver for that
-        # hypothesis.
-        hypothetical_solvers = []
-        # TODO ggould Trying unmarking first on the hunch that unmarks can
-        # sometimes get big splitting leverage.  This is a half-baked idea;
-        # needs any theoretical or even empirical justification.
-        for fn in (rules.NonogramSolution.unmark,
-                   rules.NonogramSolution.mark):
-            solver = BackwardChainSolver(
-                self.puzzle, initial_solution=self.partial_solution.clone())
-            partial = solver.partial_solution.clone()
-            fn(partial, speculation_coords)
-            solver.update_partials(partial)
-            hypothetical_solvers.append(solver)
-        # TODO ggould Can we sort these solvers sensibly?
-        # TODO ggould Is there a way around Global Interpreter Locking to
-        # get multicore leverage on this?
-        for solver in hypothetical_solvers:
+    def note(self, kind, coords, value=None):
+        """Record a BRANCH or BACKTRACK event (see
+        solver_coroutine.events) while events() is running."""
+        if self._markers is not None:
+            self._markers.append((kind, coords, value))
+
+    def events(self):
+        # See superclass docstring.  Cell changes are collected by assign()
+        # and unassign() rather than found by comparing solutions.
+        search = self._search(find_all=False)
+        next(search)
+        cells = self.initial_solution.cells
+        yield [(CELL, (x, y), cells[x][y])
+               for (x, y) in self.initial_solution.all_coordinates()
+               if cells[x][y] != rules.UNKNOWN]
+        self._changed = {}
+        self._markers = []
+        try:
+            for _ in search:
+                cells = self.partial_solution.cells
+                events = self._markers
+                events.extend((CELL, (x, y), cells[x][y])
+                              for ((x, y), value) in self._changed.items()
+                              if cells[x][y] != value)
+                self._changed = {}
+                self._markers = []
+                yield events
+        finally:
+            self._changed = None
+            self._markers = None
+
+    def certain(self):
+        # See superclass docstring.
+        return not self._decisions and not self._committed
+
+    def _next_component(self, decisions):
+        """Keep the cells of the solved component in self.focus, discarding
+        their @p decisions, and focus on the smallest of the components
+        left; return the speculation_coords in it."""
+        # Other components do not depend on how this one was solved, so
+        # they can never need its hypotheses revisited.
+        self._committed = self._committed or bool(decisions)
+        del decisions[:]
+        self.focus = components(self.puzzle, self.partial_solution)[0]
+        self.stats.count("components")
+        return self.speculation_coords()
+
+    def _search(self, find_all):
+        """The search behind solve() and solutions(), generating
+        (found, partial_solution) pairs where found is True for a complete
+        solution.  Returns after the first complete solution unless
+        @p find_all is set, in which case each solution is treated as a
+        failed hypothesis and the search backtracks to look for another
+        (and the puzzle is not decomposed, as its solutions are the product
+        of those of the components)."""
+        self.stats.count("nodes")
+        yield (False, self.initial_solution)
+        self._search_start = time.perf_counter()
+        decisions = self._decisions = []
+        if self.decompose and not find_all:
+            self.focus = set()  # Chosen at the first hypothesis.
+        while True:
+            # Iterate deduction to fixity, then probe if enabled (to fixity
+            # at the root; see probe()).  Every changed line is solved
+            # again, so a contradiction surfaces as a line with no legal
+            # lines.
             try:
-                yield from solver.solve()
-                # Victory!  This hypothesis found a correct solution.
-                return
-            except SolutionNotFound as _:
-                pass  # Ignore this and move on to the next.
-        raise SolutionNotFound("All hypotheses at %s failed",
-                               speculation_coords)
+                while self.deduce():
+                    yield (False, self.partial_solution)
+                rounds = 0
+                while (self.probing and
+                       (rounds < self.MAX_PROBE_ROUNDS or not decisions) and
+                       self.probe()):
+                    rounds += 1
+                    yield (False, self.partial_solution)
+                conflict = None
+            except SolutionNotFound as e:
+                if not decisions:
+                    raise
+                conflict = e
+            if conflict is not None:
+                self._backtrack(decisions, conflict)
+                yield (False, self.partial_solution)
+                continue
+
+            with self.stats.timer("branch"):
+                speculation_coords = self.speculation_coords()
+                if (speculation_coords is None and self.decompose and
+                        not find_all and
+                        not self.partial_solution.complete()):
+                    speculation_coords = self._next_component(decisions)
+            if speculation_coords is None:
+                # Deduction produced a complete solution; we win.
+                self.stats.count("solutions")
+                yield (True, self.partial_solution)
+                if not find_all or not decisions:
+                    return
+                self._backtrack(decisions)
+                yield (False, self.partial_solution)
+                continue
+
+            # Hypothesize a cell value, remembering how to undo it and which
+            # values remain to be tried.  See parallel_solver.py for
+            # exploring hypotheses on several cores.
+            values = list(self.hypothesis_values(speculation_coords))
+            decisions.append((len(self.trail), speculation_coords,
+                              values[1:]))
+            self._decide(speculation_coords, values[0], len(decisions))
+            yield (False, self.partial_solution)
@@ -0,0 +1,288 @@
+"""Solving many puzzles in one job.
+
+solve_batch() consumes an iterable of puzzles lazily, solves them (in
+parallel if asked) and generates one result record per puzzle as soon as
+that puzzle finishes, so that neither the puzzles nor the results of a
+large corpus need to be held in memory.
+
+Each record is a JSON-serializable dict:
+  index      position of the puzzle in the input
+  name       name of the puzzle
+  solver     name of the solver used (see SOLVERS)
+  strategy   name of the branching strategy used (see heuristics.py), or
+             None for the solver's default
+  status     "solved", "unsolvable", "timeout", "cancelled" or "error"
+  solution   list of row strings (see puzzle_io.solution_to_strings) if
+             solved, else None
+  wall_time  seconds spent solving
+  nodes      number of search nodes the solver explored
+  stats      all of the solver's counters (see solver_stats.py)
+  error      the error message, for status "error" only
+  features   the puzzle's cost features (see cost_estimator.py), only if
+             the batch was scheduled by estimated cost
+  predicted_time  the estimated wall_time, likewise
+
+With a solution limit (see count_one), each puzzle's solutions are counted
+instead, and records differ as follows:
+  status     "unique", "multiple", "unsolvable", "timeout" or "error"
+  solutions  list of the solutions found (each a list of row strings), up
+             to the limit
+  solution_count  len(solutions)
+"""
+
+import atexit
+import concurrent.futures
+import functools
+import itertools
+import multiprocessing.util
+import time
+
+from rules.puzzle_io import solution_to_strings
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.brute_force import BruteForceNonogramSolver
+from solver.cost_estimator import puzzle_features
+from solver.heuristics import STRATEGIES
+from solver.learning_solver import LearningBackwardChainSolver
+from solver.line_product_solver import LineProductSolver
+from solver.numpy_solver import NumpyBackwardChainSolver
+from solver.solution_counter import find_solutions
+from solver.solution_store import CachingSolver, SolutionStore
+from solver.solver_coroutine import SolutionNotFound
+from solver.solver_stats import SolverStats
+
+
+# Solvers selectable by name.  Solvers that manage their own process pool
+# (eg ParallelBackwardChainSolver) are deliberately absent; parallelism in
+# a batch comes from solving several puzzles at once.
+SOLVERS = {
+    "backward_chain": BackwardChainSolver,
+    "brute_force": BruteForceNonogramSolver,
+    "learning_backward_chain": LearningBackwardChainSolver,
+    "line_product": LineProductSolver,
+    "numpy_backward_chain": NumpyBackwardChainSolver,  # Requires numpy.
+}
+
+
+# Open SolutionStores of this process, by path.
+_stores = {}
+
+
+def _close_stores():
+    """Close the SolutionStores of this process, which writes the use times
+    of the puzzles looked up in them (see SolutionStore.flush)."""
+    while _stores:
+        _stores.popitem()[1].close()
+
+
+# For callers of solve_one outside solve_batch.
+atexit.register(_close_stores)
+
+
+def _init_worker():
+    """Initializer of solve_batch's worker processes, which exit without
+    running atexit hooks."""
+    multiprocessing.util.Finalize(None, _close_stores, exitpriority=10)
+
+
+def _store(path):
+    """Return this process's SolutionStore for the file at @p path."""
+    if path not in _stores:
+        _stores[path] = SolutionStore(path)
+    return _stores[path]
+
+
+def _solver_kwargs(solver_name, strategy):
+    """Return the constructor arguments for the solver named @p solver_name
+    to branch with the strategy named @p strategy (None for its default)."""
+    if strategy is None:
+        return {}
+    assert issubclass(SOLVERS[solver_name], BackwardChainSolver), \
+        "Solver %s does not take a branching strategy" % solver_name
+    return {"strategy": STRATEGIES[strategy]()}
+
+
+def solve_one(puzzle, solver_name="backward_chain", timeout=None, index=0,
+              cancel=None, progress=None, store_path=None, strategy=None):
+    """Solve @p puzzle with the solver named @p solver_name and return its
+    result record (see module docstring).
+
+    @p timeout, if not None, is a limit in seconds which is checked each time
+    the solver yields.  So is @p cancel, if not None, an object such as a
+    threading.Event whose is_set() method returns True to stop the solver.
+    @p progress, if not None, is called with each (possibly None) partial
+    solution that the solver yields and the solver itself.
+
+    If @p store_path is not None, solutions are looked up in and added to
+    the SolutionStore in that file (see solution_store.py).
+
+    If @p strategy is not None, the solver (which must be a
+    BackwardChainSolver) branches with the strategy of that name in
+    heuristics.STRATEGIES."""
+    record = {"index": index, "name": puzzle.name, "solver": solver_name,
+              "strategy": strategy, "status": None, "solution": None}
+    kwargs = _solver_kwargs(solver_name, strategy)
+    if store_path is None:
+        solver = SOLVERS[solver_name](puzzle, **kwargs)
+    else:
+        solver = CachingSolver(puzzle, store=_store(store_path),
+                               solver_class=SOLVERS[solver_name], **kwargs)
+    start = time.monotonic()
+    deadline = None if timeout is None else start + timeout
+    solution = None
+    try:
+        for solution in solver.solve():
+            if progress is not None:
+                progress(solution, solver)
+            if solution is not None and solution.complete():
+                continue
+            if cancel is not None and cancel.is_set():
+                record["status"] = "cancelled"
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                record["status"] = "timeout"
+                break
+        else:
+            if (solution is not None and solution.complete() and
+                    solution.correct()):
+                record["status"] = "solved"
+                record["solution"] = solution_to_strings(solution)
+            else:
+                record["status"] = "unsolvable"
+    except SolutionNotFound:
+        record["status"] = "unsolvable"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = "%s: %s" % (type(e).__name__, e)
+    record["wall_time"] = time.monotonic() - start
+    record["nodes"] = solver.stats["nodes"]
+    record["stats"] = solver.stats.as_dict()
+    return record
+
+
+def count_one(puzzle, solver_name="backward_chain", timeout=None, index=0,
+              limit=2, strategy=None):
+    """Count the solutions of @p puzzle, up to @p limit of them (or all of
+    them if @p limit is None), with the solver named @p solver_name, which
+    must have a solutions() method (see solution_counter.py); return its
+    result record (see module docstring).
+
+    The default @p limit of 2 is enough to tell a unique puzzle from one
+    with multiple solutions.  @p timeout and @p strategy are as for
+    solve_one."""
+    record = {"index": index, "name": puzzle.name, "solver": solver_name,
+              "strategy": strategy, "status": None, "solutions": []}
+    stats = SolverStats()
+    start = time.monotonic()
+    deadline = None if timeout is None else start + timeout
+    try:
+        for solution in find_solutions(puzzle, limit, SOLVERS[solver_name],
+                                       stats=stats,
+                                       **_solver_kwargs(solver_name,
+                                                        strategy)):
+            if solution is not None:
+                record["solutions"].append(solution_to_strings(solution))
+            elif deadline is not None and time.monotonic() > deadline:
+                record["status"] = "timeout"
+                break
+        else:
+            record["status"] = {0: "unsolvable", 1: "unique"}.get(
+                len(record["solutions"]), "multiple")
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = "%s: %s" % (type(e).__name__, e)
+    record["solution_count"] = len(record["solutions"])
+    record["wall_time"] = time.monotonic() - start
+    record["nodes"] = stats["nodes"]
+    record["stats"] = stats.as_dict()
+    return record
+
+
+def _longest_first(indexed, cost_model, map_function):
+    """Return the (index, puzzle) pairs of @p indexed in decreasing order of
+    the wall time that @p cost_model predicts, and a dict of the
+    (features, predicted time) of each index.  Features are computed with
+    @p map_function, a function like the builtin map()."""
+    indexed = list(indexed)
+    estimates = {}
+    for ((index, _), features) in zip(indexed, map_function(
+            puzzle_features, [puzzle for (_, puzzle) in indexed])):
+        estimates[index] = (features, cost_model.predict(features))
+    indexed.sort(key=lambda pair: -estimates[pair[0]][1])
+    return (indexed, estimates)
+
+
+def solve_batch(puzzles, solver_name="backward_chain", timeout=None,
+                jobs=1, count_limit=None, store_path=None, strategy=None,
+                cost_model=None):
+    """Generate the result record of each puzzle in the iterable @p puzzles
+    as it finishes.
+
+    With @p jobs greater than 1, puzzles are solved concurrently in that
+    many worker processes and records are generated in completion order;
+    only a few puzzles per worker are read ahead of the results.
+
+    If @p cost_model (a cost_estimator.CostModel) is not None, every puzzle
+    is instead read before any is solved, so that they can be started in
+    decreasing order of the time that @p cost_model predicts for them; the
+    hardest puzzles then no longer hold up the end of the batch.  Each
+    record gains the puzzle's features and predicted time, from which the
+    model can be refitted (see CostModel.fit).
+
+    If @p count_limit is not None, count the solutions of each puzzle up to
+    that many (see count_one) instead of solving it; 0 means no limit.
+    Otherwise @p store_path is as for solve_one.  @p strategy is as for
+    solve_one in either case."""
+    assert solver_name in SOLVERS, "Unknown solver %s" % solver_name
+    assert strategy is None or strategy in STRATEGIES, \
+        "Unknown strategy %s" % strategy
+    if count_limit is None:
+        function = functools.partial(solve_one, store_path=store_path,
+                                     strategy=strategy)
+        extra_args = ()
+    else:
+        assert hasattr(SOLVERS[solver_name], "solutions"), \
+            "Solver %s cannot count solutions" % solver_name
+        function = functools.partial(count_one, strategy=strategy)
+        extra_args = (count_limit or None,)
+    indexed = enumerate(puzzles)
+    estimates = {}
+
+    def annotated(record):
+        if record["index"] in estimates:
+            (record["features"], record["predicted_time"]) = \
+                estimates[record["index"]]
+        return record
+
+    if jobs <= 1:
+        if cost_model is not None:
+            (indexed, estimates) = _longest_first(indexed, cost_model, map)
+        try:
+            for (index, puzzle) in indexed:
+                yield annotated(function(puzzle, solver_name, timeout, index,
+                                         *extra_args))
+        finally:
+            _close_stores()
+        return
+
+    max_in_flight = jobs * 2
+    # Leaving the with statement waits for the workers to exit, closing
+    # their stores.
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker) as executor:
+        if cost_model is not None:
+            (indexed, estimates) = _longest_first(
+                indexed, cost_model,
+                functools.partial(executor.map, chunksize=16))
+        indexed = iter(indexed)
+        pending = set()
+        while True:
+            for (index, puzzle) in itertools.islice(
+                    indexed, max_in_flight - len(pending)):
+                pending.add(executor.submit(function, puzzle, solver_name,
+                                            timeout, index, *extra_args))
+            if not pending:
+                return
+            (done, pending) = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield annotated(future.result())
@@ -4,24 +4,52 @@ Simple considers every possible marking combination for every UNKNOWN cell
 until one comes up correct.
 """
 
+import itertools
+
 # TODO ggould figure out why pycharm dislikes doing these as local imports.
-from solver.solver_coroutine import SolverCoroutine
-from rules.nonogram import NonogramSolution, all_possible_total_solutions
+from solver.solver_coroutine import SolverCoroutine, SolutionNotFound
+from rules.nonogram import NonogramSolution, CorrectnessTracker
 
 class BruteForceNonogramSolver(SolverCoroutine):
     """A class for solving nonogram problems.  There are no intermediate
     results, so the coroutine does not return any but instead yields None
     after a certain quantity of computation."""
 
-    def __init__(self, puzzle, initial_solution=None):
+    # Number of candidate solutions to check between yields of None.
+    CANDIDATES_PER_YIELD = 1000
+
+    def __init__(self, puzzle, initial_solution=None, stats=None):
         super(BruteForceNonogramSolver, self).__init__(
-            puzzle, initial_solution)
+            puzzle, initial_solution, stats)
 
     def solve(self):
-        # See superclass docstring.
+        # See superclass docstring.  Rather than checking a fresh clone of
+        # each combination (as all_possible_total_solutions would provide),
+        # step one solution from combination to combination and re-check
+        # only the lines whose cells changed.
         yield self.initial_solution
-        for solution in all_possible_total_solutions(
-                NonogramSolution(self.puzzle)):
-            assert solution.complete()
-            if solution.correct():
+        solution = NonogramSolution(self.puzzle)
+        unknowns = solution.unknown_cell_coordinates()
+        num_marks = sum(sum(runs) for runs in self.puzzle.row_run_counts)
+        solution.unmark(*unknowns)
+        tracker = CorrectnessTracker(solution)
+        marks = set()
+        for (i, combination) in enumerate(
+                itertools.combinations(unknowns, num_marks), start=1):
+            new_marks = set(combination)
+            for coords in marks - new_marks:
+                solution.clear(coords)
+                solution.unmark(coords)
+            for coords in new_marks - marks:
+                solution.clear(coords)
+                solution.mark(coords)
+            tracker.touch(*(marks ^ new_marks))
+            marks = new_marks
+            self.stats.count("nodes")
+            if tracker.correct():
+                self.stats.count("solutions")
                 yield solution
+                return
+            if i % self.CANDIDATES_PER_YIELD == 0:
+                yield None
+        raise SolutionNotFound("No combination of marks is correct")
@@ -0,0 +1,120 @@
+"""Splitting the unknown cells of a partial solution into independent
+components, which can be searched one after another (or in parallel)
+instead of as one problem.
+
+Two unknown cells are coupled if some line constrains them both.  A line
+does not always couple all of its unknown cells: its known UNMARKED cells
+split it into segments, and if every placement of the line's runs puts each
+run in the same segment, each group of segments can be solved without
+regard to the others.  Which segments a run can reach follows from its
+leftmost and rightmost legal placements.
+
+components() joins the groups of cells of every row and column into
+connected components.  A search that completes one component need never
+revisit it, so its cost adds over the components rather than multiplying.
+"""
+
+import rules.nonogram as rules
+
+
+def _leftmost_starts(runs, line):
+    """Return the start of each of @p runs in the leftmost placement of them
+    that is consistent with the known cells of @p line, or None if there is
+    no such placement."""
+    n = len(line)
+    # next_unmarked[p] is the index of the first UNMARKED cell from p on.
+    next_unmarked = [n] * (n + 1)
+    for p in range(n - 1, -1, -1):
+        next_unmarked[p] = (p if line[p] == rules.UNMARKED
+                            else next_unmarked[p + 1])
+
+    def placeable(p, run):
+        return (p + run <= n and next_unmarked[p] >= p + run and
+                (p + run == n or line[p + run] != rules.MARKED))
+
+    # fits[i][p] is True if runs[i:] can be placed in line[p:]; p runs to
+    # n + 1 to allow for the gap after a run that ends the line.
+    fits = [[False] * (n + 2) for _ in range(len(runs) + 1)]
+    fits[-1][n] = fits[-1][n + 1] = True
+    for p in range(n - 1, -1, -1):
+        fits[-1][p] = line[p] != rules.MARKED and fits[-1][p + 1]
+    for i in range(len(runs) - 1, -1, -1):
+        (run, row, next_row) = (runs[i], fits[i], fits[i + 1])
+        for p in range(n - 1, -1, -1):
+            row[p] = ((line[p] != rules.MARKED and row[p + 1]) or
+                      (placeable(p, run) and next_row[p + run + 1]))
+    if not fits[0][0]:
+        return None
+    starts = []
+    p = 0
+    for (i, run) in enumerate(runs):
+        while not (placeable(p, run) and fits[i + 1][p + run + 1]):
+            p += 1
+        starts.append(p)
+        p += run + 1
+    return starts
+
+
+def line_groups(run_counts, line):
+    """Return the unknown cells of @p line, a line with clue @p run_counts,
+    as a list of groups (lists of indices) that can be solved
+    independently."""
+    line = list(line)
+    unknown = [p for (p, cell) in enumerate(line) if cell == rules.UNKNOWN]
+    runs = [run for run in run_counts if run]
+    left = _leftmost_starts(runs, line)
+    if len(unknown) < 2 or left is None:
+        # A contradiction is left for the line solver to report.
+        return [unknown] if unknown else []
+    (n, k) = (len(line), len(runs))
+    reverse_left = _leftmost_starts(runs[::-1], line[::-1])
+    right = [n - reverse_left[k - 1 - i] - runs[i] for i in range(k)]
+    # segment[p] numbers the stretches between UNMARKED cells.
+    segment = []
+    number = 0
+    for cell in line:
+        if cell == rules.UNMARKED:
+            number += 1
+        segment.append(number)
+    # Segments reachable by one run are solved together; joined[s] is the
+    # first segment joined with segment s.
+    joined = list(range(number + 1))
+    for i in range(k):
+        first = joined[segment[left[i]]]
+        for s in range(segment[left[i]], segment[right[i]] + 1):
+            joined[s] = first
+    groups = {}
+    for p in unknown:
+        groups.setdefault(joined[segment[p]], []).append(p)
+    return list(groups.values())
+
+
+def components(puzzle, solution):
+    """Return the unknown cells of @p solution, a partial solution of
+    @p puzzle, as a list of sets of coordinates that can be solved
+    independently, smallest first."""
+    parent = dict((coords, coords)
+                  for coords in solution.unknown_cell_coordinates())
+
+    def find(coords):
+        while parent[coords] != coords:
+            parent[coords] = parent[parent[coords]]
+            coords = parent[coords]
+        return coords
+
+    def join(cells):
+        roots = [find(coords) for coords in cells]
+        for root in roots[1:]:
+            parent[root] = roots[0]
+
+    for (y, run_counts) in enumerate(puzzle.row_run_counts):
+        for group in line_groups(run_counts, solution.row(y)):
+            join([(x, y) for x in group])
+    for (x, run_counts) in enumerate(puzzle.col_run_counts):
+        for group in line_groups(run_counts, solution.column(x)):
+            join([(x, y) for y in group])
+    result = {}
+    for coords in parent:
+        result.setdefault(find(coords), set()).add(coords)
+    return sorted(result.values(), key=lambda cells: (len(cells),
+                                                      min(cells)))
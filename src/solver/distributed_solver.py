@@ -0,0 +1,440 @@
+"""A solver that explores the hypotheses of a BackwardChainSolver on worker
+processes that may be on other machines.
+
+The search is split as for ParallelBackwardChainSolver: the top
+split_depth levels of hypotheses are expanded in this process, and each
+hypothesis left unexplored becomes a subproblem.  A Coordinator then serves
+the subproblems over TCP to workers (see run_worker), which connect, pull a
+subproblem at a time, search it sequentially with a BackwardChainSolver and
+send back the solution or the refutation of their subtree:
+
+ * Work stealing: when a worker asks for work and none is queued, the
+   coordinator asks a busy worker to split off the shallowest hypothesis it
+   has not yet tried (see BackwardChainSolver.split_off), which is queued as
+   a new subproblem.
+ * A worker that disconnects (or dies) before reporting on its subproblem
+   has that subproblem queued again, whole.  Anything it split off is
+   already queued separately, so it may be searched twice, which is wasted
+   work but not wrong.
+ * The puzzle is unsolvable once every subproblem, including those split
+   off, is refuted.  Once a worker finds a complete, correct solution, every
+   worker is told to stop.
+
+Messages are JSON objects, one per line, with a "type" key:
+
+  worker to coordinator:
+    hello    first message; answered with "puzzle"
+    request  ask for a subproblem; answered with "work", "wait" or "stop"
+    result   "id" of a subproblem, its "solution" (row strings, see
+             puzzle_io.solution_to_strings) or None if it has none, and
+             the "stats" of the search (see SolverStats.as_dict)
+    split    answer to "split": a list of "subproblems" (row strings of
+             partial solutions), empty if the worker had nothing to give
+
+  coordinator to worker:
+    puzzle   the "puzzle" (see puzzle_io.puzzle_to_json)
+    work     a subproblem: its "id" and the row strings of its partial
+             "solution"
+    wait     no work yet; request again after "delay" seconds
+    split    split off a subproblem (see work stealing, above)
+    stop     stop searching and disconnect
+
+There is no authentication, so only listen on addresses that trusted
+workers can reach.  For testing, DistributedSolver can start its own
+workers as local processes.
+"""
+
+import collections
+import json
+import multiprocessing
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+from rules.puzzle_io import puzzle_from_json, puzzle_to_json
+from rules.puzzle_io import solution_from_strings, solution_to_strings
+
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.parallel_solver import ParallelBackwardChainSolver
+from solver.solver_coroutine import SolutionNotFound
+
+
+def _merge_stats(stats, counts):
+    """Add the counters in @p counts, a dict from SolverStats.as_dict, into
+    @p stats."""
+    for (name, n) in counts.items():
+        if name == "max_depth":
+            stats.reached_depth(n)
+        elif isinstance(n, int):
+            stats.count(name, n)
+
+
+class _Connection(object):
+    """The coordinator's end of a connection to one worker."""
+
+    def __init__(self, sock, wfile):
+        self.sock = sock
+        self.wfile = wfile
+        # The id of the subproblem the worker is searching, if any.
+        self.work = None
+        # Set while a split request to the worker is unanswered.
+        self.splitting = False
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        """Send @p message to the worker, ignoring a broken connection (which
+        the reading side reports)."""
+        with self._lock:
+            try:
+                self.wfile.write((json.dumps(message) + "\n").encode())
+                self.wfile.flush()
+            except (OSError, ValueError):
+                pass
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Serves one worker connection for the server's coordinator."""
+
+    def handle(self):
+        self.server.coordinator.serve(
+            _Connection(self.connection, self.wfile), self.rfile)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator(object):
+    """A TCP server that hands the subproblems of one puzzle to workers and
+    collects their results (see module docstring)."""
+
+    def __init__(self, puzzle, subproblems, host="127.0.0.1", port=0,
+                 stats=None, retry_delay=0.1):
+        """Serve @p subproblems, a list of partial solutions of @p puzzle,
+        on @p host and @p port (0 for any free port; see self.address).
+        Workers with nothing to do are told to ask again after
+        @p retry_delay seconds.  Workers' stats are merged into @p stats,
+        if not None."""
+        self.puzzle = puzzle
+        self.stats = stats
+        self.retry_delay = retry_delay
+        # Complete, correct solution found by a worker, if any.
+        self.solution = None
+        # Set once the puzzle is solved or proved unsolvable.
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # Row strings of every subproblem not yet refuted, by id, and the
+        # ids of those waiting for a worker.
+        self._open = {}
+        self._queue = collections.deque()
+        self._connections = []
+        for solution in subproblems:
+            self._add(solution_to_strings(solution))
+        if not self._open:
+            self.finished.set()
+        self._server = _Server((host, port), _WorkerHandler)
+        self._server.coordinator = self
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self):
+        """The (host, port) the coordinator is listening on."""
+        return self._server.server_address[:2]
+
+    def _add(self, strings):
+        """Queue a new subproblem with row strings @p strings; call with
+        self._lock held (or from the constructor)."""
+        self._open[self._next_id] = strings
+        self._queue.append(self._next_id)
+        self._next_id += 1
+
+    def _parse(self, strings):
+        """Return the solution of the puzzle described by row strings
+        @p strings from a worker.  Raises ValueError (or KeyError, for an
+        unknown cell character) unless they have the puzzle's shape."""
+        if (not isinstance(strings, list) or
+                len(strings) != self.puzzle.height or
+                not all(isinstance(row, str) and len(row) == self.puzzle.width
+                        for row in strings)):
+            raise ValueError("Solution does not match the puzzle")
+        return solution_from_strings(self.puzzle, strings)
+
+    def _count(self, name, n=1):
+        if self.stats is not None:
+            self.stats.count(name, n)
+
+    def serve(self, connection, rfile):
+        """Answer the messages from one worker on @p connection, read from
+        @p rfile, until it disconnects."""
+        with self._lock:
+            self._connections.append(connection)
+        try:
+            for line in rfile:
+                message = json.loads(line)
+                kind = message["type"]
+                if kind == "hello":
+                    connection.send({"type": "puzzle",
+                                     "puzzle": puzzle_to_json(self.puzzle)})
+                elif kind == "request":
+                    self._request(connection)
+                elif kind == "result":
+                    self._result(connection, message)
+                elif kind == "split":
+                    self._split(connection, message)
+        except (OSError, ValueError, KeyError, TypeError):
+            # A broken connection or a garbled message; drop the worker.
+            pass
+        finally:
+            self._lost(connection)
+
+    def _request(self, connection):
+        """Give the worker on @p connection a subproblem, or ask a busy
+        worker to split one off."""
+        victim = None
+        with self._lock:
+            if self.finished.is_set():
+                message = {"type": "stop"}
+            elif self._queue:
+                connection.work = self._queue.popleft()
+                message = {"type": "work", "id": connection.work,
+                           "solution": self._open[connection.work]}
+                self._count("subproblems")
+            else:
+                message = {"type": "wait", "delay": self.retry_delay}
+                busy = [other for other in self._connections
+                        if other.work is not None and not other.splitting]
+                if busy:
+                    victim = busy[0]
+                    victim.splitting = True
+        connection.send(message)
+        if victim is not None:
+            victim.send({"type": "split"})
+
+    def _result(self, connection, message):
+        """Record the result @p message from the worker on @p connection."""
+        strings = message["solution"]
+        solution = None if strings is None else self._parse(strings)
+        counts = message.get("stats", {})
+        if not isinstance(counts, dict):
+            raise ValueError("Stats are not a dict")
+        if self.stats is not None:
+            _merge_stats(self.stats, counts)
+        with self._lock:
+            connection.work = None
+            if message["id"] not in self._open:
+                return
+            if solution is not None:
+                if not (solution.complete() and solution.correct()):
+                    # A worker bug; search the subproblem again rather than
+                    # trust it.
+                    self._queue.append(message["id"])
+                    return
+                self.solution = solution
+            else:
+                del self._open[message["id"]]
+                if self._open:
+                    return
+            self.finished.set()
+        self._stop_all()
+
+    def _split(self, connection, message):
+        """Queue the subproblems split off by the worker on
+        @p connection."""
+        subproblems = list(message["subproblems"])
+        for strings in subproblems:
+            self._parse(strings)
+        with self._lock:
+            connection.splitting = False
+            for strings in subproblems:
+                self._add(strings)
+                self._count("steals")
+
+    def _lost(self, connection):
+        """Forget the worker on @p connection, queuing its subproblem
+        again."""
+        with self._lock:
+            self._connections.remove(connection)
+            if (connection.work in self._open and
+                    not self.finished.is_set()):
+                self._queue.appendleft(connection.work)
+                self._count("lost_workers")
+            connection.work = None
+
+    def _stop_all(self):
+        """Tell every connected worker to stop."""
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.send({"type": "stop"})
+
+    def close(self):
+        """Stop every worker and the server."""
+        self.finished.set()
+        self._stop_all()
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+
+
+def run_worker(host, port):
+    """Connect to the Coordinator at @p host and @p port and search the
+    subproblems it hands out until it says to stop or the connection is
+    lost.  Returns the number of subproblems searched."""
+    searched = 0
+    with socket.create_connection((host, port)) as sock:
+        rfile = sock.makefile("rb")
+        wfile = sock.makefile("wb")
+        inbox = queue.Queue()
+
+        def read():
+            try:
+                for line in rfile:
+                    inbox.put(json.loads(line))
+            except (OSError, ValueError):
+                pass
+            inbox.put(None)
+
+        def send(message):
+            wfile.write((json.dumps(message) + "\n").encode())
+            wfile.flush()
+
+        threading.Thread(target=read, daemon=True).start()
+        try:
+            send({"type": "hello"})
+            message = inbox.get()
+            if message is None or message["type"] != "puzzle":
+                return searched
+            puzzle = puzzle_from_json(message["puzzle"], validate=False)
+            while True:
+                send({"type": "request"})
+                message = inbox.get()
+                while message is not None and message["type"] == "split":
+                    send({"type": "split", "subproblems": []})
+                    message = inbox.get()
+                if message is None or message["type"] == "stop":
+                    return searched
+                if message["type"] == "wait":
+                    time.sleep(message["delay"])
+                    continue
+                searched += 1
+                if not _search(puzzle, message, inbox, send):
+                    return searched
+        except OSError:
+            return searched
+        finally:
+            # Wake the reader, which holds rfile until it sees the end.
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            rfile.close()
+            wfile.close()
+
+
+def _search(puzzle, work, inbox, send):
+    """Search the subproblem in the "work" message @p work, answering
+    messages from @p inbox between steps and reporting with @p send.
+    Returns False if told to stop."""
+    solver = BackwardChainSolver(
+        puzzle, initial_solution=solution_from_strings(puzzle,
+                                                       work["solution"]))
+    solution = None
+    try:
+        for solution in solver.solve():
+            while not inbox.empty():
+                message = inbox.get()
+                if message is None or message["type"] == "stop":
+                    return False
+                if message["type"] == "split":
+                    partial = solver.split_off()
+                    send({"type": "split",
+                          "subproblems": ([] if partial is None else
+                                          [solution_to_strings(partial)])})
+    except SolutionNotFound:
+        solution = None
+    found = solution is not None and solution.complete()
+    send({"type": "result", "id": work["id"],
+          "solution": solution_to_strings(solution) if found else None,
+          "stats": solver.stats.as_dict()})
+    return True
+
+
+class DistributedSolver(ParallelBackwardChainSolver):
+    """A solver (see solver_coroutine.py for API details) that splits the
+    BackwardChainSolver search tree across TCP workers (see module
+    docstring)."""
+
+    def __init__(self, puzzle, initial_solution=None, workers=0,
+                 split_depth=3, poll_interval=0.1, stats=None,
+                 host="127.0.0.1", port=0):
+        """Serve subproblems on @p host and @p port (0 for any free port;
+        see self.coordinator), splitting the search tree at the first
+        @p split_depth levels of hypotheses, and start @p workers local
+        worker processes; workers on other machines can connect with
+        run_worker.  solve() yields None every @p poll_interval seconds
+        while it waits for the workers.
+
+        The stats of each worker's search are merged into self.stats as it
+        reports."""
+        super(DistributedSolver, self).__init__(
+            puzzle, initial_solution, workers=workers,
+            split_depth=split_depth, poll_interval=poll_interval,
+            stats=stats)
+        self.workers = workers
+        self.host = host
+        self.port = port
+        # The Coordinator, once solve() has started serving subproblems.
+        self.coordinator = None
+
+    def solve(self):
+        # See superclass docstring.
+        yield self.initial_solution
+        frontier = [BackwardChainSolver(
+            self.puzzle, initial_solution=self.initial_solution,
+            stats=self.stats)]
+        for _ in range(self.split_depth):
+            (solution, frontier) = yield from self._split(frontier)
+            if solution is not None:
+                yield solution
+                return
+            if not frontier:
+                raise SolutionNotFound("All hypotheses failed")
+
+        self.coordinator = coordinator = Coordinator(
+            self.puzzle, [solver.partial_solution for solver in frontier],
+            self.host, self.port, self.stats)
+        processes = [multiprocessing.Process(target=run_worker,
+                                             args=coordinator.address,
+                                             daemon=True)
+                     for _ in range(self.workers)]
+        try:
+            for process in processes:
+                process.start()
+            while not coordinator.finished.wait(self.poll_interval):
+                yield None
+            if coordinator.solution is None:
+                raise SolutionNotFound("All subproblems failed")
+            yield coordinator.solution
+        finally:
+            # Runs on success, failure, or the caller abandoning solve().
+            coordinator.close()
+            for process in processes:
+                if process.pid is not None:
+                    process.join(timeout=1)
+                    if process.is_alive():
+                        process.terminate()
@@ -0,0 +1,159 @@
+"""Branching strategies for BackwardChainSolver: which UNKNOWN cell to
+hypothesize about when deduction stalls, and which of its values to try
+first.
+
+A strategy is passed to the solver's constructor (see STRATEGIES for the
+built-in ones by name), so each solve can use a different one and their
+node counts can be compared on a corpus (see benchmark.py).  The built-in
+strategies are:
+
+  most_constrained  the cell whose row and column have the fewest legal
+                    lines between them, trying UNMARKED first (the
+                    original behaviour)
+  max_impact        of the few most constrained cells, the one whose
+                    values each deduce the most cells when probed (see
+                    BackwardChainSolver.probe_value), trying the value
+                    that deduces more first
+  mark_probability  the cell whose value is most certain, estimated from
+                    the fraction of the legal lines of its row and of its
+                    column that mark it, trying its likelier value first
+"""
+
+import rules.nonogram as rules
+from solver.solver_utils import legal_line_counts
+
+
+class BranchingStrategy(object):
+    """Base class for branching strategies; subclasses override choose()
+    and may override values()."""
+
+    def choose(self, solver, unknowns):
+        """Return the coordinates of the cell of @p unknowns (a nonempty list
+        of the coordinates of UNKNOWN cells) that @p solver, a
+        BackwardChainSolver at deductive fixity, should hypothesize about
+        next."""
+        raise NotImplementedError("strategy did not implement choose")
+
+    def values(self, solver, coords):
+        """Return the values of the cell at @p coords in the order in which
+        @p solver should try them."""
+        return [rules.UNMARKED, rules.MARKED]
+
+
+class MostConstrained(BranchingStrategy):
+    """Hypothesize about the cell with the fewest legal row and column
+    lines, where hypotheses are likely to generate cascading inferences."""
+
+    def choose(self, solver, unknowns):
+        # See superclass docstring.
+        (row_counts, col_counts) = (solver.legal_row_counts,
+                                    solver.legal_col_counts)
+        return min((row_counts[y] + col_counts[x], (x, y))
+                   for (x, y) in unknowns)[1]
+
+
+class MaxImpact(BranchingStrategy):
+    """Probe each value of the most constrained cells and hypothesize about
+    the one whose weaker value still deduces the most."""
+
+    def __init__(self, candidates=8):
+        """Probe the @p candidates most constrained cells at each branch."""
+        self.candidates = candidates
+        # The impact of each value of the last cell chosen, for values().
+        self._impacts = {}
+
+    def choose(self, solver, unknowns):
+        # See superclass docstring.
+        (row_counts, col_counts) = (solver.legal_row_counts,
+                                    solver.legal_col_counts)
+        ranked = sorted((row_counts[y] + col_counts[x], (x, y))
+                        for (x, y) in unknowns)
+        best = None
+        for (_, coords) in ranked[:self.candidates]:
+            impacts = {}
+            for value in (rules.MARKED, rules.UNMARKED):
+                cells = solver.probe_value(coords, value)
+                # A contradiction leaves the other value forced, which is
+                # as good as a hypothesis gets.
+                impacts[value] = (len(unknowns) if cells is None
+                                  else len(cells))
+            score = min(impacts.values())
+            if best is None or score > best[0]:
+                best = (score, coords)
+                self._impacts = {coords: impacts}
+        return best[1]
+
+    def values(self, solver, coords):
+        # See superclass docstring.
+        impacts = self._impacts.get(coords)
+        if impacts is None:
+            return super(MaxImpact, self).values(solver, coords)
+        return sorted((rules.MARKED, rules.UNMARKED),
+                      key=lambda value: -impacts[value])
+
+
+class MarkProbability(BranchingStrategy):
+    """Estimate the probability that each cell is marked from the legal
+    lines of its row and column (see solver_utils.legal_line_counts) and
+    hypothesize about the least uncertain one."""
+
+    def __init__(self, max_cached_lines=10000):
+        """Remember the mark counts of up to @p max_cached_lines lines."""
+        self.max_cached_lines = max_cached_lines
+        self._line_counts = {}
+        # The mark probability of the last cell chosen, for values().
+        self._probability = {}
+
+    def _mark_fractions(self, run_counts, line):
+        """Return the fraction of the legal lines for @p run_counts and
+        @p line that mark each cell."""
+        key = (run_counts, tuple(line))
+        fractions = self._line_counts.get(key)
+        if fractions is None:
+            (total, marked) = legal_line_counts(run_counts, line)
+            fractions = [count / total if total else 0.5 for count in marked]
+            if len(self._line_counts) >= self.max_cached_lines:
+                self._line_counts.clear()
+            self._line_counts[key] = fractions
+        return fractions
+
+    def choose(self, solver, unknowns):
+        # See superclass docstring.
+        (puzzle, solution) = (solver.puzzle, solver.partial_solution)
+        rows = {}
+        cols = {}
+        best = None
+        for (x, y) in unknowns:
+            if y not in rows:
+                rows[y] = self._mark_fractions(puzzle.row_run_counts[y],
+                                               solution.row(y))
+            if x not in cols:
+                cols[x] = self._mark_fractions(puzzle.col_run_counts[x],
+                                               solution.column(x))
+            # Combine the two estimates as independent evidence.
+            (p_row, p_col) = (rows[y][x], cols[x][y])
+            marked = p_row * p_col
+            unmarked = (1 - p_row) * (1 - p_col)
+            probability = (marked / (marked + unmarked)
+                           if marked + unmarked else 0.5)
+            certainty = abs(probability - 0.5)
+            if best is None or certainty > best[0]:
+                best = (certainty, (x, y), probability)
+        self._probability = {best[1]: best[2]}
+        return best[1]
+
+    def values(self, solver, coords):
+        # See superclass docstring.
+        probability = self._probability.get(coords)
+        if probability is None or probability < 0.5:
+            return [rules.UNMARKED, rules.MARKED]
+        return [rules.MARKED, rules.UNMARKED]
+
+
+# Strategies selectable by name; each is a class to construct with no
+# arguments.
+STRATEGIES = {
+    "max_impact": MaxImpact,
+    "mark_probability": MarkProbability,
+    "most_constrained": MostConstrained,
+}
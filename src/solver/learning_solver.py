@@ -0,0 +1,331 @@
+"""A BackwardChainSolver that learns from its contradictions.
+
+BackwardChainSolver backtracks chronologically: when a hypothesis fails it
+undoes it and tries the next value, forgetting why it failed, so later
+branches can run into the same contradiction again.  This solver instead
+does conflict analysis as in a CDCL SAT solver:
+
+ * Every cell records its decision level (the number of hypotheses in force
+   when it was set) and its reason: the cells whose values forced it.  The
+   reason of a cell deduced from a line is the cells of that line that were
+   known when it was solved.
+ * When a line (or a nogood, below) has no legal values, the known cells
+   involved are a conflict.  Cells of the conflict at the current decision
+   level are replaced by their reasons until only one remains (the "first
+   unique implication point"), giving a set of cell values that cannot all
+   hold: a nogood.
+ * The search then backjumps to the deepest level of the other cells of
+   the nogood, which may skip several levels of hypotheses, where the nogood
+   forces the remaining cell to its other value.
+ * Learned nogoods are propagated alongside the line solvers: once all but
+   one of a nogood's cell values hold, the last cell must take its other
+   value.  As in SAT solvers, each nogood watches two of its values that do
+   not hold, and is only examined when one of them comes to hold.  At most
+   max_nogoods nogoods are kept, discarding the oldest.
+
+When all solutions are sought (see solutions()), each solution found is
+turned into a nogood of its hypotheses, which is never discarded.
+"""
+
+import collections
+
+import rules.nonogram as rules
+
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.solver_coroutine import BACKTRACK, SolutionNotFound
+
+# Reasons other than a set of cells: the cell was forced by solving the row
+# or column (_ROW, y) or (_COL, x), or by probing, which is justified only
+# by the hypotheses in force (_HYPOTHESES).
+_ROW, _COL, _HYPOTHESES = range(3)
+
+_OTHER_VALUE = {rules.MARKED: rules.UNMARKED, rules.UNMARKED: rules.MARKED}
+
+
+class Conflict(SolutionNotFound):
+    """Raised when some cells' values cannot all hold."""
+
+    def __init__(self, message, cells):
+        super(Conflict, self).__init__(message)
+        self.cells = cells
+
+
+class LearningBackwardChainSolver(BackwardChainSolver):
+    """A BackwardChainSolver (see backward_chain_solver.py) that learns
+    nogoods from conflicts and backjumps."""
+
+    # Default number of learned nogoods to keep.
+    DEFAULT_MAX_NOGOODS = 5000
+
+    def __init__(self, puzzle, initial_solution=None, line_solver=None,
+                 stats=None, probing=False, probe_limit=None,
+                 max_nogoods=None, strategy=None):
+        """Keep at most @p max_nogoods learned nogoods (DEFAULT_MAX_NOGOODS
+        if None); see BackwardChainSolver for the other arguments."""
+        self.max_nogoods = (self.DEFAULT_MAX_NOGOODS if max_nogoods is None
+                            else max_nogoods)
+        # Id to list of (coords, value), the first two of which are watched.
+        self._nogoods = {}
+        self._learned_ids = collections.deque()  # Discardable, oldest first.
+        self._watchers = collections.defaultdict(set)  # (coords, value): ids
+        self._next_nogood_id = 0
+        super(LearningBackwardChainSolver, self).__init__(
+            puzzle, initial_solution, line_solver, stats, probing,
+            probe_limit, strategy=strategy)
+
+    def update_partials(self, new_partial):
+        # See superclass docstring.  Every cell of @p new_partial is treated
+        # as given, at level 0.
+        super(LearningBackwardChainSolver, self).update_partials(new_partial)
+        self.level = 0
+        self._reason = None
+        self._levels = {}
+        self._reasons = {}
+        self._order = {}  # Index of each cell in self._assigned.
+        self._assigned = []
+        self._unchecked = []
+
+    def assign(self, coords, value):
+        # See superclass docstring.  The cell's reason is self._reason.
+        super(LearningBackwardChainSolver, self).assign(coords, value)
+        self._levels[coords] = self.level
+        self._reasons[coords] = self._reason
+        self._order[coords] = len(self._assigned)
+        self._assigned.append(coords)
+        self._unchecked.append(coords)
+
+    def unassign(self, coords):
+        # See superclass docstring.
+        super(LearningBackwardChainSolver, self).unassign(coords)
+        del self._levels[coords]
+        del self._reasons[coords]
+        del self._order[coords]
+        self._assigned.pop()
+
+    def undo(self, trail_length):
+        # See superclass docstring.
+        super(LearningBackwardChainSolver, self).undo(trail_length)
+        self._unchecked = []
+
+    def copy(self):
+        # See superclass docstring.  The copy starts afresh, with every
+        # known cell at level 0 and no nogoods.
+        solver = super(LearningBackwardChainSolver, self).copy()
+        solver.level = 0
+        solver._levels = {}
+        solver._reasons = {}
+        solver._order = {}
+        solver._assigned = []
+        solver._unchecked = []
+        solver._nogoods = {}
+        solver._learned_ids = collections.deque()
+        solver._watchers = collections.defaultdict(set)
+        return solver
+
+    def _assign_because(self, coords, value, reason):
+        """Assign @p value to the cell at @p coords, forced by @p reason."""
+        outer_reason = self._reason
+        self._reason = reason
+        try:
+            self.assign(coords, value)
+        finally:
+            self._reason = outer_reason
+
+    def _line_cells(self, kind, index):
+        """Return the coordinates of the known cells of row (@p kind _ROW)
+        or column (_COL) @p index."""
+        cells = self.partial_solution.cells
+        if kind == _ROW:
+            coords = ((x, index) for x in range(self.puzzle.width))
+        else:
+            coords = ((index, y) for y in range(self.puzzle.height))
+        return [(x, y) for (x, y) in coords
+                if cells[x][y] != rules.UNKNOWN]
+
+    def _solve_line(self, solve, kind, index):
+        """Call @p solve (a superclass line solving method) on line @p index
+        with the line as the reason of the cells it sets, turning its
+        failure into a Conflict."""
+        outer_reason = self._reason
+        self._reason = (kind, index)
+        try:
+            return solve(index)
+        except SolutionNotFound as e:
+            raise Conflict(str(e), self._line_cells(kind, index))
+        finally:
+            self._reason = outer_reason
+
+    def _solve_row(self, y):
+        # See superclass docstring.
+        return self._solve_line(
+            super(LearningBackwardChainSolver, self)._solve_row, _ROW, y)
+
+    def _solve_col(self, x):
+        # See superclass docstring.
+        return self._solve_line(
+            super(LearningBackwardChainSolver, self)._solve_col, _COL, x)
+
+    def probe(self):
+        # See superclass docstring.
+        self._reason = _HYPOTHESES
+        try:
+            return super(LearningBackwardChainSolver, self).probe()
+        finally:
+            self._reason = None
+
+    def _propagate_nogoods(self):
+        """Examine the nogoods watching a value of each cell assigned since
+        the last check, setting the last cell of any nogood whose other
+        values all hold.  Return True if any cell changed.  Raises Conflict
+        if every value of a nogood holds."""
+        cells = self.partial_solution.cells
+        changed = False
+        while self._unchecked:
+            (x, y) = coords = self._unchecked.pop()
+            literal = (coords, cells[x][y])
+            watchers = self._watchers.get(literal)
+            for nogood_id in list(watchers or ()):
+                nogood = self._nogoods[nogood_id]
+                if len(nogood) == 1:
+                    raise Conflict("Deduction violated a nogood", [coords])
+                if nogood[0] == literal:
+                    (nogood[0], nogood[1]) = (nogood[1], nogood[0])
+                ((ox, oy), value) = nogood[0]
+                if cells[ox][oy] not in (value, rules.UNKNOWN):
+                    continue  # Already satisfied.
+                # Watch another value that does not hold, if there is one.
+                for i in range(2, len(nogood)):
+                    ((ox, oy), value) = nogood[i]
+                    if cells[ox][oy] != value:
+                        (nogood[1], nogood[i]) = (nogood[i], nogood[1])
+                        watchers.discard(nogood_id)
+                        self._watchers[nogood[1]].add(nogood_id)
+                        break
+                else:
+                    ((ox, oy), value) = other = nogood[0]
+                    cell = cells[ox][oy]
+                    if cell == value:
+                        raise Conflict("Deduction violated a nogood",
+                                       [c for (c, _) in nogood])
+                    if cell == rules.UNKNOWN:
+                        self._assign_because(
+                            other[0], _OTHER_VALUE[value],
+                            frozenset(c for (c, _) in nogood[1:]))
+                        self.stats.count("nogood_deductions")
+                        changed = True
+        return changed
+
+    def deduce(self):
+        # See superclass docstring.  Learned nogoods are propagated before
+        # the queued lines are solved.
+        changed = self._propagate_nogoods()
+        return (super(LearningBackwardChainSolver, self).deduce() or
+                changed)
+
+    def _reason_cells(self, coords, decisions):
+        """Return the cells whose values forced the cell at @p coords, given
+        the stack of @p decisions (see _backtrack)."""
+        reason = self._reasons[coords]
+        order = self._order[coords]
+        if reason is None:
+            return ()
+        if reason == _HYPOTHESES:
+            return [decision for (_, decision, _) in decisions
+                    if self._order.get(decision, order) < order]
+        if isinstance(reason, tuple):
+            # Only the cells known when the line was solved; unrecorded
+            # cells were given, at level 0.
+            return [cell for cell in self._line_cells(*reason)
+                    if self._order.get(cell, -1) < order]
+        return reason
+
+    def _analyze(self, cells, decisions):
+        """Return (nogood, uip, level) for a conflict among @p cells: the
+        cells of the learned nogood, the one of them at the deepest level,
+        and the level to backjump to.  Raises SolutionNotFound if the
+        conflict involves no hypotheses at all."""
+        levels = self._levels
+        level = max((levels.get(cell, 0) for cell in cells), default=0)
+        if not level:
+            raise SolutionNotFound("Conflict independent of any hypothesis")
+        nogood = set()
+        current = set()  # Cells at the conflict level, to be resolved.
+
+        def add(new_cells):
+            for cell in new_cells:
+                cell_level = levels.get(cell, 0)
+                if cell_level == level:
+                    current.add(cell)
+                elif cell_level:
+                    nogood.add(cell)
+
+        add(cells)
+        # Replace the latest cell at the conflict level by its reason until
+        # only one is left; reasons hold only earlier cells, so one walk
+        # back through the assignments finds them all.
+        for cell in reversed(self._assigned):
+            if cell not in current:
+                continue
+            if len(current) == 1:
+                break
+            current.discard(cell)
+            add(self._reason_cells(cell, decisions))
+        nogood.add(cell)
+        backjump_level = max((levels[other] for other in nogood
+                              if other != cell), default=0)
+        return (nogood, cell, backjump_level)
+
+    def _learn(self, literals, permanent):
+        """Store a nogood of (coords, value) @p literals, discarding the
+        oldest learned nogood if there are too many, unless it is
+        @p permanent.  The first two literals are watched, so they must be
+        values that do not hold, or that came to hold the latest."""
+        nogood_id = self._next_nogood_id
+        self._next_nogood_id += 1
+        self._nogoods[nogood_id] = literals
+        for literal in literals[:2]:
+            self._watchers[literal].add(nogood_id)
+        self.stats.count("nogoods")
+        if permanent:
+            return
+        self._learned_ids.append(nogood_id)
+        if len(self._learned_ids) > self.max_nogoods:
+            old_id = self._learned_ids.popleft()
+            for literal in self._nogoods.pop(old_id)[:2]:
+                self._watchers[literal].discard(old_id)
+
+    def _decide(self, coords, value, depth):
+        # See superclass docstring.
+        self.level = depth
+        super(LearningBackwardChainSolver, self)._decide(coords, value,
+                                                         depth)
+
+    def _backtrack(self, decisions, conflict=None):
+        # See superclass docstring.  Instead of trying the next value of the
+        # latest hypothesis, learn a nogood from @p conflict, backjump to
+        # the level it implicates and set the value it forces there.  After
+        # a solution, the nogood is the hypotheses that led to it.
+        hypotheses = [coords for (_, coords, _) in decisions]
+        cells = getattr(conflict, "cells", None)
+        if cells is None:
+            cells = hypotheses
+        (nogood, uip, level) = self._analyze(cells, decisions)
+        # Watch the UIP, which is about to be unset, and the value set at
+        # the deepest level that remains.
+        ordered = sorted(nogood - {uip}, key=self._order.__getitem__,
+                         reverse=True)
+        cells = self.partial_solution.cells
+        literals = [(cell, cells[cell[0]][cell[1]])
+                    for cell in [uip] + ordered]
+        uip_value = literals[0][1]
+        if len(decisions) - level > 1:
+            self.stats.count("backjumps")
+        self.stats.count("backtracks")
+        self.undo(decisions[level][0])
+        for (_, coords, _) in reversed(decisions[level:]):
+            self.note(BACKTRACK, coords)
+        del decisions[level:]
+        self.level = level
+        self._learn(literals, permanent=conflict is None)
+        self._assign_because(uip, _OTHER_VALUE[uip_value],
+                             frozenset(nogood - {uip}))
@@ -0,0 +1,97 @@
+"""A bounded cache of line solver results.
+
+Hypotheses in a search tree keep presenting the line solver with rows and
+columns it has already solved, either in the parent solver or in a sibling
+branch.  A LineSolutionCache wraps a line solver (see solver_utils) and is
+itself a line solver, so it can be passed anywhere a line solver is
+accepted.  Results are keyed by (run counts, line state) and evicted in
+least-recently-used order once the cache exceeds its entry or memory cap.
+
+A single cache is shared by every solver in one search tree; pass the same
+cache to several solvers to share it across a batch of puzzles.
+"""
+
+import collections
+import sys
+
+from solver.solver_utils import dp_line_solver
+
+
+class LineSolutionCache(object):
+    """An LRU cache in front of a line solver."""
+
+    def __init__(self, line_solver=dp_line_solver, max_entries=100000,
+                 max_bytes=None):
+        """Create a cache of @p line_solver results holding at most
+        @p max_entries results and, if @p max_bytes is not None, at most
+        approximately that many bytes of keys and results."""
+        assert max_entries is None or max_entries > 0
+        self.line_solver = line_solver
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def _entry_size(key, result):
+        """Return the approximate memory cost in bytes of caching @p result
+        under @p key.  Cell values and run counts are shared small objects,
+        so only the containers are counted."""
+        (run_counts, line) = key
+        (_, deduced) = result
+        return (sys.getsizeof(key) + sys.getsizeof(run_counts) +
+                sys.getsizeof(line) + sys.getsizeof(result) +
+                (0 if deduced is None else sys.getsizeof(deduced)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __call__(self, run_counts, current_line):
+        """Return the result of the wrapped line solver for @p run_counts and
+        @p current_line, computing it only on a cache miss.
+
+        The deduced line of the result is a tuple shared with the cache."""
+        key = (tuple(run_counts), tuple(current_line))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        (num_lines, deduced) = self.line_solver(run_counts, current_line)
+        result = (num_lines, None if deduced is None else tuple(deduced))
+        size = self._entry_size(key, result)
+        self._entries[key] = (result, size)
+        self.size_bytes += size
+        self._evict()
+        return result
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is within its
+        caps, always keeping the most recent entry."""
+        while len(self._entries) > 1 and (
+                (self.max_entries is not None and
+                 len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and
+                 self.size_bytes > self.max_bytes)):
+            (_, (_, size)) = self._entries.popitem(last=False)
+            self.size_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every entry, leaving the statistics untouched."""
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def stats(self):
+        """Return a dict of the cache's size and hit/miss/eviction counts."""
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
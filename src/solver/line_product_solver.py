@@ -0,0 +1,139 @@
+"""An exact, deliberately simple solver, for checking the other solvers.
+
+Rather than trying every combination of marks (see brute_force.py), this
+solver walks the cartesian product of the legal lines of each row, top to
+bottom, as a depth-first search:
+
+ * The legal lines of each row are enumerated up front (see
+   solver_utils.all_legal_lines), respecting the known cells of the
+   initial solution.
+ * Each column keeps the state of its prefix: which of its runs it is in
+   and how much of that run is marked so far.  Placing a row advances every
+   column's state by one cell.
+ * A row is rejected as soon as some column's prefix cannot be completed:
+   it overruns or cuts short a run, or its remaining runs no longer fit in
+   the rows left.
+
+The partial board is just the list of chosen row indices; no board is
+copied until a solution is found.  It is exponential in the worst case but
+handles puzzles of around 15x15, which makes it a useful oracle for
+differential testing.
+"""
+
+import rules.nonogram as rules
+
+from solver.solver_coroutine import SolverCoroutine, SolutionNotFound
+from solver.solver_utils import all_legal_lines
+
+
+def _cells_needed(runs):
+    """Return a list whose entry i is the number of cells needed to fit
+    @p runs[i:] (with a gap between each run), with a final entry of 0."""
+    needed = [0] * (len(runs) + 1)
+    for i in range(len(runs) - 1, -1, -1):
+        needed[i] = runs[i] + needed[i + 1] + (1 if needed[i + 1] else 0)
+    return needed
+
+
+class LineProductSolver(SolverCoroutine):
+    """A solver (see solver_coroutine.py for API details) that searches the
+    product of the legal lines of each row, pruning by column prefixes."""
+
+    # Number of candidate rows to check between yields of None.
+    CANDIDATES_PER_YIELD = 1000
+
+    def __init__(self, puzzle, initial_solution=None, stats=None):
+        super(LineProductSolver, self).__init__(puzzle, initial_solution,
+                                                stats)
+        self.col_runs = [[run for run in runs if run]
+                         for runs in puzzle.col_run_counts]
+        self.col_needed = [_cells_needed(runs) for runs in self.col_runs]
+
+    def _advance(self, run_index, run_length, line, rows_left):
+        """Return the column states (lists of run indices and of the lengths
+        marked so far of those runs) after the columns with states
+        @p run_index and @p run_length are extended by the cells of
+        @p line, or None if some column can then no longer be completed in
+        @p rows_left more rows."""
+        new_index = list(run_index)
+        new_length = list(run_length)
+        for (x, cell) in enumerate(line):
+            runs = self.col_runs[x]
+            i = new_index[x]
+            length = new_length[x]
+            if cell == rules.MARKED:
+                length += 1
+                if i == len(runs) or length > runs[i]:
+                    return None
+            elif length:
+                if length != runs[i]:
+                    return None
+                i += 1
+                length = 0
+            if self.col_needed[x][i] - length > rows_left:
+                return None
+            new_index[x] = i
+            new_length[x] = length
+        return (new_index, new_length)
+
+    def _solution(self, lines):
+        """Return a clone of the initial solution completed with the row
+        @p lines."""
+        solution = self.initial_solution.clone()
+        for (y, line) in enumerate(lines):
+            for (x, cell) in enumerate(line):
+                if solution.cells[x][y] != rules.UNKNOWN:
+                    continue
+                if cell == rules.MARKED:
+                    solution.mark((x, y))
+                else:
+                    solution.unmark((x, y))
+        return solution
+
+    def solutions(self):
+        """Yield a clone of each complete solution as it is found, and None
+        between them every CANDIDATES_PER_YIELD candidate rows (see
+        BackwardChainSolver.solutions)."""
+        height = self.puzzle.height
+        row_lines = [
+            list(all_legal_lines([run for run in runs if run],
+                                 self.initial_solution.row(y)))
+            for (y, runs) in enumerate(self.puzzle.row_run_counts)]
+        if not all(row_lines):
+            return
+        # The search stack: the index of the line chosen for each row so
+        # far, and the column states before each row.
+        choices = [-1]
+        states = [([0] * self.puzzle.width, [0] * self.puzzle.width)]
+        candidates = 0
+        while choices:
+            y = len(choices) - 1
+            choices[y] += 1
+            if choices[y] == len(row_lines[y]):
+                choices.pop()
+                states.pop()
+                continue
+            candidates += 1
+            self.stats.count("nodes")
+            if candidates % self.CANDIDATES_PER_YIELD == 0:
+                yield None
+            state = self._advance(*states[y], line=row_lines[y][choices[y]],
+                                  rows_left=height - y - 1)
+            if state is None:
+                continue
+            if y + 1 < height:
+                choices.append(-1)
+                states.append(state)
+                continue
+            self.stats.count("solutions")
+            yield self._solution(row_lines[row][choice]
+                                 for (row, choice) in enumerate(choices))
+
+    def solve(self):
+        # See superclass docstring.
+        yield self.initial_solution
+        for solution in self.solutions():
+            yield solution
+            if solution is not None:
+                return
+        raise SolutionNotFound("No product of legal rows is correct")
@@ -0,0 +1,233 @@
+"""A BackwardChainSolver whose deductive phase is vectorized with NumPy.
+
+Instead of solving one line at a time, this solver keeps every legal line
+of every row as one boolean matrix (one matrix row per candidate line,
+together with an array recording which puzzle row each candidate belongs
+to), and likewise for the columns.  One deduction step then:
+
+ * Drops the candidates of every queued row that disagree with a known cell
+   of the board, with a single vectorized mask.
+ * Counts each row's remaining candidates and their MARKED cells with
+   segmented reductions; a cell is forced MARKED where every candidate marks
+   it and UNMARKED where none does.
+ * Does the same for the queued columns.
+
+The results are the same as those of BackwardChainSolver.  The candidate
+matrices are enumerated by the first deduction step (so after solve() first
+yields, where budgets are checked), and only for lines with at most
+MAX_LINE_CANDIDATES legal lines (counted first with legal_line_counts); any
+other line is solved one at a time by the line solver, as in
+BackwardChainSolver.  This backend suits puzzles whose lines have moderately
+many legal lines, where it trades the per-line Python work of the line
+solvers for a few array operations per step.
+
+NumPy is optional; constructing this solver without it raises ImportError.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import rules.nonogram as rules
+
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.solver_coroutine import SolutionNotFound
+from solver.solver_utils import all_legal_lines, legal_line_counts
+
+
+def _candidate_matrix(run_count_lists, lines, max_candidates):
+    """Return (candidates, owners, in_matrix) for the given lines: a boolean
+    matrix with one row per legal line of each of @p lines that has at most
+    @p max_candidates of them (True where MARKED), the index into @p lines
+    to which each of those rows belongs, and a boolean array that is True
+    for the lines included."""
+    candidates = []
+    owners = []
+    in_matrix = np.zeros(len(lines), dtype=bool)
+    for (i, (run_counts, line)) in enumerate(zip(run_count_lists, lines)):
+        if legal_line_counts(run_counts, line)[0] > max_candidates:
+            continue
+        in_matrix[i] = True
+        runs = [run for run in run_counts if run]
+        if sum(runs) + len(runs) - 1 > len(line):
+            continue  # No legal lines (and all_legal_lines would assert).
+        for legal_line in all_legal_lines(runs, line):
+            candidates.append([cell == rules.MARKED for cell in legal_line])
+            owners.append(i)
+    length = len(lines[0]) if lines else 0
+    return (np.array(candidates, dtype=bool).reshape(-1, length),
+            np.array(owners, dtype=np.intp), in_matrix)
+
+
+class NumpyBackwardChainSolver(BackwardChainSolver):
+    """A BackwardChainSolver (see backward_chain_solver.py) that deduces
+    with NumPy array operations over matrices of candidate lines."""
+
+    # Lines with more legal lines than this are solved by the line solver
+    # rather than enumerated into the candidate matrices.
+    MAX_LINE_CANDIDATES = 4096
+
+    def __init__(self, puzzle, initial_solution=None, stats=None,
+                 probing=False, probe_limit=None, strategy=None):
+        if np is None:
+            raise ImportError("NumpyBackwardChainSolver requires numpy")
+        super(NumpyBackwardChainSolver, self).__init__(
+            puzzle, initial_solution, stats=stats, probing=probing,
+            probe_limit=probe_limit, strategy=strategy)
+
+    def update_partials(self, new_partial):
+        # See superclass docstring.
+        super(NumpyBackwardChainSolver, self).update_partials(new_partial)
+        shape = (self.puzzle.height, self.puzzle.width)
+        self.known = np.zeros(shape, dtype=bool)
+        self.marked = np.zeros(shape, dtype=bool)
+        for (x, y) in new_partial.all_coordinates():
+            cell = new_partial.cells[x][y]
+            self.known[y, x] = cell != rules.UNKNOWN
+            self.marked[y, x] = cell == rules.MARKED
+        # Enumerated by the next deduce() (see _enumerate).
+        self.row_candidates = self.row_owners = self.row_in_matrix = None
+        self.col_candidates = self.col_owners = self.col_in_matrix = None
+
+    def _enumerate(self):
+        """Build the candidate matrices from the partial solution."""
+        (self.row_candidates, self.row_owners,
+         self.row_in_matrix) = _candidate_matrix(
+             self.puzzle.row_run_counts, list(self.partial_solution.rows),
+             self.MAX_LINE_CANDIDATES)
+        (self.col_candidates, self.col_owners,
+         self.col_in_matrix) = _candidate_matrix(
+             self.puzzle.col_run_counts, list(self.partial_solution.columns),
+             self.MAX_LINE_CANDIDATES)
+
+    def assign(self, coords, value):
+        # See superclass docstring.
+        super(NumpyBackwardChainSolver, self).assign(coords, value)
+        (x, y) = coords
+        self.known[y, x] = True
+        self.marked[y, x] = value == rules.MARKED
+
+    def unassign(self, coords):
+        # See superclass docstring.
+        super(NumpyBackwardChainSolver, self).unassign(coords)
+        (x, y) = coords
+        self.known[y, x] = False
+        self.marked[y, x] = False
+
+    def copy(self):
+        # See superclass docstring.  The candidate matrices are never
+        # modified in place (which also lets undo() restore them from the
+        # trail), so they can be shared with the copy.
+        solver = super(NumpyBackwardChainSolver, self).copy()
+        solver.known = self.known.copy()
+        solver.marked = self.marked.copy()
+        return solver
+
+    @staticmethod
+    def _reduce(candidates, owners, in_matrix, known, marked, dirty):
+        """Filter the candidate lines of the @p dirty lines against the board
+        (@p known and @p marked, one row per line) and count the rest.
+        Only the lines for which @p in_matrix is True have candidates.
+
+        Returns (candidates, owners, counts, forced_marked, forced_unmarked)
+        where counts holds the number of candidates of each line (0 for
+        lines not in the matrices), and the forced arrays (one row per line)
+        are True where every candidate of that line agrees, or None if some
+        line in the matrices has no candidates left."""
+        num_lines = len(in_matrix)
+        is_dirty = np.zeros(num_lines, dtype=bool)
+        is_dirty[list(dirty)] = True
+        check = is_dirty[owners]
+        mismatched = ((candidates[check] != marked[owners[check]]) &
+                      known[owners[check]]).any(axis=1)
+        keep = np.ones(len(owners), dtype=bool)
+        keep[np.flatnonzero(check)[mismatched]] = False
+        if not keep.all():
+            candidates = candidates[keep]
+            owners = owners[keep]
+        counts = np.bincount(owners, minlength=num_lines)
+        if not counts[in_matrix].all():
+            return (candidates, owners, counts, None, None)
+        forced_marked = np.zeros(known.shape, dtype=bool)
+        forced_unmarked = np.zeros(known.shape, dtype=bool)
+        if len(owners):
+            line_counts = counts[in_matrix]
+            starts = np.concatenate(([0], np.cumsum(line_counts)[:-1]))
+            marked_counts = np.add.reduceat(candidates.astype(np.intp),
+                                            starts, axis=0)
+            forced_marked[in_matrix] = (
+                marked_counts == line_counts[:, np.newaxis])
+            forced_unmarked[in_matrix] = marked_counts == 0
+        return (candidates, owners, counts, forced_marked, forced_unmarked)
+
+    def _apply(self, forced_marked, forced_unmarked, known, transpose):
+        """Assign every UNKNOWN cell that is forced, given forced arrays and
+        @p known in line-major order (transposed if the lines are
+        columns).  Return True if any cell changed."""
+        changes = False
+        for (value, forced) in ((rules.MARKED, forced_marked),
+                                (rules.UNMARKED, forced_unmarked)):
+            for (line, i) in np.argwhere(forced & ~known):
+                coords = (int(line), int(i)) if transpose else (int(i),
+                                                                int(line))
+                self.assign(coords, value)
+                self.stats.count("deductions")
+                changes = True
+        return changes
+
+    def deduce(self):
+        # See superclass docstring.
+        self.stats.count("deduce_passes")
+        with self.stats.timer("deduce"):
+            return self._deduce()
+
+    def _deduce(self):
+        """The body of deduce()."""
+        if self.row_candidates is None:
+            self._enumerate()
+        changed = False
+        if self.dirty_cols:
+            cols, self.dirty_cols = self.dirty_cols, set()
+            for name in ("col_candidates", "col_owners", "legal_col_counts"):
+                self.save_attr(name)
+            (self.col_candidates, self.col_owners, counts,
+             forced_marked, forced_unmarked) = self._reduce(
+                 self.col_candidates, self.col_owners, self.col_in_matrix,
+                 self.known.T, self.marked.T, cols)
+            self.legal_col_counts = [
+                count if in_matrix else old for (count, in_matrix, old) in
+                zip(counts.tolist(), self.col_in_matrix,
+                    self.legal_col_counts)]
+            if forced_marked is None:
+                raise SolutionNotFound(
+                    "Deduction created an impossible column")
+            changed |= self._apply(forced_marked, forced_unmarked,
+                                   self.known.T, transpose=True)
+            # Each column already agrees with its own result; only the
+            # crossing rows need solving again.
+            self.dirty_cols.clear()
+            for x in sorted(cols):
+                if not self.col_in_matrix[x]:
+                    changed |= self._solve_col(x)
+        if self.dirty_rows:
+            rows, self.dirty_rows = self.dirty_rows, set()
+            for name in ("row_candidates", "row_owners", "legal_row_counts"):
+                self.save_attr(name)
+            (self.row_candidates, self.row_owners, counts,
+             forced_marked, forced_unmarked) = self._reduce(
+                 self.row_candidates, self.row_owners, self.row_in_matrix,
+                 self.known, self.marked, rows)
+            self.legal_row_counts = [
+                count if in_matrix else old for (count, in_matrix, old) in
+                zip(counts.tolist(), self.row_in_matrix,
+                    self.legal_row_counts)]
+            if forced_marked is None:
+                raise SolutionNotFound("Deduction created an impossible row")
+            changed |= self._apply(forced_marked, forced_unmarked,
+                                   self.known, transpose=False)
+            self.dirty_rows.clear()
+            for y in sorted(rows):
+                if not self.row_in_matrix[y]:
+                    changed |= self._solve_row(y)
+        return changed
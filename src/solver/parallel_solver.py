@@ -0,0 +1,219 @@
+"""A solver that explores the hypotheses of a BackwardChainSolver on several
+cores.
+
+The Global Interpreter Lock keeps a single Python process on one core, so
+this solver hands whole subtrees of the search to a pool of worker
+processes:
+
+ * The top of the search tree, down to split_depth levels of hypotheses, is
+   expanded in this process exactly as BackwardChainSolver would, yielding
+   partial solutions as it goes.
+ * Each hypothesis left unexplored at split_depth becomes a subproblem: its
+   partial solution is sent to a worker, which searches it sequentially with
+   a BackwardChainSolver.
+ * The first worker to return a complete, correct solution wins; every
+   other subproblem is cancelled.
+
+With decompose set, if the unknown cells left by deduction at the root
+form several independent components (see decomposition.py), each component
+is instead sent to a worker of its own and the results are merged.
+
+While waiting on the workers, solve() yields None (per the SolverCoroutine
+protocol) so that callers can keep reporting progress.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+
+import rules.nonogram as rules
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.decomposition import components
+from solver.solver_coroutine import SolverCoroutine, SolutionNotFound
+
+
+# Set in each worker process by _init_worker; the parent sets the event to
+# tell workers to abandon their subproblems.
+_cancel_event = None
+
+
+def _init_worker(cancel_event):
+    """Pool initializer; see _cancel_event."""
+    global _cancel_event
+    _cancel_event = cancel_event
+
+
+def _solve_subproblem(puzzle, partial_solution):
+    """Search the subtree rooted at @p partial_solution in a worker process.
+
+    Returns (solution, stats): the complete solution, or None if the subtree
+    has no solution or the search was cancelled, and the worker's
+    SolverStats."""
+    solver = BackwardChainSolver(puzzle, initial_solution=partial_solution)
+    solution = None
+    try:
+        for solution in solver.solve():
+            if _cancel_event is not None and _cancel_event.is_set():
+                return (None, solver.stats)
+    except SolutionNotFound:
+        return (None, solver.stats)
+    return (solution, solver.stats)
+
+
+def _solve_component(puzzle, partial_solution, component):
+    """Search the cells of @p component, a set of coordinates independent of
+    the other unknown cells of @p partial_solution, in a worker process.
+
+    Returns (values, stats): a dict of the value of each cell of the
+    component, or None if it has no solution or the search was cancelled,
+    and the worker's SolverStats."""
+    solver = BackwardChainSolver(puzzle, initial_solution=partial_solution,
+                                 focus=component)
+    solution = None
+    try:
+        for solution in solver.solve():
+            if _cancel_event is not None and _cancel_event.is_set():
+                return (None, solver.stats)
+    except SolutionNotFound:
+        return (None, solver.stats)
+    cells = solution.cells
+    return (dict(((x, y), cells[x][y]) for (x, y) in component),
+            solver.stats)
+
+
+class ParallelBackwardChainSolver(SolverCoroutine):
+    """A solver (see solver_coroutine.py for API details) that splits the
+    BackwardChainSolver search tree across a process pool."""
+
+    def __init__(self, puzzle, initial_solution=None, workers=None,
+                 split_depth=3, poll_interval=0.1, stats=None,
+                 decompose=False):
+        """Search with @p workers processes (by default one per core),
+        splitting the search tree into subproblems at the first
+        @p split_depth levels of hypotheses; subtrees below that depth are
+        searched by a single worker.  solve() yields None every
+        @p poll_interval seconds while it waits for the workers.
+
+        If @p decompose is set, independent components of the puzzle are
+        searched by separate workers (see module docstring).
+
+        The stats of each worker's search are merged into self.stats as it
+        finishes."""
+        super(ParallelBackwardChainSolver, self).__init__(
+            puzzle, initial_solution, stats)
+        self.workers = workers or os.cpu_count() or 1
+        self.split_depth = split_depth
+        self.poll_interval = poll_interval
+        self.decompose = decompose
+
+    def _split(self, frontier):
+        """Deduce each solver in @p frontier to fixity, yielding partial
+        solutions along the way.
+
+        Returns (solution, children): a complete solution if one of the
+        solvers found it (children is then None), else the list of
+        hypothetical solvers one level further down."""
+        children = []
+        for solver in frontier:
+            self.stats.count("nodes")
+            try:
+                while solver.deduce():
+                    yield solver.partial_solution
+            except SolutionNotFound:
+                continue
+            coords = solver.speculation_coords()
+            if coords is None:
+                return (solver.partial_solution, None)
+            children.extend(solver.hypotheses(coords))
+        return (None, children)
+
+    def _start_pool(self):
+        """Return (executor, cancel_event) for a new pool of workers."""
+        cancel_event = multiprocessing.Event()
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(cancel_event,))
+        return (executor, cancel_event)
+
+    def _solve_components(self, root):
+        """Deduce @p root (a BackwardChainSolver) to fixity, yielding partial
+        solutions, and if its unknown cells form several components, search
+        them in parallel.
+
+        Returns the merged solution, or None if there was one component."""
+        while root.deduce():
+            yield root.partial_solution
+        parts = components(self.puzzle, root.partial_solution)
+        if len(parts) < 2:
+            return None
+        self.stats.count("components", len(parts))
+        solution = root.partial_solution.clone()
+        (executor, cancel_event) = self._start_pool()
+        try:
+            pending = set(
+                executor.submit(_solve_component, self.puzzle,
+                                root.partial_solution, part)
+                for part in parts)
+            while pending:
+                (done, pending) = concurrent.futures.wait(
+                    pending, timeout=self.poll_interval,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    (values, stats) = future.result()
+                    self.stats.merge(stats)
+                    if values is None:
+                        raise SolutionNotFound("A component has no solution")
+                    for (coords, value) in values.items():
+                        if value == rules.MARKED:
+                            solution.mark(coords)
+                        else:
+                            solution.unmark(coords)
+                yield None
+        finally:
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return solution
+
+    def solve(self):
+        # See superclass docstring.
+        yield self.initial_solution
+        root = BackwardChainSolver(
+            self.puzzle, initial_solution=self.initial_solution,
+            stats=self.stats)
+        if self.decompose:
+            solution = yield from self._solve_components(root)
+            if solution is not None:
+                yield solution
+                return
+        frontier = [root]
+        for _ in range(self.split_depth):
+            (solution, frontier) = yield from self._split(frontier)
+            if solution is not None:
+                yield solution
+                return
+            if not frontier:
+                raise SolutionNotFound("All hypotheses failed")
+
+        (executor, cancel_event) = self._start_pool()
+        try:
+            pending = set(
+                executor.submit(_solve_subproblem, self.puzzle,
+                                solver.partial_solution)
+                for solver in frontier)
+            while pending:
+                (done, pending) = concurrent.futures.wait(
+                    pending, timeout=self.poll_interval,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    (solution, stats) = future.result()
+                    self.stats.merge(stats)
+                    if (solution is not None and solution.complete() and
+                            solution.correct()):
+                        yield solution
+                        return
+                yield None
+            raise SolutionNotFound("All subproblems failed")
+        finally:
+            # Runs on success, failure, or the caller abandoning solve().
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
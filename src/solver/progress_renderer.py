@@ -0,0 +1,104 @@
+"""Drawing a solver's progress from its events (see
+SolverCoroutine.events), cheaply enough to leave on for large puzzles.
+
+The header layout is computed once, and after the first full drawing each
+step only redraws what its events changed:
+
+ * On a terminal (ANSI mode), the board is drawn once and each changed cell
+   is then overwritten in place, with a status line below the board
+   describing the latest BRANCH or BACKTRACK event.
+ * Otherwise (eg for a log), each step writes only its BRANCH and BACKTRACK
+   events and the rows whose cells it changed.
+"""
+
+import sys
+
+import rules.nonogram as rules
+from solver.solver_coroutine import CELL
+
+
+class ProgressRenderer(object):
+    """Draws the solution of a puzzle as a solver's events arrive."""
+
+    def __init__(self, puzzle, out=None, ansi=None):
+        """Draw to the file @p out (stdout if None), in ANSI mode if
+        @p ansi is set, or if it is None and @p out is a terminal."""
+        self.puzzle = puzzle
+        self.out = sys.stdout if out is None else out
+        if ansi is None:
+            ansi = hasattr(self.out, "isatty") and self.out.isatty()
+        self.ansi = ansi
+        # The solution so far, as replayed from the events.
+        self.solution = rules.NonogramSolution(puzzle)
+        self._col_header = puzzle.ascii_col_header_string()
+        self._row_headers = [puzzle.ascii_nth_single_row_header(y)
+                             for y in range(puzzle.height)]
+        # Column of the first character of cell 0 (counting from 1), for
+        # moving the cursor in ANSI mode.
+        self._first_cell_column = len(self._row_headers[0]) + 2
+        self._drawn = False
+
+    def _row_string(self, y):
+        """Return the text of row @p y, with its header."""
+        return self._row_headers[y] + " " + " ".join(self.solution.row(y))
+
+    def _marker_string(self, event):
+        """Return a description of a BRANCH or BACKTRACK @p event."""
+        (kind, coords, value) = event
+        if value is None:
+            return "%s %s" % (kind, coords)
+        return "%s %s = %s" % (kind, coords, value)
+
+    def update(self, events):
+        """Apply a list of @p events to the solution and draw the result."""
+        changed = []
+        markers = []
+        for event in events:
+            (kind, (x, y), value) = event
+            if kind != CELL:
+                markers.append(event)
+                continue
+            if self.solution.cells[x][y] != rules.UNKNOWN:
+                self.solution.clear((x, y))
+            if value == rules.MARKED:
+                self.solution.mark((x, y))
+            elif value == rules.UNMARKED:
+                self.solution.unmark((x, y))
+            changed.append((x, y))
+        if not self._drawn:
+            self._draw()
+        elif self.ansi:
+            self._redraw_cells(changed, markers)
+        else:
+            self._redraw_rows(changed, markers)
+        self.out.flush()
+
+    def _draw(self):
+        """Draw the whole board."""
+        self._drawn = True
+        lines = [self._col_header]
+        lines.extend(self._row_string(y) for y in range(self.puzzle.height))
+        self.out.write("\n".join(lines) + "\n")
+
+    def _redraw_cells(self, changed, markers):
+        """Overwrite the @p changed cells of the board drawn on a terminal,
+        and show the last of @p markers on the status line below it, where
+        the cursor is left."""
+        write = self.out.write
+        height = self.puzzle.height
+        for (x, y) in changed:
+            # Up to the cell's row, across to its column, then back.
+            write("\x1b[%dA\x1b[%dG%s\x1b[%dB\r" %
+                  (height - y, self._first_cell_column + 3 * x,
+                   self.solution.cells[x][y], height - y))
+        if markers:
+            write("\r\x1b[K" + self._marker_string(markers[-1]))
+
+    def _redraw_rows(self, changed, markers):
+        """Write each of @p markers, then each row with a cell in
+        @p changed."""
+        lines = [self._marker_string(event) for event in markers]
+        lines.extend(self._row_string(y)
+                     for y in sorted(set(y for (_, y) in changed)))
+        if lines:
+            self.out.write("\n".join(lines) + "\n")
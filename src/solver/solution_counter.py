@@ -0,0 +1,46 @@
+"""Counting the solutions of a puzzle, eg to check that it is unique.
+
+Rather than enumerating every combination of marks (see
+rules.nonogram.all_possible_total_solutions), this carries the deductive and
+branching search of BackwardChainSolver on past its first solution, so that
+the cost of a uniqueness check is close to that of solving the puzzle.
+"""
+
+from solver.backward_chain_solver import BackwardChainSolver
+
+
+def find_solutions(puzzle, limit=None, solver_class=BackwardChainSolver,
+                   **kwargs):
+    """Generate the solutions of @p puzzle, stopping after @p limit of them
+    if @p limit is not None, or None after each step of the search between
+    solutions (see BackwardChainSolver.solutions).
+
+    @p solver_class is BackwardChainSolver or any other solver with a
+    solutions() method like it (eg LineProductSolver); @p kwargs are passed
+    to its constructor."""
+    assert limit is None or limit > 0, "Solution limit must be positive"
+    solver = solver_class(puzzle, **kwargs)
+    found = 0
+    for solution in solver.solutions():
+        yield solution
+        if solution is not None:
+            found += 1
+            if found == limit:
+                return
+
+
+def count_solutions(puzzle, limit=None, solver_class=BackwardChainSolver,
+                    **kwargs):
+    """Return a list of the solutions of @p puzzle, stopping once @p limit
+    solutions have been found if @p limit is not None.
+
+    count_solutions(puzzle, limit=2) is a uniqueness check: the puzzle is
+    unique if it returns exactly one solution."""
+    return [solution for solution in
+            find_solutions(puzzle, limit, solver_class, **kwargs)
+            if solution is not None]
+
+
+def is_unique(puzzle, **kwargs):
+    """Return True if @p puzzle has exactly one solution."""
+    return len(count_solutions(puzzle, limit=2, **kwargs)) == 1
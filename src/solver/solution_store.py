@@ -0,0 +1,226 @@
+"""A persistent cache of solutions, so that puzzles seen before (perhaps
+mirrored, transposed or renamed) are not searched again.
+
+SolutionStore keeps solutions in a local sqlite file, keyed by the
+fingerprint of each puzzle's canonical form (see rules/canonical.py) and
+stored in that orientation, so a hit for any symmetric variant is mapped
+back through its symmetry.  Puzzles proven unsolvable are remembered too.
+The file holds at most max_entries puzzles, evicting the least recently
+used, and the most recently used are also kept in memory so that repeat
+lookups need no database access.
+
+CachingSolver wraps any other solver, answering from a store when it can
+and recording what the wrapped solver finds when it cannot.
+"""
+
+import collections
+import sqlite3
+import time
+
+import rules.nonogram as rules
+from rules.canonical import fingerprint, transform_strings
+from rules.canonical import untransform_strings
+from rules.puzzle_io import solution_from_strings, solution_to_strings
+
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.solver_coroutine import SolverCoroutine, SolutionNotFound
+
+
+class SolutionStore(object):
+    """Solutions of puzzles, keyed by canonical fingerprint, in an sqlite
+    file.  Not safe to share between threads; open one per thread or
+    process instead."""
+
+    DEFAULT_MAX_ENTRIES = 100000
+    DEFAULT_MEMORY_ENTRIES = 1024
+
+    def __init__(self, path, max_entries=None, memory_entries=None):
+        """Open (or create) the store in the file at @p path (":memory:" for
+        a store that is not saved), holding at most @p max_entries puzzles,
+        of which the @p memory_entries most recently used are also held in
+        memory."""
+        self.path = path
+        self.max_entries = (self.DEFAULT_MAX_ENTRIES if max_entries is None
+                            else max_entries)
+        self.memory_entries = (self.DEFAULT_MEMORY_ENTRIES
+                               if memory_entries is None else memory_entries)
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS solutions ("
+                         "key TEXT PRIMARY KEY, solution TEXT, "
+                         "last_used INTEGER NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS solutions_last_used "
+                         "ON solutions (last_used)")
+        (last_used,) = self._db.execute(
+            "SELECT MAX(last_used) FROM solutions").fetchone()
+        self._clock = last_used or 0
+        # Canonical solution strings (or None if unsolvable) by key, most
+        # recently used last.
+        self._memory = collections.OrderedDict()
+        # The use time of keys used since the last flush(), by key.
+        self._touched = {}
+        # Recent results of fingerprint(), by (row clues, column clues).
+        self._fingerprints = collections.OrderedDict()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def _tick(self):
+        """Return a new use time: microseconds since the epoch, so that the
+        use times of stores open on the same file in different processes
+        are comparable, but always later than the last."""
+        self._clock = max(self._clock + 1, time.time_ns() // 1000)
+        return self._clock
+
+    def _remember(self, key, strings):
+        """Keep the canonical @p strings for @p key in memory."""
+        self._memory[key] = strings
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _fingerprint(self, puzzle):
+        """Return fingerprint(@p puzzle), remembering recent results."""
+        clues = (puzzle.row_run_counts, puzzle.col_run_counts)
+        result = self._fingerprints.get(clues)
+        if result is None:
+            result = self._fingerprints[clues] = fingerprint(puzzle)
+            if len(self._fingerprints) > self.memory_entries:
+                self._fingerprints.popitem(last=False)
+        return result
+
+    def get(self, puzzle):
+        """Return (found, solution): whether @p puzzle (or a symmetric
+        variant of it) is in the store and, if so, its solution, or None if
+        it is unsolvable."""
+        (key, symmetry) = self._fingerprint(puzzle)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            strings = self._memory[key]
+            checked = True
+        else:
+            row = self._db.execute(
+                "SELECT solution FROM solutions WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return (False, None)
+            strings = None if row[0] is None else row[0].split("\n")
+            checked = False
+        self._touched[key] = self._tick()
+        if strings is None:
+            self._remember(key, strings)
+            return (True, None)
+        solution = solution_from_strings(
+            puzzle, untransform_strings(strings, symmetry))
+        if not checked:
+            # Solutions in memory were checked when they were loaded.
+            if not solution.correct():
+                # A corrupt entry (or a hash collision); forget it.
+                self.discard(puzzle)
+                return (False, None)
+            self._remember(key, strings)
+        return (True, solution)
+
+    def put(self, puzzle, solution):
+        """Store @p solution (a complete NonogramSolution) of @p puzzle, or
+        None if @p puzzle is unsolvable, evicting the least recently used
+        puzzles if the store is full."""
+        (key, symmetry) = self._fingerprint(puzzle)
+        strings = (None if solution is None else
+                   transform_strings(solution_to_strings(solution), symmetry))
+        self._remember(key, strings)
+        self._touched.pop(key, None)
+        with self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO solutions VALUES (?, ?, ?)",
+                (key, None if strings is None else "\n".join(strings),
+                 self._tick()))
+            self._flush()
+            # Counted afresh, within the transaction, as other processes may
+            # have the file open too.
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                evicted = self._db.execute(
+                    "SELECT key FROM solutions ORDER BY last_used LIMIT ?",
+                    (excess,)).fetchall()
+                self._db.executemany("DELETE FROM solutions WHERE key = ?",
+                                     evicted)
+                for (evicted_key,) in evicted:
+                    self._memory.pop(evicted_key, None)
+
+    def discard(self, puzzle):
+        """Remove @p puzzle (and its symmetric variants) from the store."""
+        (key, _) = self._fingerprint(puzzle)
+        self._memory.pop(key, None)
+        self._touched.pop(key, None)
+        with self._db:
+            self._db.execute("DELETE FROM solutions WHERE key = ?", (key,))
+
+    def _flush(self):
+        """Write the use times of the puzzles looked up since the last
+        flush, within a transaction."""
+        self._db.executemany(
+            "UPDATE solutions SET last_used = ? WHERE key = ?",
+            [(last_used, key) for (key, last_used) in self._touched.items()])
+        self._touched = {}
+
+    def flush(self):
+        """Write the use times of the puzzles looked up since the last
+        flush, which are otherwise written by the next put() or close()."""
+        with self._db:
+            self._flush()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CachingSolver(SolverCoroutine):
+    """A solver (see solver_coroutine.py for API details) that looks for
+    the puzzle in a SolutionStore before searching with another solver,
+    and stores what that solver finds."""
+
+    def __init__(self, puzzle, initial_solution=None, stats=None,
+                 store=None, solver_class=BackwardChainSolver, **kwargs):
+        """Search with a @p solver_class solver, constructed with @p kwargs,
+        on a miss in @p store.  Without a @p store, or with an initial
+        solution that has known cells, the store is not used."""
+        super(CachingSolver, self).__init__(puzzle, initial_solution, stats)
+        self.store = store
+        self.solver = solver_class(puzzle, initial_solution=initial_solution,
+                                   stats=self.stats, **kwargs)
+
+    def certain(self):
+        # See superclass docstring.
+        return self.solver.certain()
+
+    def solve(self):
+        # See superclass docstring.
+        if (self.store is None or
+                self.initial_solution.count(rules.UNKNOWN) !=
+                self.puzzle.width * self.puzzle.height):
+            yield from self.solver.solve()
+            return
+        (found, solution) = self.store.get(self.puzzle)
+        if found:
+            self.stats.count("store_hits")
+            if solution is None:
+                raise SolutionNotFound("Stored as unsolvable")
+            yield solution
+            return
+        self.stats.count("store_misses")
+        solution = None
+        try:
+            for solution in self.solver.solve():
+                yield solution
+        except SolutionNotFound:
+            self.store.put(self.puzzle, None)
+            raise
+        if (solution is not None and solution.complete() and
+                solution.correct()):
+            self.store.put(self.puzzle, solution)
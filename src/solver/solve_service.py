@@ -0,0 +1,336 @@
+"""An asyncio front end for sharing a pool of solvers between many clients.
+
+SolveService runs solves (see batch_solver.solve_one) in a bounded pool of
+worker threads.  Each solve is reported as a stream of events, which are
+JSON-serializable dicts with an "event" key:
+
+  accepted  the solve was admitted; "active" is the number of solves now
+            queued or running
+  progress  sent at most every progress_interval seconds while solving:
+            "nodes" explored and "known" cells of the latest partial
+            solution (None if the solver had none to show)
+  result    the final batch_solver result record, plus the "event" key
+
+Deadlines and cancellation are enforced between the solver's yields: a solve
+that runs past its timeout, counted from when it was admitted (so including
+any wait for a worker), ends with status "timeout", and one whose event
+stream is closed early (eg because the client went away) is told to stop
+and ends with status "cancelled".  For backpressure, at most workers +
+max_queue solves are admitted at once; further requests raise ServiceBusy
+until some finish.
+
+start_server() exposes a service over HTTP/1.1 with JSON bodies, one
+request per connection:
+
+  GET  /status  the service's status() as JSON
+  POST /solve   body {"puzzle": {...}, "solver": name, "timeout": seconds,
+                "stream": bool}, where the puzzle is as for
+                puzzle_io.puzzle_from_json and all but "puzzle" are
+                optional.  Returns the result record, or with "stream" the
+                whole event stream as JSON lines.  Returns 503 if the
+                service is busy and 400 for a malformed request.
+
+A client that takes longer than read_timeout seconds to send its whole
+request gets a 408 response.
+
+Worker threads share one interpreter, so the pool bounds concurrency and
+memory rather than adding CPU parallelism; run several services (or use
+ParallelBackwardChainSolver) to use more cores.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import json
+import os
+import threading
+import time
+
+import rules.nonogram as rules
+from rules.puzzle_io import puzzle_from_json
+from solver.batch_solver import SOLVERS, solve_one
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when a SolveService has no room for another solve."""
+
+
+def _solve_by(deadline, puzzle, solver_name, **kwargs):
+    """Call solve_one with @p puzzle, @p solver_name and @p kwargs, timing
+    out at the time.monotonic() @p deadline (if not None)."""
+    timeout = (None if deadline is None else
+               max(deadline - time.monotonic(), 0))
+    return solve_one(puzzle, solver_name, timeout, **kwargs)
+
+
+class SolveService(object):
+    """A bounded pool of workers that run solves for asyncio callers."""
+
+    def __init__(self, workers=None, max_queue=None, max_timeout=None,
+                 progress_interval=0.25):
+        """Run up to @p workers solves at once (by default one per core),
+        with up to @p max_queue more (by default 4 per worker) waiting for
+        a worker.  @p max_timeout, if not None, caps the timeout of every
+        solve in seconds."""
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.max_timeout = max_timeout
+        self.progress_interval = progress_interval
+        self.active = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers)
+
+    def status(self):
+        """Return a JSON-serializable dict describing the load on the
+        service."""
+        return {"workers": self.workers,
+                "capacity": self.workers + self.max_queue,
+                "active": self.active}
+
+    def _timeout(self, timeout):
+        """Return the timeout to use for a request for @p timeout."""
+        if self.max_timeout is None:
+            return timeout
+        if timeout is None:
+            return self.max_timeout
+        return min(timeout, self.max_timeout)
+
+    def _finished(self, _):
+        """Done callback of each solve's future."""
+        self.active -= 1
+
+    async def events(self, puzzle, solver_name="backward_chain",
+                     timeout=None):
+        """Solve @p puzzle with the solver named @p solver_name (see
+        batch_solver.SOLVERS), generating the events described in the
+        module docstring.  Raises ServiceBusy, before generating any
+        event, if the service is full.
+
+        Closing the generator before the result cancels the solve."""
+        assert solver_name in SOLVERS, "Unknown solver %s" % solver_name
+        if self.active >= self.workers + self.max_queue:
+            raise ServiceBusy("All %d solver slots are in use" %
+                              (self.workers + self.max_queue))
+        loop = asyncio.get_running_loop()
+        progress_events = asyncio.Queue()
+        cancel = threading.Event()
+        last_progress = [time.monotonic()]
+
+        def progress(solution, solver):
+            # Called in the worker thread each time the solver yields.
+            now = time.monotonic()
+            if now - last_progress[0] < self.progress_interval:
+                return
+            last_progress[0] = now
+            known = None
+            if solution is not None:
+                known = (puzzle.width * puzzle.height -
+                         solution.count(rules.UNKNOWN))
+            loop.call_soon_threadsafe(
+                progress_events.put_nowait,
+                {"event": "progress", "nodes": solver.stats["nodes"],
+                 "known": known})
+
+        timeout = self._timeout(timeout)
+        # Time spent waiting for a worker counts towards the timeout.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.active += 1
+        future = loop.run_in_executor(
+            self._executor, functools.partial(
+                _solve_by, deadline, puzzle, solver_name, cancel=cancel,
+                progress=progress))
+        future.add_done_callback(self._finished)
+        try:
+            yield {"event": "accepted", "active": self.active}
+            while not future.done():
+                getter = asyncio.ensure_future(progress_events.get())
+                await asyncio.wait((getter, future),
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            yield dict(future.result(), event="result")
+        finally:
+            # Stops the solver at its next yield if it is still running.
+            cancel.set()
+
+    async def solve(self, puzzle, solver_name="backward_chain",
+                    timeout=None):
+        """Solve @p puzzle as for events(), returning only the result
+        record."""
+        async for event in self.events(puzzle, solver_name, timeout):
+            if event["event"] == "result":
+                return event
+
+    def shutdown(self):
+        """Stop the workers once the solves already running finish."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# The largest request body accepted, in bytes.
+MAX_BODY = 16 * 1024 * 1024
+
+# The default time allowed for reading a whole request, in seconds.
+READ_TIMEOUT = 30
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 408: "Request Timeout",
+            413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class _HttpError(Exception):
+    """An error response to send instead of handling a request."""
+
+    def __init__(self, status, message):
+        super(_HttpError, self).__init__(message)
+        self.status = status
+
+
+async def _write_head(writer, status, content_type="application/json",
+                      headers=()):
+    """Write the status line and headers of a response."""
+    lines = ["HTTP/1.1 %d %s" % (status, _REASONS[status]),
+             "Content-Type: %s" % content_type,
+             "Connection: close"]
+    lines.extend("%s: %s" % header for header in headers)
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("ascii"))
+    await writer.drain()
+
+
+async def _write_json(writer, status, body, headers=()):
+    """Write a complete response whose body is the JSON of @p body."""
+    await _write_head(writer, status, headers=headers)
+    writer.write(json.dumps(body).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+async def _read_request(reader):
+    """Return (method, path, body) of the HTTP request from @p reader."""
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) != 3:
+        raise _HttpError(400, "Malformed request line")
+    (method, path, _) = request_line
+    length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        (name, _, value) = line.partition(":")
+        if name.strip().lower() == "content-length":
+            try:
+                length = int(value)
+            except ValueError:
+                raise _HttpError(400, "Malformed Content-Length")
+            if length < 0:
+                raise _HttpError(400, "Negative Content-Length")
+    if length > MAX_BODY:
+        raise _HttpError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return (method, path, body)
+
+
+def _parse_solve_request(body):
+    """Return (puzzle, solver_name, timeout, stream) from the body of a
+    /solve request."""
+    try:
+        request = json.loads(body)
+        puzzle = puzzle_from_json(request["puzzle"])
+    except (ValueError, KeyError, TypeError, AssertionError) as e:
+        raise _HttpError(400, "Bad puzzle request: %s" % e)
+    solver_name = request.get("solver", "backward_chain")
+    if solver_name not in SOLVERS:
+        raise _HttpError(400, "Unknown solver %s" % solver_name)
+    timeout = request.get("timeout")
+    # bool is a subclass of int, but true is not a number of seconds.
+    if timeout is not None and (isinstance(timeout, bool) or
+                                not isinstance(timeout, (int, float)) or
+                                not timeout > 0):
+        raise _HttpError(400, "timeout must be a positive number of seconds")
+    return (puzzle, solver_name, timeout, bool(request.get("stream")))
+
+
+async def _result(events):
+    """Return the result event from the events() generator @p events."""
+    async for event in events:
+        if event["event"] == "result":
+            return event
+
+
+async def _handle_solve(service, reader, writer, body):
+    """Respond to a /solve request with @p body, read from @p reader."""
+    (puzzle, solver_name, timeout, stream) = _parse_solve_request(body)
+    events = service.events(puzzle, solver_name, timeout)
+    try:
+        try:
+            accepted = await events.__anext__()
+        except ServiceBusy as e:
+            await _write_json(writer, 503, {"error": str(e)},
+                              headers=[("Retry-After", "1")])
+            return
+        if not stream:
+            # Nothing is written until the result, so watch for the client
+            # closing the connection (the request has been read, so the
+            # next read only returns at EOF) to cancel the solve.
+            result = asyncio.ensure_future(_result(events))
+            closed = asyncio.ensure_future(reader.read())
+            await asyncio.wait((result, closed),
+                               return_when=asyncio.FIRST_COMPLETED)
+            if result.done():
+                closed.cancel()
+                await _write_json(writer, 200, result.result())
+            else:
+                result.cancel()
+                try:
+                    await result
+                except asyncio.CancelledError:
+                    pass
+            return
+        await _write_head(writer, 200, "application/x-ndjson")
+        writer.write(json.dumps(accepted).encode("utf-8") + b"\n")
+        async for event in events:
+            writer.write(json.dumps(event).encode("utf-8") + b"\n")
+            # Waits for a slow client rather than buffering its events.
+            await writer.drain()
+    finally:
+        await events.aclose()
+
+
+async def _handle_connection(service, read_timeout, reader, writer):
+    """Serve one HTTP request from @p reader, responding to @p writer.  The
+    request must be read within @p read_timeout seconds (if not None)."""
+    try:
+        try:
+            try:
+                (method, path, body) = await asyncio.wait_for(
+                    _read_request(reader), read_timeout)
+            except asyncio.TimeoutError:
+                raise _HttpError(408, "Request not read in %s seconds" %
+                                 read_timeout)
+            if path == "/status":
+                if method != "GET":
+                    raise _HttpError(405, "Use GET for /status")
+                await _write_json(writer, 200, service.status())
+            elif path == "/solve":
+                if method != "POST":
+                    raise _HttpError(405, "Use POST for /solve")
+                await _handle_solve(service, reader, writer, body)
+            else:
+                raise _HttpError(404, "No such endpoint %s" % path)
+        except _HttpError as e:
+            await _write_json(writer, e.status, {"error": str(e)})
+    except (ConnectionError, asyncio.IncompleteReadError):
+        # The client went away; _handle_solve has cancelled any solve.
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host="127.0.0.1", port=0,
+                       read_timeout=READ_TIMEOUT):
+    """Start serving @p service over HTTP on @p host and @p port (0 to pick
+    a free port), returning the asyncio.Server.  Clients must send their
+    whole request within @p read_timeout seconds (None for no limit)."""
+    return await asyncio.start_server(
+        functools.partial(_handle_connection, service, read_timeout),
+        host, port)
@@ -1,21 +1,108 @@
 """Solvers for nonogram problems operate as coroutines, yielding partial
 solutions until they have a complete, correct solution.  A coroutine
-may yield None if it has no intermediate solution."""
+may yield None if it has no intermediate solution.
+
+SolverCoroutine.run() drives a solver under a SolveBudget instead, and
+returns a SolveResult.  When the budget runs out, the result still carries
+the most-determined partial solution the solver could vouch for: one whose
+known cells follow from the puzzle alone rather than from hypotheses (see
+SolverCoroutine.certain), so callers that cannot wait can use it.
+
+SolverCoroutine.events() runs a solver in event mode: rather than whole
+partial solutions, each step yields a list of compact events, which are
+(kind, coords, value) tuples:
+
+  (CELL, coords, value)      the cell at coords is now value (MARKED,
+                             UNMARKED or UNKNOWN)
+  (BRANCH, coords, value)    the solver hypothesized value for the cell
+  (BACKTRACK, coords, None)  the solver abandoned its hypothesis about the
+                             cell
+
+Replaying the CELL events in order on an empty solution reproduces the
+solver's partial solution as of each step (see progress_renderer.py)."""
+
+import sys
+import time
 
 import rules.nonogram as rules
+from solver.solver_stats import SolverStats
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# The kinds of event generated by SolverCoroutine.events().
+CELL, BRANCH, BACKTRACK = "cell", "branch", "backtrack"
 
 
 class SolutionNotFound(RuntimeError):
     pass
 
 
+class SolveBudget(object):
+    """Limits on a run of a solver (see SolverCoroutine.run), each of which
+    is ignored if None.  They are checked each time the solver yields."""
+
+    def __init__(self, wall_time=None, nodes=None, memory=None):
+        """@p wall_time is in seconds, @p nodes is a number of search nodes
+        (see solver_stats.py) and @p memory is a number of bytes by which
+        the peak resident set size of the process may grow; the memory
+        limit requires the resource module (ie a Unix)."""
+        assert memory is None or resource is not None, \
+            "Memory budgets require the resource module"
+        self.wall_time = wall_time
+        self.nodes = nodes
+        self.memory = memory
+
+
+def _peak_memory():
+    """Return the peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, other Unixes kilobytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SolveResult(object):
+    """The outcome of SolverCoroutine.run():
+
+      status    "solved", "unsolvable" or "exhausted"
+      solution  the complete solution if solved; the most-determined certain
+                partial solution if exhausted; None if unsolvable
+      unknown   the number of UNKNOWN cells of solution (0 if solved)
+      budget    which limit of the SolveBudget ran out ("wall_time",
+                "nodes" or "memory") if exhausted, else None
+      wall_time seconds spent
+      nodes     search nodes explored
+    """
+
+    def __init__(self, status, solution, budget, wall_time, nodes):
+        self.status = status
+        self.solution = solution
+        self.unknown = (None if solution is None
+                        else solution.count(rules.UNKNOWN))
+        self.budget = budget
+        self.wall_time = wall_time
+        self.nodes = nodes
+
+    def __repr__(self):
+        return "SolveResult(%s, unknown=%s, budget=%s, nodes=%d)" % (
+            self.status, self.unknown, self.budget, self.nodes)
+
+
 class SolverCoroutine(object):
     """Abstract base class for solvers."""
 
-    def __init__(self, puzzle, initial_solution=None):
+    def __init__(self, puzzle, initial_solution=None, stats=None):
+        """@p stats, if given, is a SolverStats (see solver_stats.py) to
+        count into, for instance one shared with a parent solver."""
         self.puzzle = puzzle
         self.initial_solution = (initial_solution or
                                  rules.NonogramSolution(puzzle))
+        if stats is None:
+            stats = SolverStats()
+        self.stats = stats
 
     def solve(self):
         """Iteratively solve the puzzle, emitting partial solutions along the
@@ -30,17 +117,92 @@ class SolverCoroutine(object):
         raise NotImplementedError(
             "solver did not implement SolverCoroutine.solve")
 
+    def events(self):
+        """Run solve() in event mode (see module docstring), yielding a list
+        of the events of each step, which may be empty.  The first list sets
+        the known cells of the initial solution; after that, CELL events
+        only describe cells whose value changed since the previous step.
+
+        This implementation compares each partial solution that solve()
+        yields with the last; solvers that know what they changed should
+        override it to avoid the cost."""
+        shown = [[rules.UNKNOWN] * self.puzzle.height
+                 for _ in range(self.puzzle.width)]
+        for solution in self.solve():
+            events = []
+            if solution is not None:
+                cells = solution.cells
+                for (x, column) in enumerate(shown):
+                    for (y, value) in enumerate(column):
+                        if cells[x][y] != value:
+                            column[y] = cells[x][y]
+                            events.append((CELL, (x, y), column[y]))
+            yield events
+
+    def certain(self):
+        """Return True if the partial solution that solve() last yielded
+        follows from the initial solution alone, ie involves no
+        hypotheses.  Solvers that cannot tell return False, so that run()
+        only vouches for their initial solution."""
+        return False
+
+    def run(self, budget=None):
+        """Run solve() until it finishes or @p budget (a SolveBudget, or
+        None for no limits) runs out, and return a SolveResult."""
+        budget = budget or SolveBudget()
+        start = time.monotonic()
+        start_nodes = self.stats["nodes"]
+        deadline = (None if budget.wall_time is None
+                    else start + budget.wall_time)
+        memory_limit = (None if budget.memory is None
+                        else _peak_memory() + budget.memory)
+        best = self.initial_solution
+        best_unknown = best.count(rules.UNKNOWN)
+        solution = None
+        exhausted = None
+
+        def result(status, solution):
+            return SolveResult(status, solution, exhausted,
+                               time.monotonic() - start,
+                               self.stats["nodes"] - start_nodes)
+
+        try:
+            for solution in self.solve():
+                if solution is None:
+                    pass
+                elif solution.complete():
+                    continue  # Checked once solve() returns.
+                elif self.certain():
+                    unknown = solution.count(rules.UNKNOWN)
+                    if unknown < best_unknown:
+                        (best, best_unknown) = (solution.clone(), unknown)
+                if deadline is not None and time.monotonic() > deadline:
+                    exhausted = "wall_time"
+                elif (budget.nodes is not None and
+                      self.stats["nodes"] - start_nodes > budget.nodes):
+                    exhausted = "nodes"
+                elif (memory_limit is not None and
+                      _peak_memory() > memory_limit):
+                    exhausted = "memory"
+                if exhausted:
+                    return result("exhausted", best)
+        except SolutionNotFound:
+            return result("unsolvable", None)
+        if solution is not None and solution.complete() and \
+                solution.correct():
+            return result("solved", solution)
+        return result("unsolvable", None)
+
 
 def test_solver(solver_class, puzzle):
     """Do a trivial test of the given solver class on the given puzzle to see
     that it's working."""
+    # Imported here because the renderer depends on this module.
+    from solver.progress_renderer import ProgressRenderer
     solver = solver_class(puzzle)
-    solution = None
-    for solution in solver.solve():
-        if solution is None:
-            print("...")
-        else:
-            solution.debug_print()
+    renderer = ProgressRenderer(puzzle)
+    for events in solver.events():
+        renderer.update(events)
     print("Coroutine says that it is done")
-    assert solution.complete()
-    assert solution.correct()
+    assert renderer.solution.complete()
+    assert renderer.solution.correct()
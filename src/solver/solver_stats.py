@@ -0,0 +1,129 @@
+"""Instrumentation for solvers.
+
+Every SolverCoroutine has a SolverStats object, which its sub-solvers (eg
+the hypotheses of a BackwardChainSolver) share, so the counts of a whole
+search roll up in one place.  Solvers count events by name; the counters
+they use are:
+
+  nodes           search nodes explored (the root and each hypothesis
+                  tried, or candidates checked by brute force)
+  deduce_passes   calls to deduce()
+  line_solves     calls to a line solver (including cache hits)
+  deductions      cells set by deduction
+  hypotheses      hypotheses tried (or hypothetical solvers created)
+  backtracks      hypotheses that failed
+  solutions       complete solutions found
+  probes          values probed (see BackwardChainSolver.probe)
+  probe_deductions  cells set by probing
+  nogoods         nogoods learned (see learning_solver.py)
+  nogood_deductions  cells set by learned nogoods
+  backjumps       backtracks that skipped more than one level
+  components      independent components searched (see decomposition.py)
+  store_hits      puzzles answered from a SolutionStore
+  store_misses    puzzles searched for lack of a stored solution
+
+plus max_depth, the deepest level of hypotheses reached.
+
+Counting is always on and costs an attribute lookup and an addition.  Timing
+of solver phases (update_partials, deduce, probe, branch, line_solver) is off
+unless the stats are created with timing=True or a hook is added; while off,
+timer() returns a shared do-nothing context manager.
+
+Hooks (see StatsHook) receive every count and the start and end of every
+timed phase, for plugging in external profilers or metrics exporters.
+"""
+
+import collections
+import contextlib
+import time
+
+
+class StatsHook(object):
+    """Base class for receivers of SolverStats events; override any of these
+    methods."""
+
+    def on_count(self, name, n):
+        """Counter @p name was incremented by @p n."""
+
+    def on_phase_start(self, phase):
+        """A timed @p phase began."""
+
+    def on_phase_end(self, phase, seconds):
+        """A timed @p phase ended after @p seconds."""
+
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class SolverStats(object):
+    """Counters, optional phase timers and hooks for one search."""
+
+    def __init__(self, timing=False):
+        self.counters = collections.Counter()
+        self.timers = collections.Counter()
+        self.max_depth = 0
+        self.timing = timing
+        self._hooks = []
+
+    def __getitem__(self, name):
+        return self.counters[name]
+
+    def add_hook(self, hook):
+        """Send every count and timed phase to @p hook, a StatsHook.  Adding a
+        hook turns timing on."""
+        self._hooks.append(hook)
+        self.timing = True
+
+    def count(self, name, n=1):
+        """Add @p n to counter @p name."""
+        self.counters[name] += n
+        for hook in self._hooks:
+            hook.on_count(name, n)
+
+    def reached_depth(self, depth):
+        """Record that the search reached hypothesis depth @p depth."""
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def timer(self, phase):
+        """Return a context manager that times its body as @p phase, or does
+        nothing if timing is off."""
+        if not self.timing:
+            return _NULL_TIMER
+        return self._timed(phase)
+
+    @contextlib.contextmanager
+    def _timed(self, phase):
+        """Time the body of the with statement as @p phase."""
+        for hook in self._hooks:
+            hook.on_phase_start(phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.timers[phase] += seconds
+            for hook in self._hooks:
+                hook.on_phase_end(phase, seconds)
+
+    def merge(self, other):
+        """Add the counts and times of @p other (eg from a worker process)
+        into these stats."""
+        for (name, n) in other.counters.items():
+            self.count(name, n)
+        self.timers.update(other.timers)
+        self.reached_depth(other.max_depth)
+
+    def as_dict(self):
+        """Return the stats as a JSON-serializable dict."""
+        result = dict(self.counters)
+        result["max_depth"] = self.max_depth
+        if self.timers:
+            result["seconds"] = dict(self.timers)
+        return result
+
+    def __getstate__(self):
+        # Hooks are local to a process and are not pickled.
+        state = dict(self.__dict__)
+        state["_hooks"] = []
+        return state
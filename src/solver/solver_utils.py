@@ -51,3 +51,142 @@ def all_legal_lines(run_counts, current_line):
         else:
             # Did not error out.
             yield line
+
+
+def legal_line_counts(run_counts, current_line):
+    """Count the complete lines that all_legal_lines would generate for
+    @p run_counts and @p current_line, without generating them.
+
+    Returns a pair (total, marked) where total is the number of legal lines
+    and marked[i] is the number of those lines in which cell i is MARKED.
+    Runs in O(len(current_line) * len(run_counts)) time by counting the
+    placements of each prefix and suffix of the runs."""
+    runs = [run for run in run_counts if run]
+    num_runs = len(runs)
+    length = len(current_line)
+
+    # blocked[i] and filled[i] count the UNMARKED and MARKED cells in
+    # current_line[:i], so that "may every cell in [a, b) be MARKED" and
+    # "may every cell in [a, b) be UNMARKED" are constant time questions.
+    blocked = [0] * (length + 1)
+    filled = [0] * (length + 1)
+    for i, cell in enumerate(current_line):
+        blocked[i + 1] = blocked[i] + (cell == rules.UNMARKED)
+        filled[i + 1] = filled[i] + (cell == rules.MARKED)
+
+    # before[j][i] is the number of ways to place runs[:j] in cells [0, i)
+    # with every other cell in that range UNMARKED.
+    before = [[0] * (length + 1) for _ in range(num_runs + 1)]
+    for i in range(length + 1):
+        before[0][i] = int(filled[i] == 0)
+    for j in range(1, num_runs + 1):
+        run = runs[j - 1]
+        for i in range(1, length + 1):
+            ways = 0
+            if current_line[i - 1] != rules.MARKED:
+                ways = before[j][i - 1]
+            start = i - run
+            if start >= 0 and blocked[i] == blocked[start]:
+                if start == 0:
+                    ways += int(j == 1)
+                elif current_line[start - 1] != rules.MARKED:
+                    ways += before[j - 1][start - 1]
+            before[j][i] = ways
+
+    # after[j][i] is the number of ways to place runs[j:] in cells
+    # [i, length) with every other cell in that range UNMARKED.
+    after = [[0] * (length + 1) for _ in range(num_runs + 1)]
+    for i in range(length + 1):
+        after[num_runs][i] = int(filled[length] == filled[i])
+    for j in range(num_runs - 1, -1, -1):
+        run = runs[j]
+        for i in range(length - 1, -1, -1):
+            ways = 0
+            if current_line[i] != rules.MARKED:
+                ways = after[j][i + 1]
+            end = i + run
+            if end <= length and blocked[end] == blocked[i]:
+                if end == length:
+                    ways += int(j == num_runs - 1)
+                elif current_line[end] != rules.MARKED:
+                    ways += after[j + 1][end + 1]
+            after[j][i] = ways
+
+    total = before[num_runs][length]
+    marked = [0] * length
+    if not total:
+        return total, marked
+
+    # Each placement of run j at a given start covers that run's cells in
+    # (ways before it) * (ways after it) legal lines; accumulate those
+    # products over the covered cells with a difference array.
+    delta = [0] * (length + 1)
+    for j, run in enumerate(runs):
+        for start in range(length - run + 1):
+            end = start + run
+            if blocked[end] != blocked[start]:
+                continue
+            if start == 0:
+                left = int(j == 0)
+            elif current_line[start - 1] != rules.MARKED:
+                left = before[j][start - 1]
+            else:
+                left = 0
+            if not left:
+                continue
+            if end == length:
+                right = int(j == num_runs - 1)
+            elif current_line[end] != rules.MARKED:
+                right = after[j + 1][end + 1]
+            else:
+                right = 0
+            if right:
+                delta[start] += left * right
+                delta[end] -= left * right
+    running = 0
+    for i in range(length):
+        running += delta[i]
+        marked[i] = running
+    return total, marked
+
+
+def _deduced_line(total, marked):
+    """Return the line whose cells are MARKED or UNMARKED where all @p total
+    legal lines agree according to @p marked, and UNKNOWN elsewhere."""
+    return [rules.MARKED if count == total else
+            rules.UNMARKED if count == 0 else
+            rules.UNKNOWN
+            for count in marked]
+
+
+def dp_line_solver(run_counts, current_line):
+    """Solve a single line by dynamic programming.
+
+    Returns a pair (num_legal_lines, deduced_line), where deduced_line is
+    @p current_line with every cell that has the same value in all legal
+    lines set to that value.  If there are no legal lines, deduced_line is
+    None."""
+    total, marked = legal_line_counts(run_counts, current_line)
+    if not total:
+        return 0, None
+    return total, _deduced_line(total, marked)
+
+
+def enumerating_line_solver(run_counts, current_line):
+    """Solve a single line by enumerating every legal line.
+
+    Equivalent to dp_line_solver but exponential in the line length; kept
+    as a reference implementation for testing."""
+    runs = [run for run in run_counts if run]
+    if sum(runs) + len(runs) - 1 > len(current_line):
+        return 0, None
+    total = 0
+    marked = [0] * len(current_line)
+    for line in all_legal_lines(runs, current_line):
+        total += 1
+        for (i, cell) in enumerate(line):
+            if cell == rules.MARKED:
+                marked[i] += 1
+    if not total:
+        return 0, None
+    return total, _deduced_line(total, marked)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.backward_chain_solver."""
+
+import inspect
+import sys
+import unittest
+
+from rules.bitboard import BitboardNonogramSolution
+from rules.generator import generate_puzzle
+from rules.nonogram import *
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.brute_force import BruteForceNonogramSolver
+from solver.learning_solver import LearningBackwardChainSolver
+from solver.solver_coroutine import (
+    BACKTRACK, BRANCH, CELL, SolutionNotFound, SolveBudget)
+from solver.solver_utils import enumerating_line_solver
+
+
+class BackwardChainSolverTest(unittest.TestCase):
+    def assertSolved(self, solution):
+        self.assertTrue(solution.complete())
+        self.assertTrue(solution.correct())
+
+    def assertRunSolves(self, solver):
+        """Run @p solver and check that it solves its puzzle; return the
+        solution."""
+        result = solver.run()
+        self.assertEqual(result.status, "solved")
+        self.assertSolved(result.solution)
+        return result.solution
+
+    def test_sample_puzzles(self):
+        for puzzle in (easy_puzzle, ambiguous_puzzle, hard_puzzle):
+            self.assertRunSolves(BackwardChainSolver(puzzle))
+
+    def test_contradiction(self):
+        self.assertEqual(
+            BackwardChainSolver(contradictory_puzzle).run().status,
+            "unsolvable")
+
+    def test_bitboard(self):
+        solution = self.assertRunSolves(BackwardChainSolver(
+            hard_puzzle,
+            initial_solution=BitboardNonogramSolution(hard_puzzle)))
+        self.assertIsInstance(solution, BitboardNonogramSolution)
+
+    def test_enumerating_line_solver(self):
+        self.assertRunSolves(BackwardChainSolver(
+            easy_puzzle, line_solver=enumerating_line_solver))
+
+    def test_only_changed_lines_are_queued(self):
+        solver = BackwardChainSolver(hard_puzzle)
+        while solver.deduce():
+            pass
+        (x, y) = solver.partial_solution.unknown_cell_coordinates()[0]
+        hypothesis = solver.hypothesis((x, y), MARKED)
+        self.assertEqual(hypothesis.dirty_rows, {y})
+        self.assertEqual(hypothesis.dirty_cols, {x})
+        self.assertEqual(solver.partial_solution.cells[x][y], UNKNOWN)
+
+    def test_solved_line_is_not_queued_again(self):
+        # Solving a line queues the lines crossing the cells it set, but not
+        # the line itself.
+        solver = BackwardChainSolver(hard_puzzle)
+        solver.dirty_rows = set()
+        solver.dirty_cols = set()
+        for x in range(hard_puzzle.width):
+            before = solver.partial_solution.column(x)
+            if solver._solve_col(x):
+                break
+        changed = {y for y in range(hard_puzzle.height)
+                   if solver.partial_solution.column(x)[y] != before[y]}
+        self.assertTrue(changed)
+        self.assertEqual(solver.dirty_cols, set())
+        self.assertEqual(solver.dirty_rows, changed)
+
+    def test_undo_restores_state(self):
+        solver = BackwardChainSolver(hard_puzzle)
+        while solver.deduce():
+            pass
+        before = (list(solver.partial_solution.rows),
+                  list(solver.legal_row_counts),
+                  list(solver.legal_col_counts))
+        trail_length = len(solver.trail)
+        coords = solver.speculation_coords()
+        solver.assign(coords, MARKED)
+        try:
+            while solver.deduce():
+                pass
+        except SolutionNotFound:
+            pass
+        self.assertGreater(len(solver.trail), trail_length)
+        solver.undo(trail_length)
+        self.assertEqual((list(solver.partial_solution.rows),
+                          list(solver.legal_row_counts),
+                          list(solver.legal_col_counts)), before)
+
+    def test_probing(self):
+        plain = BackwardChainSolver(hard_puzzle)
+        plain.run()
+        solver = BackwardChainSolver(hard_puzzle, probing=True)
+        self.assertRunSolves(solver)
+        self.assertGreater(solver.stats["probes"], 0)
+        self.assertLessEqual(solver.stats["nodes"],
+                             plain.stats["nodes"] // 10)
+        self.assertEqual(BackwardChainSolver(contradictory_puzzle,
+                                             probing=True).run().status,
+                         "unsolvable")
+
+    def test_probe_budget(self):
+        # The root is probed to fixity, but below it (and past the warm-up)
+        # probing that takes any time at all is too long.
+        solver = BackwardChainSolver(generate_puzzle(20, density=0.4, seed=0),
+                                     probing=True)
+        solver.PROBE_SHARE = 0
+        root_probes = None
+        for solution in solver.solve():
+            if root_probes is None and solver._decisions:
+                root_probes = solver.stats["probes"]
+        self.assertSolved(solution)
+        self.assertGreater(root_probes, 2 * solver.PROBE_WARMUP)
+        self.assertEqual(solver.stats["probes"], root_probes)
+
+    def test_probe_leaves_state(self):
+        solver = BackwardChainSolver(hard_puzzle)
+        solver.deduce_to_fixity()
+        before = list(solver.partial_solution.rows)
+        coords = solver.speculation_coords()
+        outcomes = [solver.probe_value(coords, value)
+                    for value in (MARKED, UNMARKED)]
+        self.assertEqual(list(solver.partial_solution.rows), before)
+        for outcome in outcomes:
+            if outcome is not None:
+                self.assertIn(coords, outcome)
+
+    def test_budgets(self):
+        result = BackwardChainSolver(hard_puzzle).run()
+        self.assertEqual((result.status, result.unknown), ("solved", 0))
+        self.assertSolved(result.solution)
+        self.assertEqual(
+            BackwardChainSolver(contradictory_puzzle).run().status,
+            "unsolvable")
+        result = BackwardChainSolver(hard_puzzle).run(SolveBudget(nodes=5))
+        self.assertEqual((result.status, result.budget),
+                         ("exhausted", "nodes"))
+        # The partial solution holds only deductions, which must agree with
+        # the (unique) solution.
+        total = hard_puzzle.width * hard_puzzle.height
+        self.assertLess(result.unknown, total)
+        self.assertEqual(result.unknown, result.solution.count(UNKNOWN))
+        solution = BackwardChainSolver(hard_puzzle).run().solution
+        for (x, y) in set(result.solution.all_coordinates()) - set(
+                result.solution.unknown_cell_coordinates()):
+            self.assertEqual(result.solution.cells[x][y],
+                             solution.cells[x][y])
+        result = BackwardChainSolver(hard_puzzle).run(
+            SolveBudget(wall_time=0))
+        self.assertEqual(result.budget, "wall_time")
+
+    def test_events(self):
+        for (solver_class, puzzle) in (
+                (BackwardChainSolver, hard_puzzle),
+                (LearningBackwardChainSolver, hard_puzzle),
+                (BruteForceNonogramSolver, easy_puzzle)):
+            solver = solver_class(puzzle)
+            replayed = [[UNKNOWN] * puzzle.height
+                        for _ in range(puzzle.width)]
+            kinds = set()
+            for events in solver.events():
+                for (kind, (x, y), value) in events:
+                    kinds.add(kind)
+                    if kind == CELL:
+                        self.assertNotEqual(replayed[x][y], value)
+                        replayed[x][y] = value
+            solution = solver_class(puzzle).run().solution
+            self.assertEqual(replayed, solution.cells)
+            if solver_class is not BruteForceNonogramSolver:
+                self.assertEqual(kinds, {CELL, BRANCH, BACKTRACK})
+
+    def test_deep_search_does_not_recurse(self):
+        # Every row and column has a single mark, so each placement is a
+        # hypothesis and the search is as deep as the puzzle is wide.
+        size = 40
+        puzzle = NonogramPuzzle("Permutation", [[1]] * size, [[1]] * size)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(len(inspect.stack()) + 40)
+        try:
+            solver = BackwardChainSolver(puzzle)
+            self.assertRunSolves(solver)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertGreaterEqual(solver.stats.max_depth, size // 2)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.batch_solver."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from rules.generator import generate_puzzle
+
+from rules.sample_puzzles import *
+from solver.batch_solver import count_one, solve_batch, solve_one
+from solver.cost_estimator import CostModel
+
+
+class BatchSolverTest(unittest.TestCase):
+    def test_statuses(self):
+        self.assertEqual(solve_one(easy_puzzle)["solution"], [".#.", "#.#"])
+        self.assertEqual(solve_one(contradictory_puzzle)["status"],
+                         "unsolvable")
+        self.assertEqual(
+            solve_one(hard_puzzle, "brute_force", timeout=0)["status"],
+            "timeout")
+
+    def test_batch(self):
+        sample = [easy_puzzle, contradictory_puzzle, hard_puzzle]
+        for jobs in (1, 2):
+            records = sorted(solve_batch(iter(sample), jobs=jobs),
+                             key=lambda record: record["index"])
+            self.assertEqual([record["status"] for record in records],
+                             ["solved", "unsolvable", "solved"])
+            self.assertEqual(records[2]["name"], hard_puzzle.name)
+            self.assertGreater(records[2]["nodes"], 1)
+
+    def test_count_solutions(self):
+        self.assertEqual(count_one(easy_puzzle)["status"], "unique")
+        record = count_one(ambiguous_puzzle)
+        self.assertEqual(record["status"], "multiple")
+        self.assertEqual(sorted(record["solutions"]),
+                         [["#.", ".#"], [".#", "#."]])
+        records = list(solve_batch([contradictory_puzzle, hard_puzzle],
+                                   count_limit=0))
+        self.assertEqual([record["status"] for record in records],
+                         ["unsolvable", "unique"])
+
+    def test_longest_first(self):
+        sample = [easy_puzzle, contradictory_puzzle, hard_puzzle]
+        records = list(solve_batch(iter(sample), cost_model=CostModel()))
+        # The hard puzzle is started first.
+        self.assertEqual(records[0]["name"], hard_puzzle.name)
+        self.assertEqual(
+            [record["predicted_time"] for record in records],
+            sorted((record["predicted_time"] for record in records),
+                   reverse=True))
+        self.assertIn("unknown", records[0]["features"])
+        records = list(solve_batch(iter(sample), jobs=2,
+                                   cost_model=CostModel()))
+        self.assertEqual(sorted(record["status"] for record in records),
+                         ["solved", "solved", "unsolvable"])
+        self.assertTrue(all("predicted_time" in record
+                            for record in records))
+
+    def test_store(self):
+        sample = [generate_puzzle(8, seed=seed) for seed in range(6)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "solutions.sqlite")
+
+            def use_times():
+                with sqlite3.connect(path) as db:
+                    return dict(db.execute(
+                        "SELECT key, last_used FROM solutions"))
+
+            for jobs in (1, 2):
+                records = list(solve_batch(sample, jobs=jobs,
+                                           store_path=path))
+                self.assertTrue(all(record["status"] == "solved"
+                                    for record in records))
+                first = use_times()
+                self.assertEqual(len(first), len(sample))
+                # All hits; their use times are written when the batch
+                # ends.
+                records = list(solve_batch(sample, jobs=jobs,
+                                           store_path=path))
+                self.assertEqual(sum(record["stats"]["store_hits"]
+                                     for record in records), len(sample))
+                second = use_times()
+                self.assertTrue(all(second[key] > first[key]
+                                    for key in first))
+                os.remove(path)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.cost_estimator."""
+
+import unittest
+
+from rules.generator import generate_puzzle
+from rules.sample_puzzles import *
+from solver.cost_estimator import FEATURES, CostModel, puzzle_features
+
+
+class CostEstimatorTest(unittest.TestCase):
+    def test_features(self):
+        features = puzzle_features(easy_puzzle)
+        self.assertEqual(sorted(features), sorted(FEATURES))
+        # Deduction alone solves the easy puzzle.
+        self.assertEqual(features["unknown"], 0)
+        self.assertEqual(puzzle_features(easy_puzzle, probe=False)["unknown"],
+                         1)
+        self.assertEqual(puzzle_features(contradictory_puzzle)["unknown"], 0)
+
+    def test_truncated_probe(self):
+        puzzle = generate_puzzle(10, seed=0)
+        full = puzzle_features(puzzle, max_line_solves=10 ** 6)
+        short = puzzle_features(puzzle, max_line_solves=1)
+        self.assertEqual((full["truncated"], short["truncated"]), (0, 1))
+        self.assertGreater(short["unknown"], full["unknown"])
+
+    def test_bigger_is_slower(self):
+        model = CostModel()
+        small = model.predict(puzzle_features(generate_puzzle(10, seed=1)))
+        large = model.predict(puzzle_features(generate_puzzle(40, seed=1)))
+        self.assertLess(small, large)
+
+    def test_fit(self):
+        # Records whose time is exactly the default prediction refit to it.
+        model = CostModel()
+        records = []
+        for seed in range(12):
+            features = puzzle_features(generate_puzzle(
+                10 + seed * 2, density=0.3 + seed * 0.03, seed=seed))
+            records.append({"features": features,
+                            "wall_time": model.predict(features)})
+        records.append({"features": None, "wall_time": 1})
+        refit = CostModel({})
+        self.assertEqual(refit.fit(records, ridge=0), 12)
+        for record in records[:-1]:
+            self.assertAlmostEqual(refit.predict(record["features"]),
+                                   record["wall_time"], places=4)
+
+
+# Obligatory main hook
+if __name__ == "__main__":
+    unittest.main()
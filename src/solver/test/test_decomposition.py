@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.decomposition."""
+
+import unittest
+
+from rules.generator import generate_puzzle
+from rules.nonogram import MARKED, UNKNOWN, UNMARKED
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.decomposition import components, line_groups
+from solver.solution_counter import count_solutions
+
+
+# After deduction, this puzzle is left with two independent 2x2 squares,
+# each of which has two solutions.
+split_puzzle = generate_puzzle(15, seed=2)
+
+
+class DecompositionTest(unittest.TestCase):
+    def test_line_groups(self):
+        (o, x, _) = (UNMARKED, MARKED, UNKNOWN)
+        self.assertEqual(line_groups([2, 1], [_, _, o, _, _]),
+                         [[0, 1], [3, 4]])
+        self.assertEqual(line_groups([1], [_, o, _]), [[0, 2]])
+        self.assertEqual(line_groups([1, 1], [x, _, o, _, _, o, x]),
+                         [[1], [3, 4]])
+        self.assertEqual(line_groups([3], [x, x, x]), [])
+
+    def test_components(self):
+        solver = BackwardChainSolver(split_puzzle)
+        solver.deduce_to_fixity()
+        parts = components(split_puzzle, solver.partial_solution)
+        self.assertEqual([len(part) for part in parts], [4, 4])
+
+    def test_decomposed_search(self):
+        solver = BackwardChainSolver(split_puzzle, decompose=True)
+        result = solver.run()
+        self.assertEqual(result.status, "solved")
+        self.assertEqual(solver.stats["components"], 2)
+        # Solutions are still all found, without decomposing.
+        self.assertEqual(len(count_solutions(split_puzzle, decompose=True)),
+                         4)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.distributed_solver."""
+
+import json
+import socket
+import threading
+import unittest
+
+from rules.nonogram import MARKED, NonogramSolution
+from rules.puzzle_io import solution_to_strings
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.distributed_solver import Coordinator, DistributedSolver
+from solver.distributed_solver import run_worker
+from solver.solver_coroutine import SolutionNotFound
+from solver.solver_stats import SolverStats
+
+
+class FakeWorker(object):
+    """A worker connection driven message by message."""
+
+    def __init__(self, coordinator):
+        self.sock = socket.create_connection(coordinator.address,
+                                             timeout=30)
+        self.rfile = self.sock.makefile("rb")
+        self.send({"type": "hello"})
+        assert self.receive()["type"] == "puzzle"
+
+    def send(self, message):
+        self.sock.sendall((json.dumps(message) + "\n").encode())
+
+    def receive(self):
+        return json.loads(self.rfile.readline())
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+def start_worker(coordinator):
+    thread = threading.Thread(target=run_worker, args=coordinator.address,
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+class DistributedSolverTest(unittest.TestCase):
+    def test_hard_puzzle(self):
+        solver = DistributedSolver(hard_puzzle, workers=2, split_depth=1)
+        result = solver.run()
+        self.assertEqual(result.status, "solved")
+        self.assertTrue(result.solution.correct())
+        self.assertGreater(solver.stats["subproblems"], 0)
+
+    def test_refuted(self):
+        # Subproblems that each contradict the solution.
+        solution = BackwardChainSolver(hard_puzzle).run().solution
+        subproblems = []
+        for coords in [(0, 0), (5, 5)]:
+            partial = NonogramSolution(hard_puzzle)
+            (x, y) = coords
+            if solution.cells[x][y] == MARKED:
+                partial.unmark(coords)
+            else:
+                partial.mark(coords)
+            subproblems.append(partial)
+        coordinator = Coordinator(hard_puzzle, subproblems)
+        try:
+            start_worker(coordinator).join(timeout=30)
+            self.assertTrue(coordinator.finished.is_set())
+            self.assertIsNone(coordinator.solution)
+        finally:
+            coordinator.close()
+
+    def test_lost_worker(self):
+        stats = SolverStats()
+        coordinator = Coordinator(hard_puzzle,
+                                  [NonogramSolution(hard_puzzle)],
+                                  stats=stats)
+        try:
+            lost = FakeWorker(coordinator)
+            lost.send({"type": "request"})
+            self.assertEqual(lost.receive()["type"], "work")
+            lost.close()
+            start_worker(coordinator)
+            self.assertTrue(coordinator.finished.wait(timeout=30))
+            self.assertTrue(coordinator.solution.correct())
+            self.assertEqual(stats["lost_workers"], 1)
+        finally:
+            coordinator.close()
+
+    def test_malformed_messages(self):
+        stats = SolverStats()
+        coordinator = Coordinator(hard_puzzle,
+                                  [NonogramSolution(hard_puzzle)],
+                                  stats=stats)
+        try:
+            rows = solution_to_strings(NonogramSolution(hard_puzzle))
+            for message in [["type"],
+                            {"type": "result", "id": 0, "solution": 5},
+                            {"type": "result", "id": 0, "solution": rows,
+                             "stats": []},
+                            {"type": "result", "id": 0,
+                             "solution": [row[:-1] for row in rows]},
+                            {"type": "split", "subproblems": [rows[:-1]]},
+                            {"type": "split", "subproblems": 5}]:
+                worker = FakeWorker(coordinator)
+                worker.send({"type": "request"})
+                self.assertEqual(worker.receive(),
+                                 {"type": "work", "id": 0, "solution": rows})
+                worker.send(message)
+                # The worker is dropped and its subproblem queued again.
+                self.assertEqual(worker.rfile.readline(), b"")
+                worker.close()
+            self.assertFalse(coordinator.finished.is_set())
+            self.assertEqual(stats["lost_workers"], 6)
+            self.assertEqual(stats["steals"], 0)
+        finally:
+            coordinator.close()
+
+    def test_work_stealing(self):
+        coordinator = Coordinator(hard_puzzle,
+                                  [NonogramSolution(hard_puzzle)])
+        (busy, idle) = (FakeWorker(coordinator), FakeWorker(coordinator))
+        try:
+            busy.send({"type": "request"})
+            work = busy.receive()
+            self.assertEqual(work["type"], "work")
+            idle.send({"type": "request"})
+            self.assertEqual(idle.receive()["type"], "wait")
+            self.assertEqual(busy.receive()["type"], "split")
+            busy.send({"type": "split", "subproblems": [work["solution"]]})
+            idle.send({"type": "request"})
+            self.assertEqual(idle.receive()["type"], "work")
+        finally:
+            busy.close()
+            idle.close()
+            coordinator.close()
+
+    def test_split_off(self):
+        solver = BackwardChainSolver(hard_puzzle)
+        search = solver.solve()
+        partial = None
+        while partial is None:
+            next(search)
+            partial = solver.split_off()
+        self.assertEqual(solver.stats["split_offs"], 1)
+        # The solution is in exactly one of the two parts of the tree.
+        found = []
+        for part in (search, BackwardChainSolver(
+                hard_puzzle, initial_solution=partial).solve()):
+            solution = None
+            try:
+                for solution in part:
+                    pass
+                found.append(solution.correct())
+            except SolutionNotFound:
+                found.append(False)
+        self.assertEqual(sorted(found), [False, True])
+
+
+# Obligatory main hook
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.heuristics."""
+
+import unittest
+
+from rules.nonogram import MARKED, UNMARKED
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.heuristics import STRATEGIES, MarkProbability
+from solver.solution_counter import count_solutions
+
+
+class HeuristicsTest(unittest.TestCase):
+    def test_strategies_solve(self):
+        for (name, strategy_class) in sorted(STRATEGIES.items()):
+            solver = BackwardChainSolver(hard_puzzle,
+                                         strategy=strategy_class())
+            result = solver.run()
+            self.assertEqual(result.status, "solved", name)
+            self.assertTrue(result.solution.correct(), name)
+            # Every strategy still finds every solution.
+            self.assertEqual(
+                len(count_solutions(ambiguous_puzzle,
+                                    strategy=strategy_class())), 2, name)
+
+    def test_default_is_most_constrained(self):
+        default = BackwardChainSolver(hard_puzzle)
+        default.run()
+        explicit = BackwardChainSolver(
+            hard_puzzle, strategy=STRATEGIES["most_constrained"]())
+        explicit.run()
+        self.assertEqual(default.stats["nodes"], explicit.stats["nodes"])
+
+    def test_mark_probability_values(self):
+        solver = BackwardChainSolver(hard_puzzle)
+        solver.deduce_to_fixity()
+        strategy = MarkProbability()
+        unknowns = solver.partial_solution.unknown_cell_coordinates()
+        coords = strategy.choose(solver, unknowns)
+        self.assertIn(coords, unknowns)
+        self.assertEqual(sorted(strategy.values(solver, coords)),
+                         sorted([MARKED, UNMARKED]))
+
+
+# Obligatory main hook
+if __name__ == "__main__":
+    unittest.main()
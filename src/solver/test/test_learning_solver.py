@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.learning_solver."""
+
+import unittest
+
+from rules.nonogram import *
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.learning_solver import LearningBackwardChainSolver
+from solver.solution_counter import count_solutions
+
+
+class LearningBackwardChainSolverTest(unittest.TestCase):
+    def test_sample_puzzles(self):
+        for puzzle in (easy_puzzle, ambiguous_puzzle, hard_puzzle):
+            solution = LearningBackwardChainSolver(puzzle).run().solution
+            self.assertTrue(solution.complete())
+            self.assertTrue(solution.correct())
+        self.assertEqual(
+            LearningBackwardChainSolver(contradictory_puzzle).run().status,
+            "unsolvable")
+
+    def test_learns(self):
+        plain = BackwardChainSolver(hard_puzzle)
+        plain.run()
+        solver = LearningBackwardChainSolver(hard_puzzle, max_nogoods=2)
+        solver.run()
+        self.assertGreater(solver.stats["nogoods"], 2)
+        self.assertLessEqual(len(solver._nogoods), 2)
+        self.assertLess(solver.stats["nodes"], plain.stats["nodes"])
+
+    def test_all_solutions(self):
+        puzzle = NonogramPuzzle("Permutations", [[1]] * 5, [[1]] * 5)
+        for kwargs in ({}, {"max_nogoods": 1}, {"probing": True}):
+            solutions = count_solutions(
+                puzzle, solver_class=LearningBackwardChainSolver, **kwargs)
+            self.assertEqual(len(solutions), 120)
+            self.assertEqual(len({tuple(map(tuple, solution.rows))
+                                  for solution in solutions}), 120)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
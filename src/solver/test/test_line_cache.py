@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.line_cache."""
+
+import unittest
+
+from rules.nonogram import MARKED, UNMARKED, UNKNOWN
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.line_cache import LineSolutionCache
+from solver.solver_utils import dp_line_solver
+
+
+class LineSolutionCacheTest(unittest.TestCase):
+    def test_matches_line_solver(self):
+        cache = LineSolutionCache()
+        line = [UNKNOWN, MARKED, UNKNOWN, UNKNOWN]
+        (num_lines, deduced) = dp_line_solver([2], line)
+        self.assertEqual(cache([2], line), (num_lines, tuple(deduced)))
+        self.assertEqual(cache([2, 1], [UNMARKED] * 4), (0, None))
+        self.assertEqual(cache([2], line), (num_lines, tuple(deduced)))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_lru_eviction(self):
+        cache = LineSolutionCache(max_entries=2)
+        cache([1], [UNKNOWN] * 3)
+        cache([2], [UNKNOWN] * 3)
+        cache([1], [UNKNOWN] * 3)
+        cache([3], [UNKNOWN] * 3)  # Evicts [2], the least recently used.
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        cache([1], [UNKNOWN] * 3)
+        self.assertEqual(cache.hits, 2)
+        cache([2], [UNKNOWN] * 3)
+        self.assertEqual(cache.misses, 4)
+
+    def test_memory_cap(self):
+        cache = LineSolutionCache(max_entries=None, max_bytes=2000)
+        for length in range(1, 40):
+            cache([1], [UNKNOWN] * length)
+        self.assertLessEqual(cache.size_bytes, 2000)
+        self.assertGreater(cache.evictions, 0)
+        self.assertEqual(cache.stats()["entries"], len(cache))
+
+    def test_shared_across_solvers(self):
+        cache = LineSolutionCache()
+        for _ in range(2):
+            for _ in BackwardChainSolver(hard_puzzle,
+                                         line_solver=cache).solve():
+                pass
+        self.assertGreater(cache.hits, cache.misses)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.line_product_solver."""
+
+import unittest
+
+from rules.generator import generate_puzzle
+from rules.nonogram import *
+from rules.sample_puzzles import *
+from solver.line_product_solver import LineProductSolver
+from solver.solution_counter import count_solutions
+from solver.solver_coroutine import SolutionNotFound
+
+
+def solution_rows(solutions):
+    """Return a sorted list of the rows of each of @p solutions."""
+    return sorted(tuple(map(tuple, solution.rows)) for solution in solutions)
+
+
+class LineProductSolverTest(unittest.TestCase):
+    def test_sample_puzzles(self):
+        for puzzle in (easy_puzzle, ambiguous_puzzle, hard_puzzle):
+            solution = None
+            for solution in LineProductSolver(puzzle).solve():
+                pass
+            self.assertTrue(solution.complete())
+            self.assertTrue(solution.correct())
+        with self.assertRaises(SolutionNotFound):
+            for _ in LineProductSolver(contradictory_puzzle).solve():
+                pass
+
+    def test_initial_solution(self):
+        initial = NonogramSolution(ambiguous_puzzle)
+        initial.mark((1, 0))
+        solutions = count_solutions(ambiguous_puzzle,
+                                    solver_class=LineProductSolver,
+                                    initial_solution=initial)
+        self.assertEqual(solution_rows(solutions),
+                         [((UNMARKED, MARKED), (MARKED, UNMARKED))])
+
+    def test_matches_backward_chain(self):
+        for seed in range(10):
+            puzzle = generate_puzzle(6, density=0.5, seed=seed)
+            self.assertEqual(
+                solution_rows(count_solutions(puzzle)),
+                solution_rows(count_solutions(
+                    puzzle, solver_class=LineProductSolver)))
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
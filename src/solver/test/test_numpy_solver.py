@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.numpy_solver."""
+
+import unittest
+
+from rules.generator import generate_puzzle
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.numpy_solver import NumpyBackwardChainSolver, np
+from solver.solver_coroutine import SolutionNotFound, SolveBudget
+
+
+def snapshots(solver):
+    """Return the list of rows of each partial solution @p solver yields."""
+    return [list(solution.rows) for solution in solver.solve()]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class NumpySolverTest(unittest.TestCase):
+    def test_matches_pure_python(self):
+        for puzzle in (easy_puzzle, ambiguous_puzzle, hard_puzzle):
+            self.assertEqual(snapshots(NumpyBackwardChainSolver(puzzle)),
+                             snapshots(BackwardChainSolver(puzzle)))
+
+    def test_line_cap(self):
+        # Lines over the cap are solved by the line solver instead.
+        for cap in (0, 3, 20):
+            solver = NumpyBackwardChainSolver(hard_puzzle)
+            solver.MAX_LINE_CANDIDATES = cap
+            self.assertEqual(snapshots(solver),
+                             snapshots(BackwardChainSolver(hard_puzzle)))
+        solver = NumpyBackwardChainSolver(contradictory_puzzle)
+        solver.MAX_LINE_CANDIDATES = 0
+        with self.assertRaises(SolutionNotFound):
+            snapshots(solver)
+
+    def test_lazy_enumeration(self):
+        # Nothing is enumerated before the first yield, and a large puzzle
+        # enumerates only its lines under the cap, so budgets apply.
+        solver = NumpyBackwardChainSolver(generate_puzzle(50, seed=0))
+        self.assertIsNone(solver.row_candidates)
+        result = solver.run(SolveBudget(nodes=1))
+        self.assertEqual((result.status, result.budget),
+                         ("exhausted", "nodes"))
+        self.assertLess(len(solver.row_owners) + len(solver.col_owners),
+                        100 * solver.MAX_LINE_CANDIDATES)
+
+    def test_contradiction(self):
+        with self.assertRaises(SolutionNotFound):
+            snapshots(NumpyBackwardChainSolver(contradictory_puzzle))
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
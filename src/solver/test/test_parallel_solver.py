@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.parallel_solver."""
+
+import unittest
+
+from rules.generator import generate_puzzle
+from rules.sample_puzzles import *
+from solver.parallel_solver import ParallelBackwardChainSolver
+
+
+class ParallelSolverTest(unittest.TestCase):
+    def test_hard_puzzle(self):
+        for split_depth in (0, 2):
+            result = ParallelBackwardChainSolver(
+                hard_puzzle, workers=2, split_depth=split_depth).run()
+            self.assertEqual(result.status, "solved")
+            self.assertTrue(result.solution.complete())
+            self.assertTrue(result.solution.correct())
+
+    def test_solved_while_splitting(self):
+        result = ParallelBackwardChainSolver(easy_puzzle, workers=1,
+                                             split_depth=3).run()
+        self.assertEqual(result.status, "solved")
+        self.assertTrue(result.solution.correct())
+
+    def test_decompose(self):
+        solver = ParallelBackwardChainSolver(
+            generate_puzzle(15, seed=2), workers=2, decompose=True)
+        result = solver.run()
+        self.assertEqual(result.status, "solved")
+        self.assertTrue(result.solution.correct())
+        self.assertEqual(solver.stats["components"], 2)
+
+    def test_contradiction(self):
+        self.assertEqual(ParallelBackwardChainSolver(
+            contradictory_puzzle, workers=1).run().status, "unsolvable")
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
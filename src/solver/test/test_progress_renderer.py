@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.progress_renderer."""
+
+import io
+import unittest
+
+from rules.nonogram import MARKED, UNMARKED
+from rules.sample_puzzles import *
+from solver.progress_renderer import ProgressRenderer
+from solver.solver_coroutine import BRANCH, CELL
+
+
+class ProgressRendererTest(unittest.TestCase):
+    def test_plain(self):
+        out = io.StringIO()
+        renderer = ProgressRenderer(easy_puzzle, out)
+        renderer.update([])
+        self.assertEqual(out.getvalue().count("|"), easy_puzzle.height)
+        out.truncate(0)
+        out.seek(0)
+        renderer.update([(BRANCH, (1, 0), MARKED),
+                         (CELL, (1, 0), MARKED)])
+        self.assertEqual(out.getvalue(),
+                         "branch (1, 0) = ##\n" +
+                         easy_puzzle.ascii_nth_single_row_header(0) +
+                         "    ##   \n")
+        renderer.update([(CELL, (1, 0), UNMARKED)])
+        self.assertEqual(renderer.solution.cells[1][0], UNMARKED)
+
+    def test_ansi(self):
+        out = io.StringIO()
+        renderer = ProgressRenderer(hard_puzzle, out, ansi=True)
+        renderer.update([])
+        drawn = len(out.getvalue())
+        renderer.update([(CELL, (0, 0), MARKED)])
+        # Only the changed cell is written, however big the puzzle.
+        self.assertLess(len(out.getvalue()) - drawn, 30)
+        self.assertIn(MARKED, out.getvalue()[drawn:])
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
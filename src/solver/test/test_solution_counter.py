@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.solution_counter."""
+
+import unittest
+
+from rules.nonogram import *
+from rules.sample_puzzles import *
+from solver.solution_counter import count_solutions, is_unique
+
+
+class SolutionCounterTest(unittest.TestCase):
+    def test_counts(self):
+        self.assertEqual(len(count_solutions(easy_puzzle)), 1)
+        self.assertEqual(len(count_solutions(ambiguous_puzzle)), 2)
+        self.assertEqual(count_solutions(contradictory_puzzle), [])
+        self.assertEqual(len(count_solutions(hard_puzzle)), 1)
+
+    def test_matches_brute_force(self):
+        # Every 4x4 permutation matrix is a solution.
+        puzzle = NonogramPuzzle("Permutations", [[1]] * 4, [[1]] * 4)
+        solutions = count_solutions(puzzle)
+        expected = [solution for solution in all_possible_total_solutions(
+            NonogramSolution(puzzle)) if solution.correct()]
+        self.assertEqual(len(expected), 24)
+        self.assertEqual(sorted(tuple(s.rows) for s in solutions),
+                         sorted(tuple(s.rows) for s in expected))
+
+    def test_limit(self):
+        puzzle = NonogramPuzzle("Permutations", [[1]] * 4, [[1]] * 4)
+        self.assertEqual(len(count_solutions(puzzle, limit=3)), 3)
+        self.assertFalse(is_unique(puzzle))
+        self.assertTrue(is_unique(hard_puzzle))
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.solution_store."""
+
+import os
+import tempfile
+import unittest
+
+from rules.canonical import transform_clues
+from rules.nonogram import NonogramPuzzle
+from rules.generator import generate_puzzle
+from rules.sample_puzzles import *
+from solver.batch_solver import solve_batch
+from solver.solution_store import CachingSolver, SolutionStore
+
+
+class SolutionStoreTest(unittest.TestCase):
+    def test_caching_solver(self):
+        mirrored = NonogramPuzzle("Mirrored", *transform_clues(
+            hard_puzzle.row_run_counts, hard_puzzle.col_run_counts,
+            (True, True, False)))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "solutions.sqlite")
+            with SolutionStore(path) as store:
+                solver = CachingSolver(hard_puzzle, store=store)
+                solver.run()
+                self.assertEqual(solver.stats["store_misses"], 1)
+                self.assertEqual(CachingSolver(contradictory_puzzle,
+                                               store=store).run().status,
+                                 "unsolvable")
+            # Reopened, the store answers for a variant of the puzzle.
+            with SolutionStore(path) as store:
+                self.assertEqual(len(store), 2)
+                solver = CachingSolver(mirrored, store=store)
+                solution = solver.run().solution
+                self.assertTrue(solution.correct())
+                self.assertEqual(solver.stats["store_hits"], 1)
+                self.assertEqual(solver.stats["nodes"], 0)
+                self.assertEqual(store.get(contradictory_puzzle),
+                                 (True, None))
+
+    def test_eviction(self):
+        with SolutionStore(":memory:", max_entries=2,
+                           memory_entries=1) as store:
+            sample = [generate_puzzle(5, seed=seed) for seed in range(3)]
+            for puzzle in sample[:2]:
+                CachingSolver(puzzle, store=store).run()
+            store.get(sample[0])
+            CachingSolver(sample[2], store=store).run()
+            self.assertEqual(len(store), 2)
+            self.assertEqual([store.get(puzzle)[0] for puzzle in sample],
+                             [True, False, True])
+
+    def test_shared_file(self):
+        # Stores open on one file, as in the workers of a batch, keep to
+        # max_entries between them.
+        sample = [generate_puzzle(5, seed=seed) for seed in range(4)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "solutions.sqlite")
+            with SolutionStore(path, max_entries=2) as first, \
+                    SolutionStore(path, max_entries=2) as second:
+                for (store, puzzle) in zip([first, second] * 2, sample):
+                    CachingSolver(puzzle, store=store).run()
+                self.assertEqual((len(first), len(second)), (2, 2))
+            records = list(solve_batch(sample, jobs=2, store_path=path))
+            self.assertEqual(sorted(record["stats"].get("store_hits", 0)
+                                    for record in records), [0, 0, 1, 1])
+            with SolutionStore(path) as store:
+                self.assertEqual(len(store), 4)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.solve_service."""
+
+import asyncio
+import json
+import unittest
+
+from rules.puzzle_io import puzzle_to_json
+from rules.sample_puzzles import *
+from solver.solve_service import ServiceBusy, SolveService, start_server
+
+
+async def _request(port, method, path, body=None, content_length=None):
+    """Return the status and the JSON lines of the response to an HTTP
+    request to the local server on @p port, whose Content-Length header is
+    @p content_length if not None."""
+    (reader, writer) = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    if content_length is None:
+        content_length = len(data)
+    writer.write(("%s %s HTTP/1.1\r\nContent-Length: %s\r\n\r\n" %
+                  (method, path, content_length)).encode("ascii") + data)
+    response = await reader.read()
+    writer.close()
+    (head, _, body) = response.partition(b"\r\n\r\n")
+    return (int(head.split()[1]),
+            [json.loads(line) for line in body.splitlines()])
+
+
+class SolveServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = SolveService(workers=1, max_queue=0,
+                                    progress_interval=0)
+        self.server = await start_server(self.service)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.shutdown()
+
+    async def test_solve(self):
+        result = await self.service.solve(easy_puzzle)
+        self.assertEqual(result["solution"], [".#.", "#.#"])
+        (status, lines) = await _request(
+            self.port, "POST", "/solve",
+            {"puzzle": puzzle_to_json(hard_puzzle), "stream": True})
+        self.assertEqual(status, 200)
+        self.assertEqual(lines[0]["event"], "accepted")
+        self.assertIn("progress", [line["event"] for line in lines])
+        self.assertEqual(lines[-1]["event"], "result")
+        self.assertEqual(lines[-1]["status"], "solved")
+
+    async def test_errors(self):
+        (status, _) = await _request(self.port, "POST", "/solve",
+                                     {"puzzle": {"rows": "nonsense"}})
+        self.assertEqual(status, 400)
+        (status, _) = await _request(self.port, "GET", "/nowhere")
+        self.assertEqual(status, 404)
+        for content_length in ("abc", "-5"):
+            (status, lines) = await _request(self.port, "POST", "/solve",
+                                             content_length=content_length)
+            self.assertEqual(status, 400)
+            self.assertIn("Content-Length", lines[0]["error"])
+        for timeout in (True, False, 0, -1, "10"):
+            (status, lines) = await _request(
+                self.port, "POST", "/solve",
+                {"puzzle": puzzle_to_json(easy_puzzle), "timeout": timeout})
+            self.assertEqual(status, 400)
+            self.assertIn("timeout", lines[0]["error"])
+
+    async def test_read_timeout(self):
+        server = await start_server(self.service, read_timeout=0.2)
+        try:
+            port = server.sockets[0].getsockname()[1]
+            (reader, writer) = await asyncio.open_connection("127.0.0.1",
+                                                             port)
+            # The request line arrives, but the headers never end.
+            writer.write(b"GET /status HTTP/1.1\r\n")
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            (head, _, body) = response.partition(b"\r\n\r\n")
+            self.assertEqual(int(head.split()[1]), 408)
+            self.assertIn("error", json.loads(body))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    async def test_busy_and_cancel(self):
+        events = self.service.events(hard_puzzle, "brute_force")
+        self.assertEqual((await events.__anext__())["event"], "accepted")
+        with self.assertRaises(ServiceBusy):
+            await self.service.solve(easy_puzzle)
+        (status, _) = await _request(
+            self.port, "POST", "/solve",
+            {"puzzle": puzzle_to_json(easy_puzzle)})
+        self.assertEqual(status, 503)
+        await events.aclose()
+        # The brute force solver stops at its next yield once cancelled.
+        for _ in range(100):
+            if not self.service.active:
+                break
+            await asyncio.sleep(0.05)
+        (status, lines) = await _request(self.port, "GET", "/status")
+        self.assertEqual(lines, [{"workers": 1, "capacity": 1, "active": 0}])
+        result = await self.service.solve(hard_puzzle, "brute_force",
+                                          timeout=0)
+        self.assertEqual(result["status"], "timeout")
+
+    async def test_queued_time_counts(self):
+        service = SolveService(workers=1, max_queue=1)
+        try:
+            blocker = service.events(hard_puzzle, "brute_force")
+            await blocker.__anext__()
+            queued = asyncio.ensure_future(
+                service.solve(easy_puzzle, timeout=0.1))
+            await asyncio.sleep(0.3)
+            await blocker.aclose()
+            self.assertEqual((await queued)["status"], "timeout")
+        finally:
+            service.shutdown()
+
+    async def test_disconnect_cancels(self):
+        (reader, writer) = await asyncio.open_connection("127.0.0.1",
+                                                         self.port)
+        data = json.dumps({"puzzle": puzzle_to_json(hard_puzzle),
+                           "solver": "brute_force"}).encode("utf-8")
+        writer.write(("POST /solve HTTP/1.1\r\nContent-Length: %d\r\n\r\n"
+                      % len(data)).encode("ascii") + data)
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.service.active, 1)
+        writer.close()
+        for _ in range(50):
+            if not self.service.active:
+                break
+            await asyncio.sleep(0.1)
+        self.assertEqual(self.service.active, 0)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
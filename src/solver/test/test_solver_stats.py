@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.solver_stats."""
+
+import pickle
+import unittest
+
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+from solver.solver_stats import SolverStats, StatsHook
+
+
+class RecordingHook(StatsHook):
+    def __init__(self):
+        self.counts = []
+        self.phases = []
+
+    def on_count(self, name, n):
+        self.counts.append(name)
+
+    def on_phase_end(self, phase, seconds):
+        self.phases.append(phase)
+
+
+class SolverStatsTest(unittest.TestCase):
+    def test_counts_roll_up(self):
+        solver = BackwardChainSolver(hard_puzzle)
+        for _ in solver.solve():
+            pass
+        stats = solver.stats
+        self.assertGreater(stats["hypotheses"], 0)
+        self.assertLessEqual(stats["nodes"], stats["hypotheses"] + 1)
+        self.assertLess(stats["backtracks"], stats["nodes"])
+        self.assertEqual(stats["solutions"], 1)
+        self.assertGreater(stats.max_depth, 0)
+        self.assertGreater(stats["deductions"], 0)
+        self.assertFalse(stats.timers)
+
+    def test_timers_and_hooks(self):
+        stats = SolverStats()
+        hook = RecordingHook()
+        stats.add_hook(hook)
+        for _ in BackwardChainSolver(easy_puzzle, stats=stats).solve():
+            pass
+        self.assertIn("deduce", stats.timers)
+        self.assertIn("line_solver", stats.timers)
+        self.assertIn("deduce", hook.phases)
+        self.assertIn("nodes", hook.counts)
+
+    def test_merge_and_pickle(self):
+        stats = SolverStats()
+        stats.add_hook(RecordingHook())
+        stats.count("nodes", 3)
+        stats.reached_depth(2)
+        copy = pickle.loads(pickle.dumps(stats))
+        total = SolverStats()
+        total.merge(copy)
+        total.merge(copy)
+        self.assertEqual(total["nodes"], 6)
+        self.assertEqual(total.as_dict(), {"nodes": 6, "max_depth": 2})
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
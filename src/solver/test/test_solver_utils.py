@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""Test suite for solver.solver_utils."""
+
+import itertools
+import unittest
+
+from rules.nonogram import MARKED, UNMARKED, UNKNOWN
+from solver.solver_utils import *
+
+
+def _run_count_lists(length):
+    """Generate every run count list that fits in @p length."""
+    yield []
+    for num_runs in range(1, (length + 1) // 2 + 1):
+        for runs in itertools.product(range(1, length + 1), repeat=num_runs):
+            if sum(runs) + num_runs - 1 <= length:
+                yield list(runs)
+
+
+class LineSolverTest(unittest.TestCase):
+    def test_dp_matches_enumeration(self):
+        for length in range(1, 7):
+            for runs in _run_count_lists(length):
+                for line in itertools.product((MARKED, UNMARKED, UNKNOWN),
+                                              repeat=length):
+                    self.assertEqual(
+                        dp_line_solver(runs, list(line)),
+                        enumerating_line_solver(runs, list(line)),
+                        (runs, line))
+
+    def test_counts(self):
+        total, marked = legal_line_counts([1, 1], [UNKNOWN] * 4)
+        self.assertEqual(total, 3)
+        self.assertEqual(marked, [2, 1, 1, 2])
+
+    def test_overlap_deduction(self):
+        total, line = dp_line_solver([3], [UNKNOWN] * 4)
+        self.assertEqual(total, 2)
+        self.assertEqual(line, [UNKNOWN, MARKED, MARKED, UNKNOWN])
+
+    def test_contradiction(self):
+        self.assertEqual(dp_line_solver([2], [MARKED, UNMARKED, MARKED]),
+                         (0, None))
+        self.assertEqual(dp_line_solver([3, 3], [UNKNOWN] * 6), (0, None))
+
+    def test_zero_runs(self):
+        self.assertEqual(dp_line_solver([0], [UNKNOWN] * 3),
+                         (1, [UNMARKED] * 3))
+
+    def test_long_line(self):
+        runs = [1] * 50
+        total, line = dp_line_solver(runs, [UNKNOWN] * 100)
+        self.assertEqual(total, 51)
+        self.assertEqual(line, [UNKNOWN] * 100)
+
+
+# Obligatory main hook
+
+if __name__ == "__main__":
+    unittest.main()
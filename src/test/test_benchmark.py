@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""Test suite for benchmark."""
+
+import unittest
+
+from benchmark import compare, run_solver
+from rules.nonogram import NonogramSolution
+from rules.sample_puzzles import *
+from solver.backward_chain_solver import BackwardChainSolver
+
+
+class WrongSolver(object):
+    """A solver whose only solution marks every cell."""
+
+    def __init__(self, puzzle, stats=None):
+        self.puzzle = puzzle
+
+    def solve(self):
+        solution = NonogramSolution(self.puzzle)
+        for x in range(self.puzzle.width):
+            for y in range(self.puzzle.height):
+                solution.mark((x, y))
+        yield solution
+
+
+def record(status="solved", wall_time=1.0, nodes=10, puzzle="easy"):
+    return {"solver": "backward_chain", "strategy": None, "puzzle": puzzle,
+            "status": status, "wall_time": wall_time, "nodes": nodes}
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_run_solver(self):
+        result = run_solver(BackwardChainSolver, easy_puzzle, 10)
+        self.assertEqual(result["status"], "solved")
+        self.assertGreater(result["nodes"], 0)
+        self.assertEqual(
+            run_solver(BackwardChainSolver, contradictory_puzzle,
+                       10)["status"],
+            "unsolvable")
+        self.assertEqual(run_solver(BackwardChainSolver, hard_puzzle,
+                                    0)["status"],
+                         "timeout")
+        # A complete but wrong solution is not solved.
+        self.assertEqual(run_solver(WrongSolver, easy_puzzle, 10)["status"],
+                         "unsolvable")
+
+    def test_compare(self):
+        baseline = [record(), record(puzzle="hard")]
+        self.assertEqual(compare(baseline, baseline, 1.25, 0.01), [])
+        # Runs missing from the baseline are not compared.
+        self.assertEqual(compare([record(puzzle="new", status="timeout")],
+                                 baseline, 1.25, 0.01), [])
+        regressions = compare([record(status="timeout")], baseline, 1.25,
+                              0.01)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("timeout, was solved", regressions[0])
+        regressions = compare([record(wall_time=2.0)], baseline, 1.25, 0.01)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("2.0000s, was 1.0000s", regressions[0])
+        # Slowdowns within the threshold or under min_time are ignored.
+        self.assertEqual(compare([record(wall_time=1.2)], baseline, 1.25,
+                                 0.01), [])
+        self.assertEqual(compare([record(wall_time=0.005)],
+                                 [record(wall_time=0.001)], 1.25, 0.01), [])
+        regressions = compare([record(nodes=11)], baseline, 1.25, 0.01)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("11 nodes, was 10", regressions[0])
+        # Timed out runs are compared only on their status.
+        timed_out = [record(status="timeout", wall_time=1.0, nodes=10)]
+        self.assertEqual(compare([record(status="timeout", wall_time=2.0,
+                                         nodes=20)],
+                                 timed_out, 1.25, 0.01), [])
+        self.assertEqual(compare([record(wall_time=2.0, nodes=20)],
+                                 timed_out, 1.25, 0.01), [])
+        regressions = compare(timed_out, [record(status="unsolvable")],
+                              1.25, 0.01)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("timeout, was unsolvable", regressions[0])
+
+
+# Obligatory main hook
+if __name__ == "__main__":
+    unittest.main()